@@ -2,14 +2,13 @@
 
 import argparse
 from pathlib import Path
-import sys, os
+import sys, os, glob, json, socket, tempfile
 
-from src.config import CompilationConfig
-from src.compiler import Compiler, CompilationTarget
+# the compiler itself (src) is only imported when compiling here, a daemon client does not need it
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument("file", help="The input file name")
+parser.add_argument("file", nargs="+", help="The input file name, or 'serve' / 'stop' to start / stop the compile daemon. Several files or globs compile as a batch")
 parser.add_argument("-cpu", "--target", "--processor", help="Choose Processor target (default=i8086)", default="i8086")
 
 parser.add_argument("-lax", "--forgive", "--nostrict", action="store_true", help="Reduce strictness when verifying the program")
@@ -20,7 +19,18 @@ parser.add_argument("-q", "-novb", "--quiet", action="store_true", help="Dont ge
 # Obfuscation
 parser.add_argument("-o", "--obfuscate", action="store_true", help="Forget label names")
 parser.add_argument("-heavy", "--unoptimize", action="store_true", help="Dont optimize the generated assembly")
+parser.add_argument("-stackexpr", "--stack-expressions", action="store_true", help="Evaluate expressions on the stack instead of in registers")
+parser.add_argument("-noinline", "--no-inlining", action="store_true", help="Dont replace calls of small functions by their bodies")
+parser.add_argument("-nofold", "--no-folding", action="store_true", help="Dont compute constant expressions at compile time")
+parser.add_argument("-norotate", "--no-rotation", action="store_true", help="Test loop conditions at the top of the loop")
+parser.add_argument("-notail", "--no-tail-calls", action="store_true", help="Call and return in return f(...) instead of jumping to f")
+parser.add_argument("-frames", "--keep-frames", action="store_true", help="Build a bp frame in every function, also when it has no locals")
 parser.add_argument("-full", "--noprune", action="store_true", help="Dont prune out redundant code")
+parser.add_argument("-descent", "--descent", action="store_true", help="Parse expressions by recursive descent instead of precedence climbing")
+
+# Module cache
+parser.add_argument("-nocache", "--no-cache", action="store_true", help="Dont cache the tokens and trees of included modules")
+parser.add_argument("-cache", "--cache-dir", help="Module cache directory (default=.nadlabem_cache)", default=".nadlabem_cache")
 
 parser.add_argument("-min", "--minify", action="store_true", help="Obfuscate and minify (-o & -nocom & -nomap)")
 
@@ -31,6 +41,19 @@ parser.add_argument("-out", "--output", help="Output file destination (default=s
 parser.add_argument("-p", "--print", action="store_true", help="Print to console instead of writing to file", default=None)
 parser.add_argument("-dev", "--devmode", action="store_true", help="Developper mode flag")
 parser.add_argument("-tab", "--tabspaces", help="Tab space amount (default=8)", default=8)
+
+# Compile daemon
+default_socket = Path(tempfile.gettempdir()) / f"nadlabem-{os.getuid() if hasattr(os, 'getuid') else 0}.sock"
+parser.add_argument("-sock", "--socket", help=f"Compile daemon socket (default=$NADLABEM_SOCKET or {default_socket})", default=os.environ.get("NADLABEM_SOCKET", default_socket))
+parser.add_argument("-j", "--jobs", type=int, help="Compile a batch on this many processes (default=cpu count)", default=None)
+parser.add_argument("-manifest", "--manifest", help="Build manifest of a batch, unchanged programs are not recompiled (default=.nadlabem_build.json)", default=".nadlabem_build.json")
+parser.add_argument("-rebuild", "--rebuild", action="store_true", help="Recompile every program of a batch, changed or not")
+parser.add_argument("-prof", "--profile", action="store_true", help="Report phase timings and counters as JSON")
+parser.add_argument("-profout", "--profile-output", help="File for the --profile JSON (default=stderr)", default=None)
+parser.add_argument("-run", "--run", action="store_true", help="Run the compiled program on the built-in i8086 simulator")
+parser.add_argument("-stdin", "--stdin", help="File the simulated program reads its input from (default=no input)", default=None)
+parser.add_argument("-cost", "--cost-report", help="Write the cycle and size estimates of each function as JSON to this file ('-' for stdout), with -run also the simulated counts", default=None)
+parser.add_argument("-local", "--no-daemon", action="store_true", help="Compile in this process even if a daemon is running")
 args = parser.parse_args()
 
 def replace_file_extension(path: str, new_extension: str) -> str:
@@ -42,10 +65,120 @@ def replace_file_extension(path: str, new_extension: str) -> str:
     base, _ = os.path.splitext(path)
     return f"{base}{new_extension}"
 
+def daemon_request(request: dict) -> dict | None:
+    """Send a request to the running compile daemon, None if there is none"""
+    if not hasattr(socket, "AF_UNIX") or not Path(args.socket).exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(str(args.socket))
+            with connection.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode("utf8") + b"\n")
+                stream.flush()
+                return json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None     # stale socket of a daemon that is gone
+
+
+def compile_options() -> dict:
+    """CompilationConfig arguments from the command line, except location and verbosity"""
+    return dict(
+        target = args.target,
+        strict = not args.forgive,
+        generate_mapping = not args.nomapping and not args.minify,
+        erase_comments = args.nocomments or args.minify,
+        tabspaces = int(args.tabspaces),
+        obfuscate = args.obfuscate or args.minify,
+        optimize = not args.unoptimize,
+        register_allocation = not args.stack_expressions,
+        inlining = not args.no_inlining,
+        constant_folding = not args.no_folding,
+        loop_rotation = not args.no_rotation,
+        tail_calls = not args.no_tail_calls,
+        frame_elision = not args.keep_frames,
+        precedence_climbing = not args.descent,
+        cache_dir = None if args.no_cache else str(args.cache_dir),
+    )
+
+
+def write_profile(profile: dict) -> None:
+    text = json.dumps(profile, indent=4)
+    if args.profile_output is None:
+        print(text, file=sys.stderr)
+    else:
+        Path(args.profile_output).write_text(text, encoding="utf8")
+
+
+def batch(patterns: list[str]) -> None:
+    from src.batch import expand, compile_batch, summary
+    from src.manifest import BuildManifest
+    import time
+
+    files = expand(patterns)
+    if not files:
+        raise ValueError(f"No input files match {' '.join(patterns)}!")
+    if args.output or args.print:
+        raise ValueError("A batch writes each output next to its source, it cannot use -out or -p!")
+
+    options = compile_options()
+    if options["cache_dir"] is not None:
+        options["cache_dir"] = Path(options["cache_dir"])
+
+    start = time.perf_counter()
+    manifest = BuildManifest(Path(args.manifest))
+    if args.rebuild:
+        manifest.programs.clear()
+    results = compile_batch(files, options, jobs=args.jobs or os.cpu_count() or 1, manifest=manifest)
+    wall_time = time.perf_counter() - start
+
+    if not args.quiet or any(result.error is not None for result in results):
+        print(summary(results, wall_time))
+    if args.profile:
+        write_profile({str(result.location): result.profile for result in results if result.profile is not None})
+    if any(result.error is not None for result in results):
+        sys.exit(1)
+
+
+def run(output: str, costs: "CostReport | None" = None) -> "SimulationResult":
+    from src.simulator.machine import simulate
+
+    stdin = Path(args.stdin).read_bytes() if args.stdin else b""
+    result = simulate(output, stdin)
+    sys.stdout.write(result.output)
+    print()
+    cycles = f", {costs.total_cycles(result)} cycles" if costs is not None else ""
+    print("\33[44m", f"SIMULATED: {result.exit_state}, {result.instructions} instructions executed{cycles}", '\033[0m')
+    if result.error is not None:
+        print(f"{result.error.error_string} ({result.error.line})", file=sys.stderr)
+    return result
+
+
+def write_cost_report(costs: "CostReport") -> None:
+    if args.cost_report == "-":
+        print(costs.to_json())
+    else:
+        Path(args.cost_report).write_text(costs.to_json(), encoding="utf8")
+
+
 def main() -> None:
     if not args.devmode:
         sys.tracebacklimit = 0
 
+    if args.file != ["serve"] and args.file != ["stop"] and (len(args.file) > 1 or args.jobs is not None or glob.has_magic(args.file[0])):
+        return batch(args.file)
+
+    args.file = args.file[0]
+
+    if args.file == "serve":
+        from src.daemon import CompileDaemon
+        CompileDaemon(Path(args.socket), cache_dir=None if args.no_cache else Path(args.cache_dir).resolve()).serve()
+        return
+
+    if args.file == "stop":
+        if daemon_request({"command": "stop"}) is None:
+            raise ValueError(f"No compile daemon is listening on {args.socket}!")
+        return
+
     file_path = Path(args.file)
     if not file_path.is_file():
         raise ValueError(f"The input file {file_path} does not exist!")
@@ -53,53 +186,76 @@ def main() -> None:
     with file_path.open(encoding="utf8") as file:
         code = file.read()
 
-        if args.target not in CompilationTarget.targets:
-            raise ValueError(f"Unknown target processor {args.target}!")
-
-        config = CompilationConfig(
-            location = Path(file_path),
-            target = args.target,
-            strict = not args.forgive,
-            generate_mapping = not args.nomapping and not args.minify,
-            erase_comments = args.nocomments or args.minify,
-            tabspaces = int(args.tabspaces),
-            verbose = not args.quiet,
-            obfuscate = args.obfuscate or args.minify,
-            optimize = not args.unoptimize,
-        )
-
-        if config.verbose:
+        options = compile_options()
+        verbose = not args.quiet
+
+        if verbose:
             with open("logo.txt", "r", encoding="utf8") as file:
                 print("\033[96m" + file.read() + '\033[0m')
 
-        translator = Compiler(config)
+        # the cost report needs the tree of the program, it is always compiled here
+        response = None if args.no_daemon or args.devmode or args.cost_report else daemon_request({
+            "cwd": os.getcwd(),
+            "location": str(file_path),
+            "source": code,
+            "config": options
+        })
 
-        if config.verbose:
-            print(config)
-            print()
-        
-        output = translator.compile(code)
+        costs = None
 
-        if config.verbose and args.devmode:
-            print(translator.tree)
+        if response is not None and "output" in response:
+            output = response["output"]
+            warnings = [warning["text"] for warning in response["warnings"]]
+            profile = response["profile"]
 
-        if config.verbose and not config.strict and translator.warnings:
+        elif response is not None and "error" in response:
+            print(response["error"]["text"], file=sys.stderr)
+            sys.exit(1)
+
+        else:   # no daemon, or it crashed, compile here
+            from src.config import CompilationConfig
+            from src.compiler import Compiler, CompilationTarget
+
+            if args.target not in CompilationTarget.targets:
+                raise ValueError(f"Unknown target processor {args.target}!")
+
+            if options["cache_dir"] is not None:
+                options["cache_dir"] = Path(options["cache_dir"])
+            config = CompilationConfig(location=Path(file_path), verbose=verbose, cost_report=args.cost_report is not None, **options)
+            translator = Compiler(config)
+
+            if config.verbose:
+                print(config)
+                print()
+            
+            output = translator.compile(code)
+            warnings = translator.warnings
+            profile = translator.profile.as_dict()
+            costs = translator.costs
+
+            if config.verbose and args.devmode:
+                print(translator.tree)
+
+        if args.profile:
+            write_profile(profile)
+
+        if verbose and not options["strict"] and warnings:
             print("\33[44m", "WARNINGS:", '\033[0m')
-            for warning in translator.warnings:
+            for warning in warnings:
                 print(warning)
             print()
 
         if not args.print:
             out = args.output if args.output else replace_file_extension(file_path, ".asm")
 
-            if Path(out).exists() and config.verbose and args.output:
+            if Path(out).exists() and verbose and args.output:
                 overwrite = input(f"\nFile {out} already exists, do you wanna overwrite it? (y/n): ")
                 if overwrite.lower() != "y":
                     print()
                     print("\33[44m", "ABORTED", '\033[0m')
                     exit()
 
-            if config.verbose:
+            if verbose:
                 print()
                 print("\33[44m", f"Saved to file: {out}", '\033[0m')
 
@@ -107,11 +263,21 @@ def main() -> None:
                 output_file.write(output)
 
         else:
-            if config.verbose:
+            if verbose:
                 print()
                 print("\33[44m", "OUTPUT:", '\033[0m')
             print(output)
 
+        result = run(output, costs) if args.run else None
+
+        if costs is not None:
+            if result is not None:
+                costs.record(result)
+            write_cost_report(costs)
+
+        if result is not None and not result.succeeded:
+            sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,119 @@
+from .errors import NadLabemError
+from .config import CompilationConfig
+from .compiler import Compiler
+from .manifest import BuildManifest, source_digest
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+import glob, time
+
+
+class BatchResult:
+
+    def __init__(self, location: Path, seconds: float, instructions: int = 0, warnings: int = 0, error: str | None = None):
+        self.location: Path = location
+        self.seconds: float = seconds
+        self.instructions: int = instructions
+        self.warnings: int = warnings
+        self.error: str | None = error
+        self.sources: dict[Path, str] = {}     # file -> digest of the contents compiled
+        self.up_to_date: bool = False
+        self.profile: dict | None = None
+
+    @property
+    def output(self) -> Path:
+        return self.location.with_suffix(".asm")
+
+
+def expand(patterns: list[str]) -> list[Path]:
+    """Files matching the patterns (plain paths or globs, ** included) in order, each file once"""
+    files: dict[Path, None] = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = Path(match)
+            if path.is_file():
+                files[path] = None
+    return list(files)
+
+
+def compile_file(location: Path, options: dict) -> BatchResult:
+    """Compile one program and write its output next to it, errors end up in the result"""
+    start = time.perf_counter()
+    compiler = None
+    try:
+        compiler = Compiler(CompilationConfig(location=location, verbose=False, **options))
+        output = compiler.compile(location.read_text(encoding="utf8"))
+        location.with_suffix(".asm").write_text(output, encoding="utf8")
+    except NadLabemError as error:
+        line = getattr(error.line, "brief", error.line)
+        warnings = len(compiler.warnings) if compiler is not None else 0
+        return BatchResult(location, time.perf_counter() - start, warnings=warnings, error=f"{error.__class__.__name__}: {error.error_string} ({line})")
+    except (OSError, UnicodeDecodeError) as error:
+        # unreadable program or unwritable output
+        warnings = len(compiler.warnings) if compiler is not None else 0
+        return BatchResult(location, time.perf_counter() - start, warnings=warnings, error=f"{error.__class__.__name__}: {error}")
+    except Exception as error:
+        # a bug of the compiler fails this program only, the rest of the batch still compiles and gets recorded
+        warnings = len(compiler.warnings) if compiler is not None else 0
+        return BatchResult(location, time.perf_counter() - start, warnings=warnings, error=f"Internal {error.__class__.__name__}: {error}")
+
+    result = BatchResult(location, time.perf_counter() - start, compiler.instructions, len(compiler.warnings))
+    # hashed as read, a file edited while the batch runs does not count as built
+    result.sources = {source: source_digest(text) for source, text in compiler.contents.items()}
+    result.profile = compiler.profile.as_dict()
+    return result
+
+
+def compile_batch(locations: list[Path], options: dict, jobs: int = 1, manifest: BuildManifest | None = None) -> list[BatchResult]:
+    """
+    Compile every program, on a pool of jobs processes if there is more than one.
+    With a manifest, programs built from the same files and options before are skipped.
+    """
+    stale = [location for location in locations
+             if manifest is None or not manifest.is_current(location, location.with_suffix(".asm"), options)]
+
+    if jobs <= 1 or len(stale) <= 1:
+        compiled = [compile_file(location, options) for location in stale]
+    else:
+        # hand out work in chunks, thousands of small programs would otherwise spend their time on queue round trips
+        chunksize = max(1, len(stale) // (jobs * 8))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            compiled = list(pool.map(compile_file, stale, repeat(options), chunksize=chunksize))
+
+    if manifest is None:
+        return compiled
+
+    results: dict[Path, BatchResult] = {}
+    for result in compiled:
+        results[result.location] = result
+        if result.error is None:
+            manifest.record(result.location, options, result.sources, instructions=result.instructions, warnings=result.warnings)
+        else:
+            manifest.forget(result.location)    # build it again next time, even if nothing changed
+    manifest.save()
+
+    for location in locations:
+        if location not in results:
+            results[location] = BatchResult(location, 0, **manifest.stats(location))
+            results[location].up_to_date = True
+    return [results[location] for location in locations]
+
+
+def summary(results: list[BatchResult], wall_time: float) -> str:
+    width = max([len(str(result.location)) for result in results] + [4])
+    lines = [f"{'File':<{width}}  {'Time':>9}  {'Instr':>6}  {'Warn':>4}  Status"]
+
+    for result in results:
+        status = "up to date" if result.up_to_date else "ok" if result.error is None else result.error
+        lines.append(f"{str(result.location):<{width}}  {result.seconds * 1000:>7.1f}ms  {result.instructions:>6}  {result.warnings:>4}  {status}")
+
+    failed = sum(1 for result in results if result.error is not None)
+    up_to_date = sum(1 for result in results if result.up_to_date)
+    compile_time = sum(result.seconds for result in results)
+    lines.append("")
+    lines.append(f"{len(results)} files, {failed} failed, {up_to_date} up to date, "
+                 f"{sum(result.instructions for result in results)} instructions, "
+                 f"{sum(result.warnings for result in results)} warnings, "
+                 f"{compile_time:.2f}s compiling in {wall_time:.2f}s wall time")
+    return "\n".join(lines)
@@ -6,6 +6,11 @@ from typing import Type
 from .tree import Node
 from pathlib import Path
 from .targets import CompilationTarget
+from .profiler import Profile
+from .translator import Assembly
+from .simulator.cost import CostReport
+from .nodes.fold import ConstantFolder
+from .nodes.inline import Inliner
 
 class Compiler:
 
@@ -13,6 +18,8 @@ class Compiler:
         self.config = config
         self.config.compiler = self
         self.warnings: list[NadLabemError] = []
+        self.profile: Profile = Profile()
+        self.costs: CostReport | None = None      # with config.cost_report
 
         if self.config.target not in CompilationTarget.targets:
             raise NadLabemError(f"Invalid compilation target: {self.config.target_cpu}", line="in the compilation config")
@@ -20,11 +27,16 @@ class Compiler:
         self.target: CompilationTarget = CompilationTarget.targets[self.config.target]
 
     def compile(self, source_code: str) -> str:
-        self.load(source_code)
-        self.tokenize()
-        self.parse()
-        self.translate()
-        return self.export()
+        with self.profile.phase("load"):
+            self.load(source_code)
+        with self.profile.phase("tokenize"):
+            self.tokenize()
+        self.parse()    # times parse and validate apart
+        with self.profile.phase("translate"):
+            self.translate()
+        self.config.progress.finish()
+        with self.profile.phase("export"):
+            return self.export()
 
     def load(self, source_code: str | Path) -> None:
         if isinstance(source_code, Path):
@@ -35,15 +47,45 @@ class Compiler:
 
     def tokenize(self) -> None:
         self.tokens = Tokenizer(config=self.config, location=self.config.location).tokenize(self.source_code)
+        self.profile.count("tokens", len(self.tokens))
 
     def parse(self) -> None:
-        self.tree = ProgramParser(self.tokens, config=self.config).parse()
-        self.tree.validate()
+        with self.profile.phase("parse"):
+            parser = ProgramParser(self.tokens, config=self.config)
+            self.tree = parser.parse()
+        # every file the program was read from, the manifest of incremental builds hashes them
+        self.sources: list[Path] = [location for location in parser.dependencies if location is not None] + parser.direct_includes
+        contents = {self.config.location: self.source_code, **parser.contents}
+        self.contents: dict[Path, str] = {location: contents[location] for location in self.sources}     # as compiled
+        self.profile.count("parsed_tokens", parser.consumed)     # includes the modules that were not cached
+        self.profile.count("included_files", len(self.sources) - 1)
+        self.profile.count("ast_nodes", self.tree.count())
+
+        with self.profile.phase("validate"):
+            self.tree.validate(profile=self.profile)
+        self.profile.count("validated_ast_nodes", self.tree.count())    # after pruning
+
+        if self.config.inlining:
+            with self.profile.phase("inline"):
+                Inliner(self.tree, profile=self.profile).inline()
+
+        if self.config.constant_folding:
+            with self.profile.phase("fold"):
+                ConstantFolder(self.tree, profile=self.profile).fold()
 
     def translate(self) -> None:
-        self.machine_code: list[str] = [str(asmline) for asmline in self.target.entry_point(self).translate()]
+        self.assembly: list[Assembly] = self.target.entry_point(self).translate()
+        assembly = self.assembly
+        self.instructions: int = sum(1 for asmline in assembly if asmline.assembled and asmline.operation)
+        self.machine_code: list[str] = [str(asmline) for asmline in assembly]
+        if self.config.cost_report:
+            self.costs = CostReport("\n".join(self.machine_code), self.tree)
+            if not self.config.erase_comments:
+                self.machine_code = self.costs.annotate(self.machine_code)
         if self.config.generate_mapping:
             self.machine_code = DISCLAIMER + self.machine_code
+        self.profile.count("instructions", self.instructions)
+        self.profile.count("assembly_lines", sum(line.count("\n") + 1 for line in self.machine_code))
 
     def export(self) -> str:
         return "\n".join(self.machine_code)
@@ -1,7 +1,11 @@
 from.errors import NadLabemError
+from .ui import ProgressReporter
 from pathlib import Path
 
 
+VERSION: str = "0.2.0"
+
+
 class CompilationConfig:
 
     def __init__(self,
@@ -13,7 +17,17 @@ class CompilationConfig:
             tabspaces: int = 8,
             verbose: bool = True,
             obfuscate: bool = False,
-            optimize: bool = True):
+            optimize: bool = True,
+            register_allocation: bool = True,
+            constant_folding: bool = True,
+            inlining: bool = True,
+            loop_rotation: bool = True,
+            tail_calls: bool = True,
+            frame_elision: bool = True,
+            precedence_climbing: bool = True,
+            cache_dir: Path | None = None,
+            cost_report: bool = False,
+            progress_rate: float = 10):
 
         self.location: Path | None = location
         self.target: str = target
@@ -24,6 +38,16 @@ class CompilationConfig:
         self.verbose: bool = verbose
         self.obfuscate: bool = obfuscate
         self.optimize: bool = optimize
+        self.register_allocation: bool = register_allocation    # evaluate expressions in registers, not on the stack
+        self.constant_folding: bool = constant_folding          # compute constant expressions while compiling
+        self.inlining: bool = inlining                          # replace calls of small leaf functions by their bodies
+        self.loop_rotation: bool = loop_rotation                # test loop conditions at the bottom, guarded once
+        self.tail_calls: bool = tail_calls                      # jump to the function in return f(...), recursion reuses its frame
+        self.frame_elision: bool = frame_elision                # leaf functions without locals build no bp frame
+        self.precedence_climbing: bool = precedence_climbing
+        self.cache_dir: Path | None = cache_dir     # None disables the module cache
+        self.cost_report: bool = cost_report        # estimate the cycles and bytes of each function
+        self.progress: ProgressReporter = ProgressReporter(enabled=verbose, rate=progress_rate)
 
         self.compiler: "Compiler" = None
 
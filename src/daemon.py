@@ -0,0 +1,108 @@
+from .errors import NadLabemError
+from .config import CompilationConfig
+from .compiler import Compiler
+from pathlib import Path
+import json, os, socket, traceback
+
+
+STD: Path = Path(__file__).parent.parent / "std"
+
+# config fields a client may set, everything else is fixed by the daemon
+CONFIG_FIELDS: tuple[str, ...] = (
+    "target", "strict", "generate_mapping", "erase_comments", "tabspaces",
+    "obfuscate", "optimize", "register_allocation", "inlining", "constant_folding", "loop_rotation", "tail_calls", "frame_elision", "precedence_climbing", "cache_dir"
+)
+
+
+def error_fields(error: NadLabemError) -> dict:
+    return {
+        "type": error.__class__.__name__,
+        "message": error.error_string,
+        "line": str(error.line),
+        "location": str(getattr(error.line, "location", None)),
+        "number": getattr(error.line, "number", None),
+        "warning": error.warning,
+        "kwargs": {key: str(value) for key, value in error.kwargs.items()},
+        "text": str(error)
+    }
+
+
+class CompileDaemon:
+    """
+    Compiles programs sent over a Unix socket, one JSON request per connection.
+
+    A request holds the client's working directory, the program location and source
+    and the CONFIG_FIELDS, the response holds the output, warnings and profile or the error.
+
+    The translator tables are imported once and parsed modules stay in the module cache memory,
+    so a compile only pays for the code that changed. Requests are served one at a time,
+    the allocator keeps its tables on classes.
+    """
+
+    def __init__(self, socket_path: Path, cache_dir: Path | None):
+        self.socket_path: Path = socket_path
+        self.cache_dir: Path | None = cache_dir
+        self.running: bool = False
+
+    def warm_up(self) -> None:
+        """Parse the std modules into the cache ahead of the first request"""
+        if self.cache_dir is None:
+            return
+        for module in sorted(STD.glob("*.brandejs")):
+            config = CompilationConfig(location=STD.parent / "<warmup>", verbose=False, cache_dir=self.cache_dir)
+            try:
+                Compiler(config).compile(f"include \"std/{module.name}\" as {module.stem}_module\n")
+            except NadLabemError:
+                pass    # broken std modules fail again for the request that includes them
+
+    def compile(self, request: dict) -> dict:
+        fields = {field: request["config"][field] for field in CONFIG_FIELDS if field in request["config"]}
+        if fields.get("cache_dir") is not None:
+            fields["cache_dir"] = Path(fields["cache_dir"])
+
+        try:
+            os.chdir(request["cwd"])    # relative includes, cache and mapping paths resolve like for a local compile
+            config = CompilationConfig(location=Path(request["location"]), verbose=False, **fields)
+            compiler = Compiler(config)
+            output = compiler.compile(request["source"])
+        except NadLabemError as error:
+            return {"error": error_fields(error)}
+        except Exception:
+            return {"internal": traceback.format_exc()}
+
+        return {
+            "output": output,
+            "warnings": [error_fields(warning) for warning in compiler.warnings],
+            "profile": compiler.profile.as_dict()
+        }
+
+    def handle(self, connection: socket.socket) -> None:
+        with connection, connection.makefile("rwb") as stream:
+            request = json.loads(stream.readline())
+            if request.get("command") == "stop":
+                self.running = False
+                response = {"stopped": True}
+            else:
+                response = self.compile(request)
+            stream.write(json.dumps(response).encode("utf8") + b"\n")
+
+    def serve(self) -> None:
+        self.warm_up()
+
+        if self.socket_path.exists():
+            self.socket_path.unlink()    # left over by a daemon that did not exit cleanly
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        server.listen()
+        self.running = True
+        try:
+            while self.running:
+                connection, _ = server.accept()
+                try:
+                    self.handle(connection)
+                except (OSError, ValueError, KeyError):
+                    pass    # a client that hung up or sent garbage must not take the daemon down
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
@@ -33,4 +33,7 @@ class TypeError(NadLabemError):
     pass
 
 class NotImplementedError(NadLabemError):
-    pass
\ No newline at end of file
+    pass
+
+class SimulationError(NadLabemError):
+    pass
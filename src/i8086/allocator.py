@@ -1,10 +1,18 @@
 from .sizeof import sizeof
-from ..nodes.statement import VariableDeclarationNode, ArgumentDeclarationNode, FunctionDefinitonNode, StatementNode
+from ..nodes.statement import (VariableDeclarationNode, ArgumentDeclarationNode, FunctionDefinitonNode, StatementNode,
+                               FunctionCallStatementNode, AssemblyNode)
+from ..nodes.expression import FunctionCallNode, AssemblyExpressionNode
+from ..nodes.inline import Inliner, descendants
 from ..nodes.scope import Context, Symbol, Namespace
 from ..translator import Translator, Assembly
 from ..nodes.types import Array, Int, VariableType, ExpressionType, Pointer, ValueType, Double
 from ..errors import NadLabemError, NotImplementedError
 from typing import Literal
+import re
+
+
+# inline assembly a function without a frame cannot run: it works with the stack or changes the register addressing it
+FRAMELESS_ASSEMBLY = re.compile(r"\b(bp|sp|di|push\w*|pop\w*|call|ret\w*|iret|rep\w*|movs\w*|stos\w*|cmps\w*|scas\w*)\b", re.IGNORECASE)
 
 class StackFrame:
 
@@ -29,6 +37,8 @@ class StackFrame:
         
         self.var_bytes: int = 0     # forwards (-)
         self.arg_bytes: int = 0     # backwards (+)
+        self.base: str = "bp"       # the register the variables are addressed from
+        self.arguments: int = 4     # offset of the first argument, above the return address and the saved bp
 
         fn_node: FunctionDefinitonNode = self.context.node
 
@@ -52,6 +62,31 @@ class StackFrame:
 
             self.variables.append(variable)
 
+    def elidable(self) -> bool:
+        """
+        Whether the function can do without a frame of its own: it has no locals, calls nothing
+        and no argument is an array indexed from the base, which would need a second address register
+        """
+        fn_node: FunctionDefinitonNode = self.context.node
+        if self.var_bytes or any(isinstance(arg_node.node_type.expression_type, Array) and not arg_node.node_type.is_reference
+                                 for arg_node in fn_node.arguments):
+            return False
+        for node in descendants(fn_node.body):
+            if isinstance(node, (FunctionCallNode, FunctionCallStatementNode, FunctionDefinitonNode)):
+                return False
+            if isinstance(node, AssemblyNode) and FRAMELESS_ASSEMBLY.search(Inliner.instruction(node)):
+                return False
+            if isinstance(node, AssemblyExpressionNode) and FRAMELESS_ASSEMBLY.search(node.assembly_expression):
+                return False
+        return True
+
+    def elide(self, register: str) -> None:
+        """Address the arguments from the register holding sp on entry, no saved bp lies below them"""
+        self.base = register
+        self.arguments -= 2
+        for variable in self.variables:
+            variable.offset -= 2
+
 
 class Variable:
 
@@ -73,7 +108,7 @@ class Variable:
         ]
 
     def location(self) -> str:
-        source = self.symbol.id if self.is_static else "bp"
+        source = self.symbol.id if self.is_static else self.frame.base
         off = ((" + " if self.offset > 0 else " - ") + str(abs(self.offset))) if self.offset else ""
         return source + off
 
@@ -160,6 +195,9 @@ class Allocator:
         self.program: "ProgramTranslator" = program
 
     def allocate(self) -> StackFrame:
+        # the tables live on the classes, drop what earlier compiles in this process left there
+        StackFrame.frames.clear()
+        Variable.variables.clear()
         return self.create_stack_frames(self.program.node.context)
 
     # recursive
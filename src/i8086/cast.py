@@ -3,6 +3,7 @@ from ..nodes.expression import CastNode
 from .sizeof import sizeof
 from ..nodes.types import Int, Bool, Double, Char, Array, Pointer
 from .allocator import Variable, StackFrame
+from .registers import RegisterExpression
 from ..errors import NotImplementedError
 
 class CastTranslator(Translator):
@@ -12,6 +13,9 @@ class CastTranslator(Translator):
     def make(self) -> None:
         self.node: CastNode
 
+        if RegisterExpression.translate(self):
+            return
+
         self.add(self.node.operand)
 
         result_type = self.node.result_type
@@ -46,8 +50,8 @@ class CastTranslator(Translator):
             self.assemble("push", ["dx"])
 
         elif pair == (Double, Int):
-            self.assemble("pop", ["ax"])
             self.assemble("pop", ["dx"])
+            self.assemble("pop", ["ax"])
             if signed:
                 self.assemble("cwd", [])
             else:
@@ -0,0 +1,42 @@
+from ..translator import Translator
+from ..tokenizer.symbols import (Token, ComparisonToken, IsEqualToken, IsNotEqualToken, LessThanToken, IsGtEqToken, IsLtEqToken,
+                                 SignedGreaterThanToken, SignedIsGtEqToken, SignedLessThanToken, SignedIsLtEqToken)
+
+
+# comparison operator groups, precomputed so analyzing a comparison is just four mask checks
+EQUALITY = Token.any(IsEqualToken, IsNotEqualToken, class_name="EqualityToken")
+SIGNED = Token.any(SignedGreaterThanToken, SignedIsGtEqToken, SignedLessThanToken, SignedIsLtEqToken, class_name="SignedComparisonToken")
+UNSWAPPED = Token.any(LessThanToken, IsGtEqToken, SignedLessThanToken, SignedIsGtEqToken, class_name="UnswappedComparisonToken")
+INVERTED = Token.any(IsNotEqualToken, IsGtEqToken, IsLtEqToken, SignedIsGtEqToken, SignedIsLtEqToken, class_name="InvertedComparisonToken")
+
+
+def analyze(token: ComparisonToken) -> tuple[bool, bool, bool, bool]:
+    """equality, signed, swapped (compare right with left) and inverted (jump on the opposite condition)"""
+    equality = EQUALITY.match(token)
+    signed = SIGNED.match(token)
+    swapped = not UNSWAPPED.match(token)
+    inverted = INVERTED.match(token)
+    return equality, signed, swapped, inverted
+
+
+def jumps(token: ComparisonToken) -> tuple[str, str]:
+    """Conditional jumps taken when the comparison holds and when it does not, after the cmp of its operands"""
+    equality, signed, swapped, inverted = analyze(token)
+
+    if equality:
+        normal, opposite = "je", "jne"
+    elif signed:
+        normal, opposite = "jl", "jge"
+    else:
+        normal, opposite = "jb", "jae"
+
+    return (opposite, normal) if inverted else (normal, opposite)
+
+
+def materialize(translator: Translator, jump: str, register: str = "ax") -> None:
+    """Turn the flags of a cmp into 1 or 0 in the register, mov keeps the flags for the jump"""
+    label: str = translator.node.scope.generate_id("cmpout")
+    translator.assemble("mov", [register, "1"])
+    translator.assemble(jump, [label])
+    translator.assemble("xor", [register, register])
+    translator.assemble("nop", label=label)
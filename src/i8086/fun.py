@@ -1,11 +1,15 @@
 from ..translator import Translator
-from ..nodes.statement import FunctionDefinitonNode, FunctionCallStatementNode, ReturnNode
-from ..nodes.expression import FunctionCallNode, ExpressionNode
-from ..tokenizer.symbols import DoToken, WhileToken
+from ..nodes.statement import FunctionDefinitonNode, FunctionCallStatementNode, ReturnNode, CodeBlockNode
+from ..nodes.expression import FunctionCallNode, ExpressionNode, VariableReferenceNode
+from ..nodes.types import Double
+from ..tokenizer.symbols import DoToken, WhileToken, StarToken
 from .allocator import Variable, StackFrame
+from .registers import RegisterExpression
+from . import tail
 
 
 RETURN_REGISTER = "ax"
+FRAME_REGISTER = "di"       # holds sp of a function without a frame, its arguments are addressed from it
 
 
 class ReturnTranslator(Translator):
@@ -17,11 +21,69 @@ class ReturnTranslator(Translator):
 
         fn_translator: FunctionDefinitionTranslator = self.node.function.translator
 
+        if fn_translator.accumulation is not None:
+            recursion = tail.recursion(self.node)
+            if recursion is not None:
+                _, call, values = recursion
+                for value in values:
+                    self.add(value)
+                    self.assemble("pop", [RETURN_REGISTER])
+                    fn_translator.accumulate(self)
+                return self.jump(call)
+
+        call = fn_translator.tail_call(self.node)
+        if call is not None:
+            return self.jump(call)
+
         if self.node.value is not None:
             self.add(self.node.value)
             self.assemble("pop", [RETURN_REGISTER])
-
-        self.assemble("jmp", [fn_translator.ret_label])
+            if fn_translator.accumulation is not None:
+                fn_translator.combine(self)
+
+        if fn_translator.elided:
+            # there is no frame to tear down
+            self.assemble("ret", [str(fn_translator.frame.arg_bytes)])
+        else:
+            self.assemble("jmp", [fn_translator.ret_label])
+
+    def jump(self, call: FunctionCallNode) -> None:
+        """
+        Overwrites the arguments in the frame with those of the call and jumps to the called function,
+        so it returns right where this one would. Arguments that are the parameter already in their place stay.
+        """
+        fn_translator: FunctionDefinitionTranslator = self.node.function.translator
+        definition: FunctionDefinitonNode = call.symbol.node
+        frame: StackFrame = fn_translator.frame
+
+        # the bytes of each argument from the first one, the frames of the two functions may start them elsewhere
+        slots: list[tuple[ExpressionNode, int, int]] = []
+        for argument, parameter in zip(call.arguments, definition.arguments):
+            position = Variable.variables[parameter.symbol].offset - StackFrame.frames[definition.context].arguments
+            words = 2 if parameter.node_type.expression_type is Double and not parameter.node_type.is_reference else 1
+            if not (words == 1 and self.in_place(argument, position)):
+                slots.append((argument, position, words))
+
+        # everything is evaluated before the first parameter is overwritten
+        for argument, _, _ in reversed(slots):
+            self.add(argument)
+        for _, position, words in slots:
+            for word in range(words):
+                self.assemble("pop", [f"word[{frame.base} + {frame.arguments + position + 2 * word}]"])
+
+        if definition is self.node.function:
+            self.assemble("jmp", [fn_translator.body_label])
+        else:
+            self.assemble("mov", ["sp", "bp"])
+            self.assemble("pop", ["bp"])
+            self.assemble("jmp", [definition.symbol.id])
+
+    def in_place(self, argument: ExpressionNode, position: int) -> bool:
+        if not isinstance(argument, VariableReferenceNode) or argument.pointer or argument.dereference or argument.index is not None:
+            return False
+        variable = Variable.variables[argument.symbol]
+        return (variable.frame.context is self.node.function.context and not variable.is_reference
+                and variable.offset - variable.frame.arguments == position)
 
 
 class FunctionDefinitionTranslator(Translator):
@@ -37,19 +99,79 @@ class FunctionDefinitionTranslator(Translator):
 
         self.frame = StackFrame.frames[self.node.context]
 
+        # the operation recursive returns combine their values by, collected in a word below the locals
+        self.accumulation = tail.accumulation(self.node) if self.config.tail_calls else None
+        self.accumulator: str = f"bp - {self.frame.var_bytes + 2}"
+        frame_bytes = self.frame.var_bytes + (2 if self.accumulation is not None else 0)
+
+        # a leaf function without locals pushes no bp, its arguments are addressed from a copy of sp
+        self.elided: bool = self.config.frame_elision and self.accumulation is None and self.frame.elidable()
+
         self.assemble("jmp", [self.over_label], mapping = False)
         self.special(f"{self.fn_label}:")
-        self.assemble("push", ["bp"])
-        self.assemble("mov", ["bp", "sp"])
-        self.assemble("sub", ["sp", f"{self.frame.var_bytes}"])
+        if self.elided:
+            if self.frame.arg_bytes:
+                self.frame.elide(FRAME_REGISTER)
+                self.assemble("mov", [FRAME_REGISTER, "sp"])
+                # held like the count of a loop, so the expressions and loops of the body leave it alone
+                self.counter, self.induction = FRAME_REGISTER, None
+        else:
+            self.assemble("push", ["bp"])
+            self.assemble("mov", ["bp", "sp"])
+            if frame_bytes:
+                self.assemble("sub", ["sp", f"{frame_bytes}"])
+
+        if self.accumulation is not None:
+            self.assemble("mov", [f"word[{self.accumulator}]", str(tail.IDENTITY[self.accumulation])])
+
+        # where the recursive tail calls jump to, the frame is built already
+        self.body_label: str | None = None
+        recursive = [call for call in map(self.tail_call, tail.returns(self.node)) if call is not None and call.symbol.node is self.node]
+        if recursive or self.accumulation is not None:
+            self.body_label = self.node.scope.generate_id("body")
+            self.assemble("nop", label=self.body_label)
 
         self.add(self.node.body)
 
-        self.assemble("mov", ["sp", "bp"], label=self.ret_label)
-        self.assemble("pop", ["bp"])
-        self.assemble("ret", [str(self.frame.arg_bytes)])
+        if self.elided:
+            # nothing jumps to the label, a body ending in a return never gets here
+            body = self.node.body
+            last = (body.children[-1] if body.children else None) if isinstance(body, CodeBlockNode) else body
+            if not isinstance(last, ReturnNode):
+                self.assemble("ret", [str(self.frame.arg_bytes)], label=self.ret_label)
+        else:
+            self.assemble("mov", ["sp", "bp"], label=self.ret_label)
+            self.assemble("pop", ["bp"])
+            self.assemble("ret", [str(self.frame.arg_bytes)])
         self.assemble("nop", label=self.over_label)
 
+    def tail_call(self, node: ReturnNode) -> FunctionCallNode | None:
+        """The call in return f(...) that can be jumped to, None when the function has to call it and come back"""
+        call = node.value
+        if not self.config.tail_calls or not isinstance(call, FunctionCallNode) or tail.addressed(call):
+            return None
+        if call.symbol.node is self.node:
+            return call
+        # the called function returns to our caller, popping as many bytes of arguments as it pushed for us
+        if self.accumulation is None and StackFrame.frames[call.symbol.node.context].arg_bytes == self.frame.arg_bytes:
+            return call
+        return None
+
+    def accumulate(self, translator: Translator) -> None:
+        """The accumulator combined with the value in ax"""
+        if self.accumulation is StarToken:
+            translator.assemble("mul", [f"word[{self.accumulator}]"])
+            translator.assemble("mov", [f"word[{self.accumulator}]", RETURN_REGISTER])
+        else:
+            translator.assemble(tail.MNEMONIC[self.accumulation], [f"word[{self.accumulator}]", RETURN_REGISTER])
+
+    def combine(self, translator: Translator) -> None:
+        """The value in ax combined with the accumulator"""
+        if self.accumulation is StarToken:
+            translator.assemble("mul", [f"word[{self.accumulator}]"])
+        else:
+            translator.assemble(tail.MNEMONIC[self.accumulation], [RETURN_REGISTER, f"word[{self.accumulator}]"])
+
 
 class FunctionCallStatementTranslator(Translator):
 
@@ -58,11 +180,19 @@ class FunctionCallStatementTranslator(Translator):
     def make(self) -> None:
         self.node: FunctionCallStatementNode
 
+        # the function may use any register, the counters of the loops around the call are kept
+        counters = list(RegisterExpression.counters(self))
+        for register in counters:
+            self.assemble("push", [register])
+
         for arg in reversed(self.node.arguments):
             self.add(arg)
 
         self.assemble("call", [self.node.symbol.id])
 
+        for register in reversed(counters):
+            self.assemble("pop", [register])
+
 
 class FunctionCallTranslator(FunctionCallStatementTranslator):
 
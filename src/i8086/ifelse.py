@@ -1,7 +1,10 @@
 from ..translator import Translator
 from ..nodes.statement import IfNode
-from ..nodes.expression import ExpressionNode
-from .operation import ComparisonTranslator, ComparisonNode, BinaryOperationTranslator
+from ..nodes.expression import ExpressionNode, LogicalNode, UnaryOperationNode, LiteralNode
+from ..tokenizer.symbols import LogicalAndToken, LogicalNotToken, BoolLiteralToken
+from .operation import ComparisonTranslator, ComparisonNode
+from .registers import RegisterExpression
+from .sizeof import sizeof
 from typing import Type
 
 class ConditionalJump:
@@ -11,42 +14,47 @@ class ConditionalJump:
         self.condition: ExpressionNode = condition
 
     def jump(self, label: str, on: bool) -> None:
+        self.branch(self.condition, label, on)
 
-        if isinstance(self.condition, ComparisonNode):
+    def branch(self, condition: ExpressionNode, label: str, on: bool) -> None:
+        """Jump to label when the condition is on, and/or/not become jump chains that stop at the first decisive operand"""
 
-            equality, signed, swap, invert = ComparisonTranslator._analyze_comparison(self.condition.token)
-        
-            BinaryOperationTranslator.load(
-                self.translator,
-                self.condition.left,
-                self.condition.right,
-                swap
-            )
+        if isinstance(condition, LogicalNode):
+            conjunction = LogicalAndToken.match(condition.token)
 
-            invert = invert if on else not invert
+            if conjunction != on:
+                # and failing or or holding: either operand decides
+                self.branch(condition.left, label, on)
+                self.branch(condition.right, label, on)
+            else:
+                # both operands must agree, the left one can only skip the right one
+                skip_label: str = condition.scope.generate_id("skip")
+                self.branch(condition.left, skip_label, not on)
+                self.branch(condition.right, label, on)
+                self.translator.assemble("nop", label=skip_label)
 
-            normal: str
-            inverted: str
+        elif isinstance(condition, UnaryOperationNode) and LogicalNotToken.match(condition.token):
+            self.branch(condition.operand, label, not on)
 
-            if equality:
-                normal, inverted = "je", "jne"
-            elif signed:
-                normal, inverted = "jl", "jge"
-            else:
-                normal, inverted = "jb", "jae"
+        elif isinstance(condition, LiteralNode) and BoolLiteralToken.match(condition.token):
+            if condition.token.value == on:
+                self.translator.assemble("jmp", [label])
 
-            self.translator.assemble("cmp", ["ax", "bx"])
-            self.translator.assemble(inverted if invert else normal, [label])
+        elif isinstance(condition, ComparisonNode):
+            holds, fails = ComparisonTranslator.compare(self.translator, condition)
+            self.translator.assemble(holds if on else fails, [label])
 
         else:
-            self.translator.add(self.condition)
-            self.translator.assemble("pop", ["ax"])
-            self.translator.assemble("cmp", ["ax", "0"])
+            if self.translator.config.register_allocation:
+                RegisterExpression(self.translator).evaluate(condition, "ax", narrow=True)
+                self.translator.assemble("cmp", ["al" if sizeof(condition.node_type) == 1 else "ax", "0"])
+            else:
+                self.translator.add(condition)
+                self.translator.assemble("pop", ["ax"])
+                self.translator.assemble("cmp", ["ax", "0"])
             self.translator.assemble("jnz" if on else "jz", [label])
 
 
-
-
 class IfTranslator(Translator):
 
     node_type = IfNode
@@ -3,6 +3,7 @@ from ..translator import Translator, Assembly
 from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
 from ..nodes.expression import LiteralNode, StringReferenceNode
 from .sizeof import sizeof
+from ..nodes.types import Double
 from ..errors import NotImplementedError, NadLabemError
 from ..tokenizer.symbols import StringLiteralToken, NumberToken, BoolLiteralToken, CharLiteralToken
 from .allocator import Variable, StackFrame
@@ -18,7 +19,12 @@ class LiteralTranslator(Translator):
 
         register = "ax"
 
-        if NumberToken.match(self.node.token):
+        if self.node.node_type is Double:     # folded constants, pushed low word first like other doubles
+            self.assemble("mov", [register, self.node.token.value & 0xffff])
+            self.assemble("push", ["ax"])
+            self.assemble("mov", [register, self.node.token.value >> 16])
+
+        elif NumberToken.match(self.node.token):
             self.assemble("mov", [register, self.node.token.value])
 
         elif StringLiteralToken.match(self.node.token):
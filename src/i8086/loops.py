@@ -1,6 +1,14 @@
 from ..translator import Translator
-from ..nodes.statement import WhileNode, ForNode, PassNode, BreakNode, ContinueNode
-from ..tokenizer.symbols import DoToken, WhileToken
+from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
+from ..nodes.statement import (WhileNode, ForNode, PassNode, BreakNode, ContinueNode, VariableDeclarationNode, AssignmentNode,
+                               IncrementalNode, AssemblyNode, FunctionDefinitonNode, FunctionCallStatementNode)
+from ..nodes.expression import (ExpressionNode, LiteralNode, VariableReferenceNode, ComparisonNode, CastNode, BinaryOperationNode,
+                                FunctionCallNode, AssemblyExpressionNode)
+from ..nodes.scope import Symbol
+from ..nodes.types import Int, Bool, Double, Array
+from ..tokenizer.symbols import DoToken, WhileToken, NumberToken, LessThanToken, SignedLessThanToken, IncrementToken
+from .allocator import Variable
+from .registers import RegisterExpression, SHIFTS, operation
 from .ifelse import ConditionalJump
 
 
@@ -15,26 +23,136 @@ class WhileTranslator(Translator):
     
         loop_label: str = self.node.scope.generate_id("while")
         out_label: str = self.node.scope.generate_id("wout")
-        self.assemble("nop", label=loop_label)
 
         self.continue_label: str = loop_label
         self.break_label: str = out_label
 
         self.condition: ConditionalJump = ConditionalJump(self, self.node.condition)
 
-        if not self.node.do_loop:
-            self.condition.jump(out_label, on=False)
-
-        self.add(self.node.body)
-
         if self.node.do_loop:
+            self.assemble("nop", label=loop_label)
+            self.add(self.node.body)
+            self.condition.jump(loop_label, on=True)
+
+        elif self.config.loop_rotation:
+            # tested once before the loop and then at its bottom, an iteration takes one jump instead of two
+            test_label: str = self.node.scope.generate_id("wtest")
+            self.continue_label = test_label
+            self.condition.jump(out_label, on=False)
+            self.assemble("nop", label=loop_label)
+            self.add(self.node.body)
+            self.assemble("nop", label=test_label)
             self.condition.jump(loop_label, on=True)
+
         else:
+            self.assemble("nop", label=loop_label)
+            self.condition.jump(out_label, on=False)
+            self.add(self.node.body)
             self.assemble("jmp", [loop_label])
 
         self.assemble("nop", label=out_label)
 
 
+def descendants(node: ASTNode) -> list[ASTNode]:
+    found: list[ASTNode] = []
+    stack: list[ASTNode] = list(node.children)
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(child.children)
+    return found
+
+
+def inside(node: ASTNode, ancestor: ASTNode) -> bool:
+    while node is not None:
+        if node is ancestor:
+            return True
+        node = node.parent
+    return False
+
+
+class CountedLoop:
+    """
+    A for loop that counts a variable declared by it up by one to a bound that does not change while it runs:
+    for (i: int = start, i < bound, ++i), where i is only read in the body and the bound is a literal
+    or a variable the body cannot change. Its body must be code that keeps the loop registers,
+    nothing that needs cx or di on its own (inline assembly, arrays copied by value, doubles, casts to bool).
+    """
+
+    def __init__(self, symbol: Symbol, start: ExpressionNode, bound: ExpressionNode, signed: bool, read: bool, shifts: bool):
+        self.symbol: Symbol = symbol
+        self.start: ExpressionNode = start
+        self.bound: ExpressionNode = bound
+        self.signed: bool = signed
+        self.read: bool = read          # whether the body reads the loop variable
+        self.shifts: bool = shifts      # shifts by cl in the body, which would push and pop a count in cx
+
+    @staticmethod
+    def analyze(node: ForNode) -> "CountedLoop | None":
+        declaration, condition, increment = node.initialization, node.condition, node.increment
+        if (not isinstance(declaration, VariableDeclarationNode) or declaration.by_reference
+                or declaration.node_type.expression_type is not Int or declaration.assignment is None):
+            return None
+        symbol = declaration.symbol
+
+        if (not isinstance(condition, ComparisonNode) or not (LessThanToken.match(condition.token) or SignedLessThanToken.match(condition.token))
+                or not CountedLoop.plain(condition.left, symbol)):
+            return None
+        if not isinstance(increment, IncrementalNode) or not IncrementToken.match(increment.token) or increment.symbol is not symbol:
+            return None
+
+        body = descendants(node.body)
+        for child in body:
+            if (isinstance(child, (AssemblyNode, AssemblyExpressionNode, FunctionDefinitonNode))
+                    or getattr(child, "node_type", None) is Double
+                    or isinstance(child, CastNode) and child.result_type is Bool
+                    or isinstance(child, VariableDeclarationNode) and not child.by_reference
+                    and isinstance(child.node_type.expression_type, Array)):
+                return None
+
+        references = [reference for reference in symbol.references if reference.is_connected and reference is not declaration]
+        if any(not inside(reference, node) for reference in references):
+            return None     # read after the loop, it has to be in memory
+        reads = [reference for reference in references if inside(reference, node.body)]
+        if any(not CountedLoop.plain(reference, symbol) for reference in reads):
+            return None     # assigned, incremented or pointed to
+
+        bound = condition.right
+        if isinstance(bound, VariableReferenceNode):
+            if not CountedLoop.plain(bound, bound.symbol) or bound.symbol is symbol or bound.node_type is not Int:
+                return None
+            variable = Variable.variables.get(bound.symbol)
+            if variable is None or variable.is_reference:
+                return None
+            for reference in bound.symbol.references:
+                if isinstance(reference, VariableReferenceNode) and (reference.pointer or reference.dereference):
+                    return None
+                if isinstance(reference, (AssignmentNode, IncrementalNode)) and inside(reference, node.body):
+                    return None
+            if variable.is_static and any(isinstance(child, (FunctionCallNode, FunctionCallStatementNode)) for child in body):
+                return None     # a function could change it
+        elif not (isinstance(bound, LiteralNode) and NumberToken.match(bound.token)):
+            return None
+
+        shifts = any(isinstance(child, BinaryOperationNode) and operation(child.token, SHIFTS) for child in body)
+        return CountedLoop(symbol, declaration.assignment, bound, SignedLessThanToken.match(condition.token), bool(reads), shifts)
+
+    @staticmethod
+    def plain(node: ASTNode, symbol: Symbol) -> bool:
+        """A read of the variable's value"""
+        return (isinstance(node, VariableReferenceNode) and node.symbol is symbol and node.index is None
+                and not node.pointer and not node.dereference)
+
+    def count(self) -> int | None:
+        """Iterations if both ends are literals"""
+        if not (isinstance(self.start, LiteralNode) and NumberToken.match(self.start.token) and isinstance(self.bound, LiteralNode)):
+            return None
+        start, bound = self.start.token.value & 0xffff, self.bound.token.value & 0xffff
+        if self.signed:
+            start, bound = (start ^ 0x8000) - 0x8000, (bound ^ 0x8000) - 0x8000
+        return max(bound - start, 0)
+
+
 class ForTranslator(Translator):
 
     node_type = ForNode
@@ -42,6 +160,18 @@ class ForTranslator(Translator):
     def make(self) -> None:
         self.node: ForNode
 
+        # the register a counted loop keeps its count or its variable in, and that variable
+        self.counter: str | None = None
+        self.induction: Symbol | None = None
+
+        if self.config.register_allocation:
+            loop = CountedLoop.analyze(self.node)
+            held = RegisterExpression.counters(self.parent)
+            if loop is not None and not loop.read and not loop.shifts and "cx" not in held:
+                return self.count_down(loop)
+            if loop is not None and "di" not in held:
+                return self.count_up(loop)
+
         loop_label: str = self.node.scope.generate_id("for")
         out_label: str = self.node.scope.generate_id("fout")
         increment_label: str = self.node.scope.generate_id("finc")
@@ -51,19 +181,97 @@ class ForTranslator(Translator):
 
         self.add(self.node.initialization)
 
-        self.assemble("nop", label=loop_label)
-
         self.condition: ConditionalJump = ConditionalJump(self, self.node.condition)
 
-        self.condition.jump(out_label, on=False)
+        if self.config.loop_rotation:
+            # guard once, then the test after the increment jumps back
+            self.condition.jump(out_label, on=False)
+            self.assemble("nop", label=loop_label)
+        else:
+            self.assemble("nop", label=loop_label)
+            self.condition.jump(out_label, on=False)
 
         self.add(self.node.body)
 
         self.assemble("nop", label=increment_label)
 
         self.add(self.node.increment)
-        
-        self.assemble("jmp", [loop_label])
+
+        if self.config.loop_rotation:
+            self.condition.jump(loop_label, on=True)
+        else:
+            self.assemble("jmp", [loop_label])
+        self.assemble("nop", label=out_label)
+
+    def count_down(self, loop: CountedLoop) -> None:
+        """The number of iterations in cx, counted down by loop"""
+        loop_label: str = self.node.scope.generate_id("for")
+        out_label: str = self.node.scope.generate_id("fout")
+        increment_label: str = self.node.scope.generate_id("finc")
+
+        self.continue_label: str = increment_label
+        self.break_label: str = out_label
+
+        count = loop.count()
+        if count == 0:
+            return
+        expression = RegisterExpression(self)
+        if count is not None:
+            self.assemble("mov", ["cx", str(count)])
+        else:
+            expression.evaluate(loop.bound, "cx")
+            if isinstance(loop.start, LiteralNode) and NumberToken.match(loop.start.token):
+                start = str(loop.start.token.value)
+            else:
+                expression.live.append("cx")
+                expression.evaluate(loop.start, "ax")
+                start = "ax"
+            if start == "0" and not loop.signed:
+                self.assemble("jcxz", [out_label])
+            else:
+                # the flags of bound - start tell whether start is already past the bound
+                self.assemble("sub", ["cx", start])
+                self.assemble("jle" if loop.signed else "jbe", [out_label])
+
+        self.counter = "cx"
+        self.assemble("nop", label=loop_label)
+        self.add(self.node.body)
+        self.assemble("nop", label=increment_label)
+        self.assemble("loop", [loop_label])
+        self.assemble("nop", label=out_label)
+
+    def count_up(self, loop: CountedLoop) -> None:
+        """The loop variable in di, compared with the bound every iteration"""
+        loop_label: str = self.node.scope.generate_id("for")
+        out_label: str = self.node.scope.generate_id("fout")
+        increment_label: str = self.node.scope.generate_id("finc")
+
+        self.continue_label: str = increment_label
+        self.break_label: str = out_label
+
+        expression = RegisterExpression(self)
+        expression.evaluate(loop.start, "di")
+        expression.live.append("di")
+        bound = expression.immediate(loop.bound)
+
+        self.counter, self.induction = "di", loop.symbol
+        if self.config.loop_rotation:
+            if not loop.count():
+                self.assemble("cmp", ["di", bound])
+                self.assemble("jge" if loop.signed else "jae", [out_label])
+            self.assemble("nop", label=loop_label)
+        else:
+            self.assemble("nop", label=loop_label)
+            self.assemble("cmp", ["di", bound])
+            self.assemble("jge" if loop.signed else "jae", [out_label])
+        self.add(self.node.body)
+        self.assemble("nop", label=increment_label)
+        self.assemble("inc", ["di"])
+        if self.config.loop_rotation:
+            self.assemble("cmp", ["di", bound])
+            self.assemble("jl" if loop.signed else "jb", [loop_label])
+        else:
+            self.assemble("jmp", [loop_label])
         self.assemble("nop", label=out_label)
 
 
@@ -10,6 +10,9 @@ from ..tokenizer.symbols import (PlusToken, MinusToken, DivideToken, SignedDivid
 from .sizeof import sizeof
 from ..nodes.types import Double, Char, Int, Bool, ValueType
 from .allocator import Variable
+from .registers import RegisterExpression
+from .condition import analyze, jumps, materialize
+from . import strength
 from ..errors import NotImplementedError
 
 class BinaryOperationTranslator(Translator):
@@ -23,7 +26,10 @@ class BinaryOperationTranslator(Translator):
             fst, snd = left, right
         else:
             fst, snd = right, left
-        
+
+        if translator.config.register_allocation and fst.node_type is not Double and snd.node_type is not Double:
+            return RegisterExpression(translator).pair(fst, snd)
+
         translator.add(fst)
         translator.add(snd)
 
@@ -54,42 +60,35 @@ class ComparisonTranslator(BinaryOperationTranslator):
     node_type = ComparisonNode
 
     @staticmethod
-    def _analyze_comparison(token: ComparisonToken) -> tuple[bool, bool, bool, bool]:
-        equality = Token.any(IsEqualToken, IsNotEqualToken).match(token)
-        signed = Token.any(SignedGreaterThanToken, SignedIsGtEqToken, SignedLessThanToken, SignedIsLtEqToken).match(token)
-        swapped = not Token.any(LessThanToken, IsGtEqToken, SignedLessThanToken, SignedIsGtEqToken).match(token)
-        inverted = Token.any(IsNotEqualToken, IsGtEqToken, IsLtEqToken, SignedIsGtEqToken, SignedIsLtEqToken).match(token)
-        return equality, signed, swapped, inverted
+    def compare(translator: Translator, node: ComparisonNode) -> tuple[str, str]:
+        """Emit the cmp of the operands, returns the jumps taken when the comparison holds and when not"""
 
-    def make(self) -> None:
-        self.node: ComparisonNode
+        if node.left.node_type is Double:
+            raise NotImplementedError("Double comparison not yet implemented for i8086", node.token.line)
 
-        equality, signed, swapped, inverted = self._analyze_comparison(self.node.token)
+        if translator.config.register_allocation:
+            return RegisterExpression(translator).compare(node, "ax")
 
-        self._load_operands(swapped)
+        equality, signed, swapped, inverted = analyze(node.token)
 
-        if self.node.left.node_type is Double:
-            raise NotImplementedError("Double comparison not yet implemented for i8086", self.node.token.line)
+        BinaryOperationTranslator.load(translator, node.left, node.right, swapped)
 
-        A = "ax" if sizeof(self.node.left.node_type) == 2 else "al"
-        B = "bx" if sizeof(self.node.right.node_type) == 2 else "bl"
-        
-        # why not all 8 possibilites of conditional jumps?
-        # would pollute code with too many macros
-        macro: list[Assembly] = [
-            Assembly(self.config, "cmp", [A, B]),
-            Assembly(self.config, "je" if equality else ("jl" if signed else "jb"), ["true"]),
-            Assembly(self.config, "jmp", ["false"]),
-        ]
-        
-        name: str = "q" if equality else ("s" if signed else "u")
-        sizename: str = "b" if self.node.left.node_type is Char else "w"
-        macro_label: str = self.program.activate("_" + name + sizename + "cmp", macro)
+        A = "ax" if sizeof(node.left.node_type) == 2 else "al"
+        B = "bx" if sizeof(node.right.node_type) == 2 else "bl"
 
-        self.assemble("call", [macro_label])
+        translator.assemble("cmp", [A, B])
 
-        if inverted:
-            self.assemble("xor", ["ax", "1"])
+        return jumps(node.token)
+
+    def make(self) -> None:
+        self.node: ComparisonNode
+
+        if RegisterExpression.translate(self):
+            return
+
+        # the flags become 0/1 right here, no calls to shared true/false routines
+        holds, _ = self.compare(self, self.node)
+        materialize(self, holds, "ax")
 
         self._save_result()
 
@@ -100,6 +99,9 @@ class AdditiveTranslator(BinaryOperationTranslator):
 
     def make(self) -> None:
         self.node: AdditiveNode
+
+        if RegisterExpression.translate(self):
+            return
         
         self._load_operands()
 
@@ -125,6 +127,9 @@ class BinaryTranslator(BinaryOperationTranslator):
 
     def make(self) -> None:
         self.node: BinaryNode
+
+        if RegisterExpression.translate(self):
+            return
         
         self._load_operands()
 
@@ -168,6 +173,9 @@ class LogicalTranslator(BinaryOperationTranslator):
 
     def make(self) -> None:
         self.node: BinaryNode
+
+        if RegisterExpression.translate(self):
+            return
         
         self._load_operands()
 
@@ -189,20 +197,36 @@ class MultiplicativeTranslator(BinaryOperationTranslator):
 
     def make(self) -> None:
         self.node: MultiplicativeNode
+
+        if RegisterExpression.translate(self):
+            return
+
+        reduction = strength.reduce(self.node, "ax") if self.config.optimize else None
+        if reduction is not None:
+            operand, plan = reduction
+            self.add(operand)
+            self.assemble("pop", ["ax"])
+            if self.node.left.node_type is Char and not StarToken.match(self.node.token):
+                self.assemble("xor", ["ah", "ah"])
+            strength.emit(self.assemble, plan, "ax", "bx")
+            self.assemble("push", ["ax"])
+            return
         
         self._load_operands()
 
         if self.node.node_type is Double:
             raise NotImplementedError("Double multiplicative node ops not yet implemented for i8086", self.node.token.line)
 
+        # char results keep whatever high byte their operation left, the byte division reads all of ax
         if StarToken.match(self.node.token):
-            self.assemble("mul", ["bx"])
+            self.assemble("mul", ["bx" if self.node.left.node_type is Int else "bl"])
 
         elif DivideToken.match(self.node.token):
             if self.node.left.node_type is Int:
                 self.assemble("mov", ["dx", "0"])
                 self.assemble("div", ["bx"])
             else:
+                self.assemble("xor", ["ah", "ah"])
                 self.assemble("div", ["bl"])
                 self.assemble("xor", ["ah", "ah"])
     
@@ -211,6 +235,7 @@ class MultiplicativeTranslator(BinaryOperationTranslator):
                 self.assemble("cwd")
                 self.assemble("idiv", ["bx"])
             else:
+                self.assemble("xor", ["ah", "ah"])
                 self.assemble("div", ["bl"])
                 self.assemble("xor", ["ah", "ah"])
 
@@ -220,6 +245,7 @@ class MultiplicativeTranslator(BinaryOperationTranslator):
                 self.assemble("div", ["bx"])
                 self.assemble("mov", ["ax", "dx"])
             else:
+                self.assemble("xor", ["ah", "ah"])
                 self.assemble("div", ["bl"])
                 self.assemble("xor", ["ah", "ah"])
 
@@ -250,6 +276,9 @@ class UnaryOperationTranslator(Translator):
         if self.node.operand.node_type is Double:
             raise NotImplementedError("Double unary operations not implemented yet for i8086", self.node.token.line)
 
+        if RegisterExpression.translate(self):
+            return
+
         self._load_operand()
 
         if MinusToken.match(self.node.token):
@@ -1,8 +1,7 @@
 from ..translator import Assembly
 from ..errors import NadLabemError
 from ..config import CompilationConfig
-from ..ui import progress_bar
-import time
+from ..profiler import Profile, timed
 
 class Optimizer:
 
@@ -10,7 +9,8 @@ class Optimizer:
             config: CompilationConfig,
             instructions: list[Assembly],
             program_begin: int,
-            program_end: int):
+            program_end: int,
+            profile: Profile | None = None):
 
         self.config = config
         self.code: list[Assembly] = instructions
@@ -19,6 +19,7 @@ class Optimizer:
         self.program_end: int = program_end
         self.iteration: int = 1
         self.i: int = 0
+        self.profile: Profile | None = profile
 
     def optimize_round(self) -> None:
         self.i: int = self.program_begin
@@ -26,8 +27,8 @@ class Optimizer:
 
         while self.i < self.program_end:
 
-            if self.config.verbose:
-                progress_bar(f"Optimizing.{self.iteration}", self.i - self.program_begin + 1, self.program_end - self.program_begin, refuse_finish=True)
+            if self.config.progress.enabled:
+                self.config.progress.report(f"Optimizing.{self.iteration}", self.i - self.program_begin + 1, self.program_end - self.program_begin, refuse_finish=True)
 
             op = self.code[self.i]
 
@@ -55,9 +56,17 @@ class Optimizer:
                 op.operation = None
                 continue
 
+            # 3) Handle jumps to the label right after them
+            if op.label:
+                jump = self.jump_before(op.label)
+                if jump is not None:
+                    if self.result[jump].label or self.result[jump].mapping:
+                        self.result[jump].operation, self.result[jump].arguments = None, []
+                    else:
+                        del self.result[jump]
+
             # ideas:
             #  - things like mov ax, val   and then   mov bx, ax
-            #  - things like sub  sp, 0
             #  - things like xor  ax, 1
             #                cmp  ax, 0
             #                jz   wout4
@@ -76,23 +85,33 @@ class Optimizer:
         # iterate until no more optimizations are possible
         while(self.iteration):
             
-            self.optimize_round()
+            with timed(self.profile, f"translate.optimize.{self.iteration}"):
+                self.optimize_round()
             
             if last_length <= len(self.result):
                 break
+
+            if self.profile is not None:
+                self.profile.count("optimizer_eliminations", last_length - len(self.result))
             
             self.code = self.result
             last_length = len(self.code)
             self.iteration += 1
-            
-            if self.config.verbose:
-                time.sleep(0.1)
 
-        if self.config.verbose:
-            print()     # flush the last progress bar
+        self.config.progress.finish()     # the last round never reports its total
 
         return self.result
 
+    def jump_before(self, label: str) -> int | None:
+        """Index of a jmp to the label with nothing but other labels between them"""
+        index = len(self.result) - 1
+        while index >= self.program_begin and self.result[index].assembled and self.result[index].operation is None:
+            index -= 1
+        if index >= self.program_begin and self.result[index].assembled and self.result[index].operation == "jmp" \
+                and self.result[index].arguments == [label]:
+            return index
+        return None
+
     def get_last(self) -> Assembly | None:
         if self.i > 0 and self.result[-1].assembled:
             return self.result[-1]
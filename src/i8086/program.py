@@ -3,7 +3,6 @@ from .sizeof import sizeof
 from ..nodes.statement import VariableDeclarationNode, CodeBlockNode, FunctionDefinitonNode, ModuleNode
 from .allocator import Allocator, Variable
 import re
-from ..ui import progress_bar
 from .optimize import Optimizer
 
 
@@ -58,8 +57,7 @@ class ProgramI8086Translator(ProgramTranslator):
             if not isinstance(child, FunctionDefinitonNode):
                 self.add(child)
                 children_done += 1
-                if self.compiler.config.verbose:
-                    progress_bar("Translating", children_done, len(self.node.children))
+                self.config.progress.report("Translating", children_done, len(self.node.children))
 
         self.special("exit:")
         self.assemble("hlt", label="ok")
@@ -72,21 +70,13 @@ class ProgramI8086Translator(ProgramTranslator):
                 self.blank_line()
                 self.add(child)
                 children_done += 1
-                if self.compiler.config.verbose:
-                    progress_bar("Translating", children_done, len(self.node.children))
+                self.config.progress.report("Translating", children_done, len(self.node.children))
 
         self.program_end: int = len(self.result)
 
         for macro in self.macros.values():
             self.result.extend(macro)
 
-        self.assemble("mov", ["ax", "1"], label="true")
-        self.assemble("or", ["ax", "ax"])
-        self.assemble("ret")
-        self.assemble("mov", ["ax", "0"], label="false")
-        self.assemble("or", ["ax", "ax"])
-        self.assemble("ret")
-        
         self.blank_line()
 
         self.special(f"segment {data_segment}")
@@ -120,6 +110,6 @@ class ProgramI8086Translator(ProgramTranslator):
             return self.macros[tag][0].label
 
     def optimize(self) -> None:
-        self.result = Optimizer(self.config, self.result, self.program_begin, self.program_end).optimize()
+        self.result = Optimizer(self.config, self.result, self.program_begin, self.program_end, profile=self.compiler.profile).optimize()
 
 
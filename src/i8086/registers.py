@@ -0,0 +1,502 @@
+from ..translator import Translator
+from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
+from ..nodes.expression import (ExpressionNode, LiteralNode, VariableReferenceNode, AdditiveNode, BinaryNode, LogicalNode,
+                                MultiplicativeNode, ComparisonNode, UnaryOperationNode, CastNode, BinaryOperationNode,
+                                FunctionCallNode, AssemblyExpressionNode)
+from ..tokenizer.symbols import (PlusToken, MinusToken, StarToken, DivideToken, SignedDivideToken, ModuloToken,
+                                 BinaryAndToken, BinaryOrToken, BinaryXorToken, BinaryNotToken, LogicalNotToken,
+                                 BinaryShiftLeftToken, BinaryShiftRightToken, BinaryRotateLeftToken, BinaryRotateRightToken,
+                                 LogicalAndToken, LogicalOrToken, NumberToken, CharLiteralToken, BoolLiteralToken)
+from ..nodes.statement import AssignmentNode, VariableDeclarationNode
+from ..nodes.scope import Symbol
+from ..nodes.types import Int, Char, Bool, Double, Pointer, Array
+from .sizeof import sizeof
+from .allocator import Variable
+from .condition import analyze, jumps, materialize
+from . import strength
+from contextlib import contextmanager
+from typing import Iterator
+
+
+# registers expressions are evaluated in, bp and sp belong to the stack frame
+REGISTERS: list[str] = ["ax", "bx", "cx", "dx", "si", "di"]
+BYTE_REGISTERS: list[str] = ["ax", "bx", "cx", "dx"]
+INDEX_REGISTERS: list[str] = ["si", "di"]
+
+ALU: dict[type, str] = {
+    PlusToken: "add", MinusToken: "sub",
+    BinaryAndToken: "and", BinaryOrToken: "or", BinaryXorToken: "xor",
+    LogicalAndToken: "and", LogicalOrToken: "or",
+}
+SHIFTS: dict[type, str] = {
+    BinaryShiftLeftToken: "shl", BinaryShiftRightToken: "shr",
+    BinaryRotateLeftToken: "rol", BinaryRotateRightToken: "ror",
+}
+DIVISIONS = (DivideToken, SignedDivideToken, ModuloToken)
+
+
+def low(register: str) -> str:
+    return register[0] + "l"
+
+
+def high(register: str) -> str:
+    return register[0] + "h"
+
+
+def operation(token, table: dict[type, str]) -> str | None:
+    for token_type, mnemonic in table.items():
+        if token_type.match(token):
+            return mnemonic
+    return None
+
+
+class RegisterExpression:
+    """
+    Evaluates expression trees in registers instead of pushing every intermediate value.
+
+    Operands are ordered by their Sethi–Ullman number, the one needing more registers goes first,
+    unless an operand has side effects (a call, an assembly expression), then the stack machine's order is kept.
+    Nodes the generator does not handle are translated by their own translator on the stack and popped,
+    the registers still holding values are pushed around them. When every register is taken,
+    one of them is spilled to the stack for the duration of the operation.
+
+    Char and bool values are zero extended in their register, unless the consumer only reads the low byte
+    (a byte store, a byte operation, a byte compare), then it is evaluated narrow and its high byte is left as it is.
+    Char arithmetic uses the 8 bit instruction forms and wraps at 8 bits.
+
+    The registers of the counted loops around the translator stay live the whole time, so they are
+    never allocated and are pushed around anything that needs them. Their loop variables are read from them.
+    """
+
+    def __init__(self, translator: Translator):
+        self.translator: Translator = translator
+        self.counters: dict[str, Symbol | None] = RegisterExpression.counters(translator)
+        self.inductions: dict[Symbol, str] = {symbol: register for register, symbol in self.counters.items() if symbol}
+        self.live: list[str] = list(self.counters)  # registers holding values that are still needed
+
+    def assemble(self, operation: str, arguments: list[str] = []) -> None:
+        self.translator.assemble(operation, arguments)
+
+    @staticmethod
+    def translate(translator: Translator) -> bool:
+        """Push the value of the translator's node computed in registers, False if it is left to the stack machine"""
+        if not translator.config.register_allocation or not RegisterExpression.supported(translator.node):
+            return False
+        RegisterExpression(translator).evaluate(translator.node, "ax", RegisterExpression.stored(translator.node))
+        translator.assemble("push", ["ax"])
+        return True
+
+    @staticmethod
+    def counters(translator: Translator) -> dict[str, Symbol | None]:
+        """Registers held by the counted loops around the translator, with the loop variable kept in each"""
+        counters: dict[str, Symbol | None] = {}
+        while translator is not None:
+            if getattr(translator, "counter", None) is not None:
+                counters[translator.counter] = translator.induction
+            translator = translator.parent
+        return counters
+
+    # analysis
+
+    @staticmethod
+    def stored(node: ExpressionNode) -> bool:
+        """Whether the value is only stored in a byte variable, so nothing reads its high byte"""
+        if sizeof(node.node_type) != 1:
+            return False
+        parent = node.parent
+        if isinstance(parent, AssignmentNode):
+            return parent.value is node and not parent.by_reference
+        if isinstance(parent, VariableDeclarationNode):
+            return parent.assignment is node and not parent.by_reference
+        return False
+
+    @staticmethod
+    def supported(node: ASTNode) -> bool:
+        """Whether the node itself is evaluated in registers, its operands may still fall back to the stack"""
+        node_type = getattr(node, "node_type", None)
+        if node_type is Double or isinstance(node_type, Array):
+            return False
+
+        if isinstance(node, LiteralNode):
+            return NumberToken.match(node.token) or CharLiteralToken.match(node.token) or BoolLiteralToken.match(node.token)
+
+        if isinstance(node, VariableReferenceNode):
+            variable = Variable.variables.get(getattr(node, "symbol", None))
+            if variable is None or node.dereference or sizeof(node.node_type) not in (1, 2):
+                return False
+            if node.pointer:
+                return node.index is None
+            return True
+
+        if isinstance(node, BinaryOperationNode):
+            if node.left.node_type is Double or node.right.node_type is Double:
+                return False
+            if isinstance(node, (AdditiveNode, BinaryNode, LogicalNode)):
+                return operation(node.token, ALU) is not None or operation(node.token, SHIFTS) is not None
+            if isinstance(node, MultiplicativeNode):
+                return StarToken.match(node.token) or any(token.match(node.token) for token in DIVISIONS)
+            return isinstance(node, ComparisonNode)
+
+        if isinstance(node, UnaryOperationNode):
+            return LogicalNotToken.match(node.token) or node.operand.node_type in (Int, Char)
+
+        if isinstance(node, CastNode):
+            return RegisterExpression.cast_kind(node) is not None
+
+        return False
+
+    @staticmethod
+    def cast_kind(node: CastNode) -> str | None:
+        origin, result = node.operand.node_type, node.result_type
+        if (isinstance(result, Pointer) or result is Int) and (isinstance(origin, Pointer) or origin is Int):
+            return "none"
+        if (origin, result) in {(Char, Int), (Bool, Int)}:
+            return "extend_signed" if node.signed else "extend"
+        if (origin, result) == (Int, Char) and not node.signed:
+            return "extend"     # the stack machine clears ah here too
+        return None
+
+    @staticmethod
+    def pure(node: ASTNode) -> bool:
+        """No calls or register reads, so it can be evaluated in any order"""
+        if isinstance(node, (FunctionCallNode, AssemblyExpressionNode)):
+            return False
+        return all(RegisterExpression.pure(child) for child in node.children)
+
+    @staticmethod
+    def need(node: ASTNode) -> int:
+        """Sethi–Ullman number: registers needed to evaluate the node without spilling"""
+        if not RegisterExpression.supported(node):
+            return len(REGISTERS)
+        if isinstance(node, (LiteralNode, VariableReferenceNode)):
+            return 1 if getattr(node, "index", None) is None else 1 + RegisterExpression.need(node.index)
+        if isinstance(node, (UnaryOperationNode, CastNode)):
+            return RegisterExpression.need(node.operand)
+        left, right = RegisterExpression.need(node.left), RegisterExpression.need(node.right)
+        return left + 1 if left == right else max(left, right)
+
+    # registers
+
+    @contextmanager
+    def register(self, exclude: list[str], allowed: list[str] = REGISTERS) -> Iterator[str]:
+        """A free register for the block, or a live one spilled to the stack until the block ends"""
+        for register in allowed:
+            if register not in self.live and register not in exclude:
+                yield register
+                return
+
+        victim = next(register for register in allowed if register not in exclude)
+        self.assemble("push", [victim])
+        yield victim
+        self.assemble("pop", [victim])
+
+    @contextmanager
+    def saved(self, registers: list[str]) -> Iterator[None]:
+        """Keep the live ones of these registers across the block"""
+        saved = [register for register in registers if register in self.live]
+        for register in saved:
+            self.assemble("push", [register])
+        yield
+        for register in reversed(saved):
+            self.assemble("pop", [register])
+
+    @contextmanager
+    def operands(self, left: ExpressionNode, right: ExpressionNode, target: str,
+                 allowed: list[str] = REGISTERS, left_first: bool = False,
+                 narrow: tuple[bool, bool] = (False, False)) -> Iterator[str]:
+        """
+        Left into target and right into another register from allowed, which the block gets.
+        left_first is the stack machine's order, used when the operands have side effects,
+        narrow tells of each operand whether only its low byte is read.
+        """
+        if self.pure(left) and self.pure(right):
+            left_first = self.need(left) >= self.need(right)
+
+        if left_first:
+            self.evaluate(left, target, narrow[0])
+            self.live.append(target)
+            with self.register([target], allowed) as other:
+                self.evaluate(right, other, narrow[1])
+                self.live.remove(target)
+                yield other
+        else:
+            with self.register([target], allowed) as other:
+                self.evaluate(right, other, narrow[1])
+                self.live.append(other)
+                self.evaluate(left, target, narrow[0])
+                self.live.remove(other)
+                yield other
+
+    # generation
+
+    def evaluate(self, node: ExpressionNode, target: str, narrow: bool = False) -> None:
+        """
+        Emit code leaving the value of the node in the target register, which must be free.
+        When narrow, only the low byte of a char or bool value has to be right.
+        """
+        if not self.supported(node):
+            return self.stack(node, target)
+        narrow = narrow and sizeof(node.node_type) == 1
+
+        if isinstance(node, LiteralNode):
+            value = node.token.value
+            value = ("1" if value else "0") if BoolLiteralToken.match(node.token) else value
+            self.assemble("mov", [low(target) if narrow and target in BYTE_REGISTERS else target, value])
+        elif isinstance(node, VariableReferenceNode):
+            self.variable(node, target, narrow)
+        elif isinstance(node, UnaryOperationNode):
+            self.unary(node, target, narrow)
+        elif isinstance(node, CastNode):
+            self.cast(node, target, narrow)
+        elif isinstance(node, MultiplicativeNode):
+            self.multiplicative(node, target, narrow)
+        elif isinstance(node, ComparisonNode):
+            self.comparison(node, target)
+        elif operation(node.token, SHIFTS) is not None:
+            self.shift(node, target, narrow)
+        else:
+            self.arithmetic(node, target, narrow)
+
+    def extend(self, target: str) -> None:
+        """Zero the high byte of a char value"""
+        if target in BYTE_REGISTERS:
+            self.assemble("xor", [high(target), high(target)])
+        else:
+            self.assemble("and", [target, "0xff"])
+
+    def stack(self, node: ExpressionNode, target: str) -> None:
+        """Translate the node the stack machine way and pop its value"""
+        # calls keep the loop counters themselves
+        kept = self.counters if isinstance(node, FunctionCallNode) else {}
+        with self.saved([register for register in REGISTERS if register != target and register not in kept]):
+            self.translator.add(node)
+            self.assemble("pop", [target])
+
+    def load_byte(self, target: str, address: str, narrow: bool = False) -> None:
+        if target in BYTE_REGISTERS and narrow:
+            self.assemble("mov", [low(target), f"byte[{address}]"])
+        elif target in BYTE_REGISTERS and target not in address.replace("+", " ").split():
+            self.assemble("mov", [target, "0"])
+            self.assemble("mov", [low(target), f"byte[{address}]"])
+        elif target in BYTE_REGISTERS:
+            self.assemble("mov", [low(target), f"byte[{address}]"])
+            self.assemble("mov", [high(target), "0"])
+        else:
+            self.assemble("mov", [target, f"word[{address}]"])
+            self.assemble("and", [target, "0xff"])
+
+    def load(self, target: str, address: str, size: int, narrow: bool = False) -> None:
+        if size == 1:
+            self.load_byte(target, address, narrow)
+        else:
+            self.assemble("mov", [target, f"word[{address}]"])
+
+    def variable(self, node: VariableReferenceNode, target: str, narrow: bool = False) -> None:
+        variable: Variable = Variable.variables[node.symbol]
+        size = sizeof(node.node_type)
+
+        if node.symbol in self.inductions and not node.pointer:
+            self.assemble("mov", [target, self.inductions[node.symbol]])
+            return
+
+        if node.pointer:
+            if variable.is_reference:
+                self.assemble("mov", [target, f"word[{variable.location()}]"])
+            else:
+                self.assemble("lea", [target, f"[{variable.location()}]"])
+            return
+
+        if node.index is None:
+            if not variable.is_reference:
+                return self.load(target, variable.location(), size, narrow)
+            if target in ("bx", "si", "di"):
+                self.assemble("mov", [target, f"word[{variable.location()}]"])
+                return self.load(target, target, size, narrow)
+            with self.register([target], ["bx", "si", "di"]) as base:
+                self.assemble("mov", [base, f"word[{variable.location()}]"])
+                self.load(target, base, size, narrow)
+            return
+
+        with self.register([target], INDEX_REGISTERS) as index:
+            self.evaluate(node.index, index)
+            if size == 2:
+                self.assemble("shl", [index, "1"])
+            if not variable.is_reference:
+                return self.load(target, f"{variable.location()} + {index}", size, narrow)
+
+            self.live.append(index)
+            with self.register([index] if target == "bx" else [index, target], ["bx"]) as base:
+                self.assemble("mov", [base, f"word[{variable.location()}]"])
+                self.load(target, f"{base} + {index}", size, narrow)
+            self.live.remove(index)
+
+    def unary(self, node: UnaryOperationNode, target: str, narrow: bool = False) -> None:
+        char = node.operand.node_type is Char
+        if MinusToken.match(node.token) and char and target not in BYTE_REGISTERS:
+            return self.stack(node, target)
+
+        # the byte forms leave the high byte as it is, zero when the operand is not narrow
+        self.evaluate(node.operand, target, narrow)
+
+        if MinusToken.match(node.token):
+            self.assemble("neg", [low(target) if char else target])
+        elif BinaryNotToken.match(node.token) and char:
+            self.assemble(*(("not", [low(target)]) if target in BYTE_REGISTERS else ("xor", [target, "0xff"])))
+        elif BinaryNotToken.match(node.token):
+            self.assemble("not", [target])
+        else:   # logical not
+            self.assemble("xor", [low(target) if target in BYTE_REGISTERS else target, "1"])
+
+    def cast(self, node: CastNode, target: str, narrow: bool = False) -> None:
+        kind = self.cast_kind(node)
+        if kind == "extend_signed" and target != "ax":
+            return self.stack(node, target)
+
+        if kind == "none":
+            self.evaluate(node.operand, target)
+        elif kind == "extend_signed":
+            self.evaluate(node.operand, target, True)
+            self.assemble("cbw")
+        elif node.operand.node_type is Int:
+            # to char, the low byte is already the value
+            self.evaluate(node.operand, target)
+            if not narrow:
+                self.extend(target)
+        else:
+            self.evaluate(node.operand, target, True)
+            self.extend(target)
+
+    def immediate(self, node: ExpressionNode, byte: bool = False) -> str | None:
+        """
+        Operand that can be given to an instruction directly, instead of loading it in a register.
+        Byte variables only for the byte forms of the instructions.
+        """
+        if isinstance(node, LiteralNode) and self.supported(node):
+            value = node.token.value
+            return ("1" if value else "0") if BoolLiteralToken.match(node.token) else str(value)
+        if isinstance(node, VariableReferenceNode) and node.symbol in self.inductions and not node.pointer:
+            return self.inductions[node.symbol]
+        if (isinstance(node, VariableReferenceNode) and self.supported(node) and node.index is None and not node.pointer
+                and not Variable.variables[node.symbol].is_reference):
+            size = sizeof(node.node_type)
+            if size == 2 or size == 1 and byte:
+                return f"{'word' if size == 2 else 'byte'}[{Variable.variables[node.symbol].location()}]"
+        return None
+
+    def arithmetic(self, node: BinaryOperationNode, target: str, narrow: bool = False) -> None:
+        mnemonic = operation(node.token, ALU)
+        char = sizeof(node.node_type) == 1
+        byte = char and target in BYTE_REGISTERS
+        first = low(target) if byte else target
+
+        immediate = self.immediate(node.right, byte) if self.pure(node.left) else None
+        if immediate is not None:
+            self.evaluate(node.left, target, byte)
+            self.assemble(mnemonic, [first, immediate])
+        else:
+            with self.operands(node.left, node.right, target, BYTE_REGISTERS if byte else REGISTERS,
+                               narrow=(byte, byte)) as other:
+                self.assemble(mnemonic, [first, low(other) if byte else other])
+
+        if char and not narrow:
+            self.extend(target)
+
+    def shift(self, node: BinaryOperationNode, target: str, narrow: bool = False) -> None:
+        byte = sizeof(node.left.node_type) != 2
+        if target == "cx" or byte and target not in BYTE_REGISTERS:
+            return self.stack(node, target)
+
+        # a byte shift leaves the high byte as it is, zero when the operand is not narrow
+        with self.operands(node.left, node.right, target, ["cx"], narrow=(narrow, True)) as count:
+            self.assemble(operation(node.token, SHIFTS), [low(target) if byte else target, "cl"])
+
+    def multiplicative(self, node: MultiplicativeNode, target: str, narrow: bool = False) -> None:
+        reduction = strength.reduce(node, target) if self.translator.config.optimize else None
+        if reduction is not None:
+            return self.reduced(node, *reduction, target, narrow)
+
+        word = node.left.node_type is Int
+        multiply = StarToken.match(node.token)
+        result = "dx" if ModuloToken.match(node.token) and word else "ax"
+
+        if not word:
+            allowed = ["bx", "cx", "dx"]
+        elif multiply:
+            allowed = ["bx", "cx", "dx", "si", "di"]
+        else:
+            allowed = ["bx", "cx", "si", "di"]
+
+        # the byte forms read al and the low byte of the other operand, division the whole ax
+        with self.operands(node.left, node.right, target, allowed, narrow=(not word and multiply, not word)) as other:
+            clobbered = ["ax", "dx"] if word else ["ax"]
+            with self.saved([register for register in clobbered if register not in (target, other)]):
+                if target != "ax":
+                    self.assemble("mov", ["ax", target])
+
+                if not word:
+                    self.assemble("mul" if multiply else "div", [low(other)])
+                    if not narrow:
+                        self.assemble("xor", ["ah", "ah"])
+                elif multiply:
+                    self.assemble("mul", [other])
+                elif SignedDivideToken.match(node.token):
+                    self.assemble("cwd")
+                    self.assemble("idiv", [other])
+                else:
+                    self.assemble("mov", ["dx", "0"])
+                    self.assemble("div", [other])
+
+                if target != result:
+                    self.assemble("mov", [target, result])
+
+    def reduced(self, node: MultiplicativeNode, operand: ExpressionNode, plan: strength.Plan,
+                target: str, narrow: bool = False) -> None:
+        """Multiplication or division by a constant as the shifts and adds of the plan"""
+        # only the low byte of a char product depends on the low byte of the operand, a char quotient on all of it
+        multiply = node.left.node_type is Char and StarToken.match(node.token)
+        self.evaluate(operand, target, multiply)
+        clobbered = [register for register in strength.clobbered(plan) if register != target]
+        with self.saved(clobbered):
+            if strength.scratch(plan):
+                with self.register([target, *clobbered]) as spare:
+                    strength.emit(self.assemble, plan, target, spare)
+            else:
+                strength.emit(self.assemble, plan, target)
+        if multiply and not narrow:
+            self.extend(target)
+
+    def compare(self, node: ComparisonNode, target: str) -> tuple[str, str]:
+        """
+        Emit the cmp of the operands, the first one evaluated in target, returns the jumps taken
+        when the comparison holds and when not. Like the stack machine, the swapped operand goes first.
+        """
+        equality, signed, swapped, inverted = analyze(node.token)
+        first, second = (node.right, node.left) if swapped else (node.left, node.right)
+        if equality and isinstance(first, LiteralNode) and not isinstance(second, LiteralNode):
+            first, second = second, first   # a literal is compared as the immediate
+        byte = sizeof(node.left.node_type) != 2
+
+        immediate = self.immediate(second, byte) if self.pure(first) else None
+        if immediate is not None:
+            self.evaluate(first, target, byte)
+            self.assemble("cmp", [low(target) if byte else target, immediate])
+        else:
+            with self.operands(first, second, target, BYTE_REGISTERS if byte else REGISTERS, narrow=(byte, byte)) as other:
+                self.assemble("cmp", [low(target), low(other)] if byte else [target, other])
+
+        return jumps(node.token)
+
+    def comparison(self, node: ComparisonNode, target: str) -> None:
+        if sizeof(node.left.node_type) != 2 and target not in BYTE_REGISTERS:
+            return self.stack(node, target)
+
+        holds, _ = self.compare(node, target)
+        materialize(self.translator, holds, target)
+
+    def pair(self, first: ExpressionNode, second: ExpressionNode) -> None:
+        """
+        The two operands of a binary operation in ax and bx, in the order the stack machine loads them:
+        first is evaluated first and ends up in bx, second in ax.
+        """
+        with self.operands(second, first, "ax", ["bx"]):
+            pass
@@ -0,0 +1,176 @@
+from ..nodes.expression import ExpressionNode, LiteralNode, MultiplicativeNode
+from ..nodes.types import Int, Char
+from ..tokenizer.symbols import StarToken, DivideToken, SignedDivideToken, ModuloToken, NumberToken, CharLiteralToken
+from typing import Callable
+
+
+# A plan is the instructions replacing a mul/div by a constant. "x" is the register holding the other operand,
+# which gets the result, "s" a scratch register, ax and dx are named when the plan clobbers them.
+Plan = list[tuple[str, list[str]]]
+
+# clocks and bytes of the register forms, from the 8086 timing tables
+CLOCKS: dict[str, tuple[int, int]] = {
+    "shl": (2, 2), "shr": (2, 2), "sar": (2, 2), "neg": (3, 2), "cwd": (5, 1),
+    "add": (3, 2), "sub": (3, 2), "and": (3, 2), "xor": (3, 2), "mov": (2, 2),
+    "mul": (126, 2), "div": (153, 2), "idiv": (175, 2), "mul8": (74, 2), "div8": (85, 2),
+}
+
+
+def assembled(plan: Plan, register: str, spare: str | None = None) -> Plan:
+    """The plan with x in register and s in spare, moves of a register to itself are left out"""
+    names = {"x": register, "s": spare or "s"}
+    instructions: Plan = []
+    for mnemonic, operands in plan:
+        operands = [names.get(operand, operand) for operand in operands]
+        if not (mnemonic == "mov" and operands[0] == operands[1]):
+            instructions.append((mnemonic, operands))
+    return instructions
+
+
+def cost(plan: Plan, register: str) -> int:
+    """
+    Estimated clocks of the plan with x in register. The bus fetches a byte in 4 clocks and the short register
+    instructions run faster than that, so an instruction counts at least 4 clocks per byte,
+    which is what makes long shift chains lose to a single mul.
+    """
+    total = 0
+    for mnemonic, operands in assembled(plan, register):
+        clocks, size = CLOCKS[mnemonic]
+        if mnemonic not in ("shl", "shr", "sar") and operands and operands[-1].isdigit():
+            clocks, size = 4, 3 if mnemonic == "mov" else 4     # immediate forms
+        total += max(clocks, 4 * size)
+    return total
+
+
+def shifts(mnemonic: str, register: str, count: int) -> Plan:
+    # cpu 8086 only shifts by 1 or by cl
+    return [(mnemonic, [register, "1"])] * count
+
+
+def power(value: int) -> int | None:
+    """k for value == 2 ** k"""
+    return value.bit_length() - 1 if value > 0 and value & (value - 1) == 0 else None
+
+
+def non_adjacent_form(value: int) -> list[int]:
+    """Digits 1, 0, -1 of the value from the lowest, no two adjacent ones nonzero"""
+    digits: list[int] = []
+    while value:
+        digit = 2 - (value & 3) if value & 1 else 0
+        digits.append(digit)
+        value = (value - digit) >> 1
+    return digits
+
+
+def shift_add(value: int) -> Plan:
+    """x * value by shifting x and adding or subtracting its copy (Horner's scheme over the digits)"""
+    digits = non_adjacent_form(value)
+    if sum(1 for digit in digits if digit) == 1:
+        return shifts("shl", "x", len(digits) - 1)
+
+    plan: Plan = [("mov", ["s", "x"])]
+    for digit in reversed(digits[:-1]):
+        plan.append(("shl", ["x", "1"]))
+        if digit:
+            plan.append(("add" if digit > 0 else "sub", ["x", "s"]))
+    return plan
+
+
+def multiplication(value: int) -> Plan:
+    if value == 0:
+        return [("xor", ["x", "x"])]
+    negated = shift_add(-value & 0xffff) + [("neg", ["x"])] if value != 1 else []
+    return min(shift_add(value), negated, key=lambda plan: cost(plan, "x")) if negated else []
+
+
+def reciprocal(divisor: int) -> Plan:
+    """
+    x / divisor for a 16 bit unsigned x as the high word of a multiplication by 2 ** (16 + k) / divisor rounded up.
+    When that multiplier needs 17 bits, its low 16 are used and x is added back, halved so it does not overflow.
+    """
+    bits = (divisor - 1).bit_length()
+    for extra in range(bits + 1):
+        multiplier = -(-(1 << (16 + extra)) // divisor)
+        error = multiplier * divisor - (1 << (16 + extra))
+        if multiplier < 0x10000 and error <= (1 << extra):
+            return [("mov", ["ax", "x"]), ("mov", ["dx", str(multiplier)]), ("mul", ["dx"]),
+                    *shifts("shr", "dx", extra), ("mov", ["x", "dx"])]
+
+    multiplier = -(-(1 << (16 + bits)) // divisor) - 0x10000
+    return [("mov", ["s", "x"]), ("mov", ["ax", "x"]), ("mov", ["dx", str(multiplier)]), ("mul", ["dx"]),
+            ("sub", ["s", "dx"]), ("shr", ["s", "1"]), ("add", ["s", "dx"]), *shifts("shr", "s", bits - 1),
+            ("mov", ["x", "s"])]
+
+
+def constant(node: ExpressionNode) -> int | None:
+    if isinstance(node, LiteralNode) and (NumberToken.match(node.token) or CharLiteralToken.match(node.token)):
+        return node.token.value & 0xffff
+    return None
+
+
+def reduce(node: MultiplicativeNode, register: str) -> tuple[ExpressionNode, Plan] | None:
+    """
+    The operand that is not constant and the plan computing the node from it in the register,
+    None when the mul or div instruction is cheaper or the operation has no constant operand.
+    Word plans leave the register as the instructions would. Char products are right in the low byte,
+    char quotients expect a zero extended operand and stay zero extended.
+    """
+    operand, value = node.left, constant(node.right)
+    if StarToken.match(node.token) and value is None:
+        operand, value = node.right, constant(node.left)
+    if value is None or node.left.node_type not in (Int, Char):
+        return None
+
+    word = node.left.node_type is Int
+    k = power(value)
+
+    if StarToken.match(node.token):
+        plan = multiplication(value)
+        instruction = [("mov", ["s", str(value)]), ("mul" if word else "mul8", ["s"]), ("mov", ["x", "ax"])]
+
+    elif not word:
+        # char modulo computes the quotient, it keeps its div
+        if ModuloToken.match(node.token) or k is None:
+            return None
+        plan = shifts("shr", "x", k)
+        instruction = [("mov", ["s", str(value)]), ("div8", ["s"]), ("xor", ["ah", "ah"]), ("mov", ["x", "ax"])]
+
+    elif ModuloToken.match(node.token):
+        if k is None:
+            return None
+        plan = [("and", ["x", str(value - 1)])]
+        instruction = [("mov", ["s", str(value)]), ("mov", ["dx", "0"]), ("div", ["s"]), ("mov", ["x", "dx"])]
+
+    elif SignedDivideToken.match(node.token):
+        if k is None or k > 14:     # 32768 is a negative divisor
+            return None
+        plan = [] if k == 0 else [("mov", ["ax", "x"]), ("cwd", []), ("and", ["dx", str(value - 1)]),
+                                  ("add", ["ax", "dx"]), *shifts("sar", "ax", k), ("mov", ["x", "ax"])]
+        instruction = [("mov", ["s", str(value)]), ("cwd", []), ("idiv", ["s"]), ("mov", ["x", "ax"])]
+
+    elif DivideToken.match(node.token):
+        if value == 0:
+            return None
+        plan = shifts("shr", "x", k) if k is not None else reciprocal(value)
+        instruction = [("mov", ["s", str(value)]), ("mov", ["dx", "0"]), ("div", ["s"]), ("mov", ["x", "ax"])]
+
+    else:
+        return None
+
+    # both move the operand to ax first when it is elsewhere
+    instruction = [("mov", ["ax", "x"]), *instruction]
+    return (operand, plan) if cost(plan, register) < cost(instruction, register) else None
+
+
+def clobbered(plan: Plan) -> list[str]:
+    """ax and dx if the plan uses them"""
+    return [register for register in ("ax", "dx") if any(register in operands for _, operands in plan)]
+
+
+def scratch(plan: Plan) -> bool:
+    return any("s" in operands for _, operands in plan)
+
+
+def emit(assemble: Callable[[str, list[str]], None], plan: Plan, register: str, spare: str | None = None) -> None:
+    for mnemonic, operands in assembled(plan, register, spare):
+        assemble(mnemonic, operands)
@@ -0,0 +1,113 @@
+from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
+from ..nodes.expression import (ExpressionNode, BinaryOperationNode, FunctionCallNode, VariableReferenceNode,
+                                AssemblyExpressionNode)
+from ..nodes.statement import FunctionDefinitonNode, ReturnNode, AssemblyNode, ArgumentDeclarationNode, AssignmentNode
+from ..nodes.scope import Namespace, Symbol
+from ..nodes.types import Int, Array
+from ..nodes.inline import FRAME_ASSEMBLY, Inliner
+from ..tokenizer.symbols import Token, PlusToken, StarToken, BinaryAndToken, BinaryOrToken, BinaryXorToken
+
+
+# operations that give the same whatever the grouping and order of their operands, with the operand changing nothing
+IDENTITY: dict[type[Token], int] = {PlusToken: 0, StarToken: 1, BinaryAndToken: 0xffff, BinaryOrToken: 0, BinaryXorToken: 0}
+
+MNEMONIC: dict[type[Token], str] = {PlusToken: "add", StarToken: "mul", BinaryAndToken: "and", BinaryOrToken: "or", BinaryXorToken: "xor"}
+
+
+def own(node: ASTNode) -> list[ASTNode]:
+    """The descendants of the node, leaving out the bodies of functions defined in it"""
+    found: list[ASTNode] = []
+    stack: list[ASTNode] = list(node.children)
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        if not isinstance(child, FunctionDefinitonNode):
+            stack.extend(child.children)
+    return found
+
+
+def returns(definition: FunctionDefinitonNode) -> list[ReturnNode]:
+    return [node for node in own(definition.body) if isinstance(node, ReturnNode)]
+
+
+def addressed(node: ExpressionNode) -> bool:
+    """
+    Whether the expression may pass on the address of a variable in the frame, which a tail call reuses or drops.
+    Only a reference parameter that is never bound again surely points out of the frame,
+    a reference local may be bound to anything in it.
+    """
+    for child in [node, *own(node)]:
+        if (isinstance(child, VariableReferenceNode) and (child.pointer or isinstance(child.node_type, Array))
+                and not isinstance(child.symbol.scope, Namespace) and not outside(child.symbol)):
+            return True
+    return False
+
+
+def outside(symbol: Symbol) -> bool:
+    """Whether the variable is a reference to the memory of the caller"""
+    return (isinstance(symbol.node, ArgumentDeclarationNode) and symbol.node.node_type.is_reference
+            and not any(isinstance(node, AssignmentNode) and node.by_reference for node in symbol.references))
+
+
+def operation(node: ExpressionNode) -> type[Token] | None:
+    if isinstance(node, BinaryOperationNode):
+        return next((token for token in IDENTITY if token.match(node.token)), None)
+    return None
+
+
+def operands(node: ExpressionNode, token: type[Token]) -> list[ExpressionNode]:
+    """a, b and c of a + (b + c)"""
+    if operation(node) is token:
+        return operands(node.left, token) + operands(node.right, token)
+    return [node]
+
+
+def framed(node: ExpressionNode, definition: FunctionDefinitonNode) -> bool:
+    """Whether the value depends on nothing but the variables of the frame, which no call can change"""
+    for child in [node, *own(node)]:
+        if isinstance(child, (FunctionCallNode, AssemblyExpressionNode)):
+            return False
+        if isinstance(child, VariableReferenceNode) and (child.symbol.scope is not definition.context or child.dereference
+                                                         or child.symbol.node.node_type.is_reference):
+            return False
+    return True
+
+
+def recursion(node: ReturnNode) -> tuple[type[Token], FunctionCallNode, list[ExpressionNode]] | None:
+    """
+    The operation, the call of the function itself and the other operands of return a + f(...) + b,
+    None when the returned value is not such a chain or the other operands read more than the frame.
+    """
+    token = operation(node.value) if node.value is not None else None
+    if token is None or node.value.node_type is not Int:
+        return None
+    chain = operands(node.value, token)
+    calls = [operand for operand in chain if isinstance(operand, FunctionCallNode) and operand.symbol.node is node.function]
+    if len(calls) != 1 or addressed(calls[0]):
+        return None
+    values = [operand for operand in chain if operand is not calls[0]]
+    if not all(value.node_type is Int and framed(value, node.function) for value in values):
+        return None
+    return token, calls[0], values
+
+
+def accumulation(definition: FunctionDefinitonNode) -> type[Token] | None:
+    """
+    The operation of a function whose returns are either f(...) combined with values of the frame by it or anything else.
+    The values combined on the way down are kept in an accumulator that the other returns combine with what they return,
+    so the recursion can jump back to the body instead of calling itself.
+    """
+    if definition.node_type.return_type is not Int:
+        return None
+    for node in own(definition.body):
+        if isinstance(node, AssemblyNode) and FRAME_ASSEMBLY.search(Inliner.instruction(node)):
+            return None
+
+    found: set[type[Token]] = set()
+    for node in returns(definition):
+        if isinstance(node.value, FunctionCallNode) and node.value.symbol.node is definition:
+            continue
+        recursive = recursion(node)
+        if recursive is not None:
+            found.add(recursive[0])
+    return found.pop() if len(found) == 1 else None
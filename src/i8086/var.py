@@ -2,9 +2,10 @@ from ..translator import Translator, Assembly
 from ..nodes.statement import VariableDeclarationNode, AssignmentNode, IncrementalNode, ASTNode
 from ..nodes.expression import VariableReferenceNode, LiteralNode, ArrayLiteralNode
 from .sizeof import sizeof
-from ..tokenizer.symbols import StringLiteralToken, NumberToken, IncrementToken, DecrementToken
+from ..tokenizer.symbols import StringLiteralToken, NumberToken, BoolLiteralToken, IncrementToken, DecrementToken
 from ..nodes.types import Int, Bool, Array, Double
 from .allocator import Variable, StackFrame
+from .registers import RegisterExpression
 from ..errors import NotImplementedError, NadLabemError
 from .program import ProgramI8086Translator
 from .literal import StringReferenceTranslator
@@ -92,13 +93,18 @@ class VariableDeclarationTranslator(Translator):
         if isinstance(variable.var_type.expression_type, Array) and not self.node.by_reference:
             return self.make_array(variable, variable.var_type.expression_type)
 
-        self.add(self.node.assignment)
+        # a static variable declared from a literal outside loops is initialized in the data segment, no code runs for it
+        data: bool = (isinstance(self.node.assignment, LiteralNode) and variable.is_static and not variable.is_reference
+                      and not (self.closest_parent(WhileTranslator) or self.closest_parent(ForTranslator)))
+
+        if not data:
+            self.add(self.node.assignment)
 
         if self.node.by_reference:
             self.assemble("pop", ["ax"])
             variable.store_pointer(self, "ax")
 
-        elif isinstance(self.node.assignment, LiteralNode) and variable.is_static and not variable.is_reference and not (self.closest_parent(WhileTranslator) or self.closest_parent(ForTranslator)):
+        elif data:
             definition: str = "<definition>"
             bytelen = sizeof(self.node.assignment.node_type)
             if bytelen == 1:
@@ -108,8 +114,12 @@ class VariableDeclarationTranslator(Translator):
             elif bytelen == 4:
                 definition = "dd"
 
+            value = self.node.assignment.token.value
+            if BoolLiteralToken.match(self.node.assignment.token):
+                value = 1 if value else 0
+
             variable.declaration = [
-                Assembly(self.config, definition, [self.node.assignment.token.value], label=variable.symbol.id)
+                Assembly(self.config, definition, [value], label=variable.symbol.id)
             ]
 
         else:
@@ -178,6 +188,9 @@ class VariableReferenceTranslator(Translator):
         variable: Variable = Variable.variables[self.node.symbol]
         self.variable: Variable = variable
 
+        if RegisterExpression.translate(self):
+            return
+
         index_reg: str = ""
 
         if self.node.index is not None:
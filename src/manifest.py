@@ -0,0 +1,67 @@
+from .parser.cache import compiler_fingerprint
+from pathlib import Path
+import hashlib, json, os
+
+
+def source_digest(source: str) -> str:
+    return hashlib.sha256(source.encode("utf8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records which files each program of a project was compiled from and what they contained,
+    so rebuilding the project only recompiles programs whose source or included modules changed.
+    Programs are keyed by resolved path, the options and the compiler version are part of every record.
+    """
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.programs: dict[str, dict] = {}
+        self.digests: dict[Path, str | None] = {}     # file hashes of this run, shared modules get read once
+
+        try:
+            manifest = json.loads(path.read_text(encoding="utf8"))
+        except (OSError, ValueError):
+            return      # no manifest yet (or a broken one), everything gets built
+        if isinstance(manifest, dict) and manifest.get("compiler") == compiler_fingerprint():
+            self.programs = manifest.get("programs", {})
+
+    def digest(self, location: Path) -> str | None:
+        location = location.resolve()
+        if location not in self.digests:
+            try:
+                self.digests[location] = source_digest(location.read_text(encoding="utf8"))
+            except (OSError, UnicodeDecodeError):
+                self.digests[location] = None      # deleted since, never matches a record
+        return self.digests[location]
+
+    @staticmethod
+    def options_digest(options: dict) -> str:
+        # where the module cache lives does not change the output
+        options = {name: value for name, value in options.items() if name != "cache_dir"}
+        return hashlib.sha256(json.dumps(options, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_current(self, location: Path, output: Path, options: dict) -> bool:
+        record = self.programs.get(str(location.resolve()))
+        if record is None or record["options"] != self.options_digest(options) or not output.is_file():
+            return False
+        return all(self.digest(Path(source)) == digest for source, digest in record["sources"].items())
+
+    def record(self, location: Path, options: dict, sources: dict[Path, str], **stats: int) -> None:
+        """Sources map every file the program was compiled from to the digest of what the compiler read"""
+        self.programs[str(location.resolve())] = {
+            "options": self.options_digest(options),
+            "sources": {str(source.resolve()): digest for source, digest in sources.items()},
+            "stats": stats
+        }
+
+    def stats(self, location: Path) -> dict[str, int]:
+        return self.programs[str(location.resolve())].get("stats", {})
+
+    def forget(self, location: Path) -> None:
+        self.programs.pop(str(location.resolve()), None)
+
+    def save(self) -> None:
+        temporary = self.path.with_suffix(f".{os.getpid()}.tmp")
+        temporary.write_text(json.dumps({"compiler": compiler_fingerprint(), "programs": self.programs}, indent=1), encoding="utf8")
+        os.replace(temporary, self.path)
@@ -0,0 +1,273 @@
+from .node import AbstractSyntaxTreeNode as ASTNode, ProgramNode
+from .expression import (ExpressionNode, LiteralNode, VariableReferenceNode, AdditiveNode, MultiplicativeNode, BinaryNode,
+                         ComparisonNode, LogicalNode, UnaryOperationNode, CastNode, BinaryOperationNode, AssemblyExpressionNode)
+from .statement import (VariableDeclarationNode, AssignmentNode, IncrementalNode, AssemblyNode, WhileNode, ForNode, LoopNode)
+from .scope import Symbol, Namespace
+from .types import ExpressionType, Int, Char, Bool, Double
+from ..tokenizer.symbols import (NumberToken, CharLiteralToken, BoolLiteralToken, PlusToken, MinusToken, StarToken,
+                                 DivideToken, SignedDivideToken, ModuloToken, BinaryAndToken, BinaryOrToken, BinaryXorToken,
+                                 BinaryNotToken, LogicalNotToken, BinaryShiftLeftToken, BinaryShiftRightToken,
+                                 BinaryRotateLeftToken, BinaryRotateRightToken, LogicalAndToken, LogicalOrToken,
+                                 IsEqualToken, IsNotEqualToken, LessThanToken, GreaterThanToken, IsLtEqToken, IsGtEqToken,
+                                 SignedLessThanToken, SignedGreaterThanToken, SignedIsLtEqToken, SignedIsGtEqToken)
+from ..profiler import Profile
+import re
+
+
+# bits of the values as the i8086 code keeps them, arithmetic wraps around at these widths
+WIDTHS: dict[ExpressionType, int] = {Int: 16, Char: 8, Bool: 8, Double: 32}
+
+PLACEHOLDER = re.compile(r"\{([a-zA-Z0-9_]+)\}")
+
+
+def signed(value: int, bits: int) -> int:
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def rotate(value: int, count: int, bits: int) -> int:
+    mask = (1 << bits) - 1
+    return ((value << count) | (value >> (bits - count))) & mask
+
+
+COMPARISONS = [
+    (IsEqualToken, False, lambda a, b: a == b),
+    (IsNotEqualToken, False, lambda a, b: a != b),
+    (LessThanToken, False, lambda a, b: a < b),
+    (GreaterThanToken, False, lambda a, b: a > b),
+    (IsLtEqToken, False, lambda a, b: a <= b),
+    (IsGtEqToken, False, lambda a, b: a >= b),
+    (SignedLessThanToken, True, lambda a, b: a < b),
+    (SignedGreaterThanToken, True, lambda a, b: a > b),
+    (SignedIsLtEqToken, True, lambda a, b: a <= b),
+    (SignedIsGtEqToken, True, lambda a, b: a >= b),
+]
+
+
+class ConstantFolder:
+    """
+    Replaces expression subtrees whose value is known at compile time by literals,
+    computed the way the i8086 code would: 8 bit chars and bools, 16 bit ints, 32 bit doubles, unsigned unless stated.
+    Operations whose result the generated code does not define (division by zero, shifting by the width or more)
+    and the char divisions that compute something else than their name says are left to run.
+
+    Globals declared from a literal that are never assigned, incremented, pointed to or named in inline assembly
+    are constants, their reads are replaced by the literal too. Constant declarations nothing reads anymore are pruned.
+    """
+
+    def __init__(self, tree: ProgramNode, profile: Profile | None = None):
+        self.tree: ProgramNode = tree
+        self.profile: Profile | None = profile
+        self.constants: dict[Symbol, int] = {}
+        self.folded: int = 0
+        self.propagated: int = 0
+
+    def fold(self) -> None:
+        while True:
+            self.visit(self.tree)
+            constants = self.find_constants()
+            if constants.keys() <= self.constants.keys():
+                break
+            self.constants = constants
+
+        while self.tree.prune_children():
+            pass
+
+        if self.profile is not None:
+            self.profile.count("folded_nodes", self.folded)
+            self.profile.count("propagated_constants", self.propagated)
+
+    # constant globals
+
+    def find_constants(self) -> dict[Symbol, int]:
+        candidates: dict[Symbol, int] = {}
+        written: set[Symbol] = set()
+        placeholders: set[str] = set()
+
+        stack: list[ASTNode] = [self.tree]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+
+            if isinstance(node, (AssignmentNode, IncrementalNode)):
+                written.add(node.symbol)
+            elif isinstance(node, VariableReferenceNode) and (node.pointer or node.dereference):
+                written.add(node.symbol)
+            elif isinstance(node, AssemblyNode):
+                placeholders.update(PLACEHOLDER.findall(node.token.line.string))
+            elif isinstance(node, AssemblyExpressionNode):
+                placeholders.update(re.findall(r"[a-zA-Z_]\w*", node.assembly_expression))
+            elif (isinstance(node, VariableDeclarationNode) and isinstance(node.symbol.scope, Namespace)
+                    and not node.by_reference and node.node_type.expression_type in (Int, Char, Bool)
+                    and isinstance(node.assignment, LiteralNode)
+                    and node.closest_parent(WhileNode, ForNode, LoopNode) is None):
+                # static data, the value is there before any code runs
+                candidates[node.symbol] = self.value(node.assignment)
+
+        return {symbol: value for symbol, value in candidates.items()
+                if symbol not in written and symbol.name not in placeholders}
+
+    # folding
+
+    def visit(self, node: ASTNode) -> ASTNode:
+        """Fold the subtree, returns the node that stands in its place"""
+        for child in list(node.children):
+            replacement = self.visit(child)
+            if replacement is not child:
+                self.replace(node, child, replacement)
+
+        if isinstance(node, LiteralNode) or not isinstance(node, ExpressionNode):
+            return node
+
+        value = self.evaluate(node)
+        if value is None:
+            return node
+
+        if isinstance(node, VariableReferenceNode):
+            self.propagated += 1
+        else:
+            self.folded += 1
+        return self.literal(node, value)
+
+    @staticmethod
+    def replace(parent: ASTNode, old: ASTNode, new: ASTNode) -> None:
+        # children are also kept in named attributes (left, operand, arguments, ...)
+        for name, attribute in vars(parent).items():
+            if attribute is old:
+                setattr(parent, name, new)
+            elif isinstance(attribute, list):
+                for index, item in enumerate(attribute):
+                    if item is old:
+                        attribute[index] = new
+        old.parent = None
+        new.set_parent(parent)
+
+    @staticmethod
+    def literal(node: ExpressionNode, value: int) -> LiteralNode:
+        line = node.token.line
+        if node.node_type is Bool:
+            token = BoolLiteralToken("true" if value else "false", line)
+        elif node.node_type is Char:
+            token = CharLiteralToken(f"{value}c", line)
+        else:
+            token = NumberToken(str(value), line)
+
+        literal = LiteralNode(token, parser=node.parser)
+        literal.node_type = node.node_type     # doubles are written as plain numbers
+        literal.scope = literal.context = node.scope
+        return literal
+
+    @staticmethod
+    def value(node: LiteralNode) -> int:
+        if BoolLiteralToken.match(node.token):
+            return 1 if node.token.value else 0
+        return node.token.value & ((1 << WIDTHS.get(node.node_type, 16)) - 1)
+
+    def operand(self, node: ExpressionNode) -> int | None:
+        if isinstance(node, LiteralNode) and node.node_type in WIDTHS:
+            return self.value(node)
+        return None
+
+    def evaluate(self, node: ExpressionNode) -> int | None:
+        """Value of the node if its operands are literals, None if it has to be computed at runtime"""
+
+        if isinstance(node, VariableReferenceNode):
+            if node.index is None and not node.pointer and not node.dereference:
+                return self.constants.get(getattr(node, "symbol", None))
+            return None
+
+        if isinstance(node, UnaryOperationNode):
+            return self.unary(node)
+
+        if isinstance(node, CastNode):
+            return self.cast(node)
+
+        if isinstance(node, (AdditiveNode, MultiplicativeNode, BinaryNode, ComparisonNode, LogicalNode)):
+            left, right = self.operand(node.left), self.operand(node.right)
+            if left is None or right is None:
+                return None
+            if isinstance(node, ComparisonNode):
+                return self.comparison(node, left, right)
+            return self.arithmetic(node, left, right)
+
+        return None
+
+    def unary(self, node: UnaryOperationNode) -> int | None:
+        value = self.operand(node.operand)
+        if value is None:
+            return None
+        mask = (1 << WIDTHS[node.operand.node_type]) - 1
+
+        if MinusToken.match(node.token):
+            return -value & mask
+        if BinaryNotToken.match(node.token):
+            return ~value & mask
+        if LogicalNotToken.match(node.token):
+            return value ^ 1
+        return None
+
+    def cast(self, node: CastNode) -> int | None:
+        value = self.operand(node.operand)
+        origin, result = node.operand.node_type, node.result_type
+        if value is None or result not in WIDTHS:
+            return None
+
+        if origin is result:
+            return value
+        if result is Bool:
+            return 1 if value else 0
+        bits = WIDTHS[result]
+        if WIDTHS[origin] < bits and node.signed:
+            return signed(value, WIDTHS[origin]) & ((1 << bits) - 1)
+        return value & ((1 << bits) - 1)
+
+    def arithmetic(self, node: BinaryOperationNode, left: int, right: int) -> int | None:
+        bits = WIDTHS[node.left.node_type]
+        mask = (1 << bits) - 1
+        token = node.token
+        char = node.left.node_type is Char
+
+        if PlusToken.match(token):
+            return (left + right) & mask
+        if MinusToken.match(token):
+            return (left - right) & mask
+        if StarToken.match(token):
+            return (left * right) & mask
+
+        if DivideToken.match(token):
+            return left // right if right else None
+        if SignedDivideToken.match(token):
+            # char division is always unsigned, and its modulo gives the quotient, both stay as they are
+            if not right or char:
+                return None
+            quotient = abs(signed(left, bits)) // abs(signed(right, bits))
+            return (quotient if (signed(left, bits) < 0) == (signed(right, bits) < 0) else -quotient) & mask
+        if ModuloToken.match(token):
+            return left % right if right and not char else None
+
+        if BinaryAndToken.match(token) or LogicalAndToken.match(token):
+            return left & right
+        if BinaryOrToken.match(token) or LogicalOrToken.match(token):
+            return left | right
+        if BinaryXorToken.match(token):
+            return left ^ right
+
+        if right >= bits:
+            return None
+        if BinaryShiftLeftToken.match(token):
+            return (left << right) & mask
+        if BinaryShiftRightToken.match(token):
+            return left >> right
+        if BinaryRotateLeftToken.match(token):
+            return rotate(left, right, bits)
+        if BinaryRotateRightToken.match(token):
+            return rotate(left, bits - right, bits) if right else left
+        return None
+
+    def comparison(self, node: ComparisonNode, left: int, right: int) -> int | None:
+        bits = WIDTHS[node.left.node_type]
+        for token_type, is_signed, compare in COMPARISONS:
+            if token_type.match(node.token):
+                if is_signed:
+                    left, right = signed(left, bits), signed(right, bits)
+                return 1 if compare(left, right) else 0
+        return None
@@ -0,0 +1,315 @@
+from .node import AbstractSyntaxTreeNode as ASTNode, ProgramNode
+from .expression import ExpressionNode, LiteralNode, VariableReferenceNode, FunctionCallNode, AssemblyExpressionNode
+from .statement import (StatementNode, CodeBlockNode, VariableDeclarationNode, AssignmentNode, FunctionDefinitonNode,
+                        FunctionCallStatementNode, ReturnNode, AssemblyNode, BreakNode, ContinueNode)
+from .scope import Symbol, Context, Namespace
+from .types import Void, Double, Array, Comparator
+from .fold import ConstantFolder, PLACEHOLDER
+from ..tokenizer.symbols import NameToken
+from ..errors import NameError
+from ..profiler import Profile
+import copy, re
+
+
+# functions with up to this many nodes in their body are inlined without being asked to
+INLINE_NODES: int = 12
+
+# inline assembly that works with the frame of the function cannot be moved out of it
+FRAME_ASSEMBLY = re.compile(r"\b(bp|sp|ret|retf|iret|call)\b", re.IGNORECASE)
+
+
+def descendants(node: ASTNode) -> list[ASTNode]:
+    found: list[ASTNode] = []
+    stack: list[ASTNode] = list(node.children)
+    while stack:
+        child = stack.pop()
+        found.append(child)
+        stack.extend(child.children)
+    return found
+
+
+class Inliner:
+    """
+    Replaces calls of small leaf functions (functions that call nothing) by their bodies,
+    so the arguments are not pushed, no frame is built and nothing returns.
+    Functions defined with the inline hint are inlined whatever their size.
+
+    A function whose body is a single return becomes the returned expression with the arguments in place of the parameters,
+    as long as that evaluates nothing twice that is not a literal or a plain variable.
+    A void function called as a statement becomes a block declaring its parameters as variables of the caller
+    (by reference parameters as references) followed by a copy of its body, its locals renamed into the caller's frame.
+    """
+
+    def __init__(self, tree: ProgramNode, profile: Profile | None = None):
+        self.tree: ProgramNode = tree
+        self.profile: Profile | None = profile
+        self.inlined: dict[str, int] = {}       # calls inlined by function name
+        self.candidates: dict[FunctionDefinitonNode, bool] = {}
+
+    def inline(self) -> None:
+        for call in self.calls(self.tree):
+            definition = call.symbol.node
+            if not self.candidate(definition):
+                continue
+
+            if isinstance(call, FunctionCallNode):
+                replacement = self.expression(call, definition)
+            else:
+                replacement = self.statement(call, definition)
+            if replacement is None:
+                continue
+
+            ConstantFolder.replace(call.parent, call, replacement)
+            self.inlined[definition.name_token.string] = self.inlined.get(definition.name_token.string, 0) + 1
+
+        while self.tree.prune_children():
+            pass
+
+        if self.profile is not None:
+            self.profile.count("inlined_calls", sum(self.inlined.values()))
+            for name, calls in self.inlined.items():
+                self.profile.count(f"inlined_calls.{name}", calls)
+
+    def calls(self, node: ASTNode) -> list[FunctionCallNode | FunctionCallStatementNode]:
+        """Calls in the subtree, the ones in arguments before the call they are passed to"""
+        found: list[FunctionCallNode | FunctionCallStatementNode] = []
+        for child in node.children:
+            found.extend(self.calls(child))
+        if isinstance(node, (FunctionCallNode, FunctionCallStatementNode)):
+            found.append(node)
+        return found
+
+    # what can be inlined
+
+    def candidate(self, definition: FunctionDefinitonNode) -> bool:
+        if definition not in self.candidates:
+            self.candidates[definition] = self.inlinable(definition)
+        return self.candidates[definition]
+
+    def inlinable(self, definition: FunctionDefinitonNode) -> bool:
+        if not isinstance(definition, FunctionDefinitonNode) or not definition.is_connected:
+            return False
+        if not definition.inline and definition.body.count() > INLINE_NODES:
+            return False
+
+        for argument in definition.arguments:
+            if (not argument.node_type.is_reference and
+                    (argument.node_type.expression_type is Double or isinstance(argument.node_type.expression_type, Array))):
+                return False
+
+        body = descendants(definition.body)
+        for node in body:
+            if isinstance(node, (FunctionCallNode, FunctionCallStatementNode, FunctionDefinitonNode)):
+                return False    # not a leaf
+            if isinstance(node, VariableDeclarationNode) and isinstance(node.node_type.expression_type, Array) and not node.by_reference:
+                return False
+            if isinstance(node, (BreakNode, ContinueNode)) and node.loop not in body:
+                return False
+            if isinstance(node, AssemblyNode) and not self.movable(node):
+                return False
+
+            symbol: Symbol | None = getattr(node, "symbol", None)
+            if symbol is not None and symbol.scope is not definition.context and not isinstance(symbol.scope, Namespace):
+                return False    # a variable of the enclosing function, in its frame
+
+        return self.returned(definition) is not None or self.void(definition)
+
+    @staticmethod
+    def instruction(node: AssemblyNode) -> str:
+        """The line without its comment, from the $"""
+        return "$".join(node.token.line.string.split(";", 1)[0].split("$")[1:])
+
+    @staticmethod
+    def movable(node: AssemblyNode) -> bool:
+        instruction = Inliner.instruction(node)
+        # a labeled line would define its label once for every copy
+        return instruction.startswith(" ") and FRAME_ASSEMBLY.search(instruction) is None
+
+    @staticmethod
+    def returned(definition: FunctionDefinitonNode) -> ExpressionNode | None:
+        """The expression a function whose body is a single return gives back"""
+        statements = definition.body.children
+        if len(statements) != 1 or not isinstance(statements[0], ReturnNode) or statements[0].value is None:
+            return None
+        value = statements[0].value
+        if value.node_type is Double or not Comparator.match(value.node_type, definition.node_type.return_type):
+            return None
+        return value
+
+    @staticmethod
+    def void(definition: FunctionDefinitonNode) -> bool:
+        """Whether the function returns nothing and only at the end of its body"""
+        if definition.node_type.return_type is not Void:
+            return False
+        returns = [node for node in descendants(definition.body) if isinstance(node, ReturnNode)]
+        return not returns or returns == definition.body.children[-1:]
+
+    @staticmethod
+    def pure(node: ASTNode) -> bool:
+        return not any(isinstance(child, (FunctionCallNode, AssemblyExpressionNode)) for child in [node, *descendants(node)])
+
+    @staticmethod
+    def plain(node: ExpressionNode) -> bool:
+        """Cheap to evaluate again, a literal or a variable read"""
+        return isinstance(node, LiteralNode) or (isinstance(node, VariableReferenceNode) and node.index is None
+                                                  and not node.pointer and not node.dereference)
+
+    # inlining
+
+    def expression(self, call: FunctionCallNode, definition: FunctionDefinitonNode) -> ExpressionNode | None:
+        value = self.returned(definition)
+        if value is None or any(argument.node_type.is_reference for argument in definition.arguments):
+            return None
+        if not all(self.pure(argument) for argument in call.arguments):
+            return None
+
+        reads: dict[Symbol, list[VariableReferenceNode]] = {argument.symbol: [] for argument in definition.arguments}
+        for node in [value, *descendants(value)]:
+            if isinstance(node, VariableReferenceNode) and node.symbol in reads:
+                if not self.plain(node):
+                    return None
+                reads[node.symbol].append(node)
+
+        for parameter, argument in zip(definition.arguments, call.arguments):
+            if len(reads[parameter.symbol]) > 1 and not self.plain(argument):
+                return None     # would be computed for every read
+
+        mapping: dict[ASTNode, ASTNode] = {}
+        result = self.clone(value, call.parent, call.scope, {}, mapping)
+
+        for parameter, argument in zip(definition.arguments, call.arguments):
+            for index, read in enumerate(reads[parameter.symbol]):
+                twin = mapping[read]
+                substitute = argument if index == 0 else self.clone(argument, None, call.scope, {}, {})
+                if twin is result:
+                    result = substitute
+                    substitute.set_parent(call.parent)
+                else:
+                    ConstantFolder.replace(twin.parent, twin, substitute)
+                twin.symbol.references.remove(twin)
+        return result
+
+    def statement(self, call: FunctionCallStatementNode, definition: FunctionDefinitonNode) -> StatementNode | None:
+        if not self.void(definition):
+            return None
+        scope: Context = call.scope
+
+        symbols: dict[Symbol, Symbol] = {}
+        for node in descendants(definition.body):
+            if isinstance(node, VariableDeclarationNode):
+                symbols[node.symbol] = None     # named below, with the parameters
+        for parameter in definition.arguments:
+            symbols[parameter.symbol] = None
+
+        # the inline assembly of the body must name the same variables from the caller
+        for node in descendants(definition.body):
+            if isinstance(node, AssemblyNode):
+                for name in PLACEHOLDER.findall(self.instruction(node)):
+                    symbol = node.scope.get_symbol(NameToken(name, node.token.line))
+                    if symbol not in symbols and self.resolve(scope, name, node) is not symbol:
+                        return None
+
+        block = CodeBlockNode(call.token, [], parser=call.parser)
+        block.scope = block.context = scope
+        block.set_parent(call.parent)
+
+        for parameter, argument in zip(definition.arguments, call.arguments):
+            declaration = VariableDeclarationNode(parameter.name_token, argument, parameter.node_type, parser=call.parser)
+            declaration.scope = declaration.context = scope
+            declaration.set_parent(block)
+            argument.set_parent(declaration)
+            declaration.symbol = symbols[parameter.symbol] = self.local(scope, definition, parameter.symbol, declaration)
+            block.children.append(declaration)
+
+        for node in descendants(definition.body):
+            if isinstance(node, VariableDeclarationNode):
+                symbols[node.symbol] = self.local(scope, definition, node.symbol, None)
+
+        statements = definition.body.children
+        if statements and isinstance(statements[-1], ReturnNode):
+            statements = statements[:-1]
+        for node in statements:
+            block.children.append(self.clone(node, block, scope, symbols, {}))
+
+        return block
+
+    def local(self, scope: Context, definition: FunctionDefinitonNode, symbol: Symbol, node: ASTNode | None) -> Symbol:
+        """A variable of the caller standing for a parameter or local of the inlined function"""
+        line = symbol.node.token.line
+        name = f"{definition.name_token.string}_{symbol.name}"
+        number = 1
+        while self.resolve(scope, name, symbol.node) is not None:
+            name = f"{definition.name_token.string}_{symbol.name}{number}"
+            number += 1
+
+        local = Symbol(NameToken(name, line), node=node)
+        local.references = [node] if node is not None else []
+        scope.register_symbol(local)
+        return local
+
+    @staticmethod
+    def resolve(scope: Context, name: str, node: ASTNode) -> Symbol | None:
+        try:
+            return scope.get_symbol(NameToken(name, node.token.line))
+        except NameError:
+            return None
+
+    def clone(self, node: ASTNode, parent: ASTNode | None, scope: Context,
+              symbols: dict[Symbol, Symbol], mapping: dict[ASTNode, ASTNode]) -> ASTNode:
+        """Copy of the subtree in the scope, with its variables renamed by symbols"""
+        twins = self.copy(node, parent, scope, mapping)
+
+        for original, twin in mapping.items():
+            if twin not in twins:
+                continue
+            for name, attribute in vars(twin).items():
+                if name == "parent":
+                    continue
+                if isinstance(attribute, ASTNode) and attribute in mapping:
+                    setattr(twin, name, mapping[attribute])
+                elif isinstance(attribute, list) and any(isinstance(item, ASTNode) for item in attribute):
+                    setattr(twin, name, [mapping.get(item, item) for item in attribute])
+
+            if isinstance(twin, VariableDeclarationNode):
+                local = symbols[original.symbol]
+                local.node = twin
+                local.references.insert(0, twin)
+                twin.symbol = local
+            elif getattr(twin, "symbol", None) is not None:
+                twin.symbol = symbols.get(twin.symbol, twin.symbol)
+                twin.symbol.reference(twin)
+                if isinstance(twin, AssignmentNode):
+                    twin.variable = twin.symbol.node
+
+            if isinstance(twin, AssemblyNode):
+                self.rename(original, twin, symbols)
+
+        return mapping[node]
+
+    def copy(self, node: ASTNode, parent: ASTNode | None, scope: Context, mapping: dict[ASTNode, ASTNode]) -> set[ASTNode]:
+        twin = copy.copy(node)
+        mapping[node] = twin
+        twin.parent = parent
+        twin.scope = twin.context = scope
+        twins = {twin}
+        twin.children = []
+        for child in node.children:
+            twins |= self.copy(child, twin, scope, mapping)
+            twin.children.append(mapping[child])
+        return twins
+
+    @staticmethod
+    def rename(original: AssemblyNode, twin: AssemblyNode, symbols: dict[Symbol, Symbol]) -> None:
+        """Placeholders of the copied line name the renamed variables, which the line now references"""
+        line = copy.copy(original.token.line)
+
+        def replace(match: re.Match) -> str:
+            symbol = original.scope.get_symbol(NameToken(match.group(1), line))
+            symbol = symbols.get(symbol, symbol)
+            symbol.reference(twin)
+            return "{" + symbol.name + "}"
+
+        code, *comment = original.token.line.string.split(";", 1)
+        line.string = ";".join([PLACEHOLDER.sub(replace, code), *comment])
+        twin.token = copy.copy(original.token)
+        twin.token.line = line
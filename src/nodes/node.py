@@ -4,6 +4,7 @@ from .scope import Context, Namespace
 from typing import Type
 from ..config import CompilationConfig
 from ..errors import NadLabemError
+from ..profiler import Profile, timed
 
 #TODO: implement closest_parent( of type) for break and continuenodes to find their relevant parents
 
@@ -73,6 +74,10 @@ class AbstractSyntaxTreeNode(Node):
                 removed = True
         return removed
 
+    def count(self) -> int:
+        """Number of nodes in this subtree"""
+        return 1 + sum(child.count() for child in self.children)
+
     @property
     def is_connected(self) -> bool:
         return self.is_root or self.parent is not None and self.parent.is_connected
@@ -112,9 +117,12 @@ class ProgramNode(AbstractSyntaxTreeNode):
         self.context.root = self.context  #top level context
         self.functions: list[AbstractSyntaxTreeNode] = []
     
-    def validate(self):
-        self.link(parent=None)
-        self.register_children()  # registers and validates tree
-        while self.prune_children():
-            pass
+    def validate(self, profile: "Profile | None" = None):
+        with timed(profile, "validate.link"):
+            self.link(parent=None)
+        with timed(profile, "validate.register"):
+            self.register_children()  # registers and validates tree
+        with timed(profile, "validate.prune"):
+            while self.prune_children():
+                pass
         
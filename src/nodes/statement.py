@@ -119,11 +119,12 @@ class IncrementalNode(StatementNode):
 
 
 class FunctionDefinitonNode(StatementNode):
-    def __init__(self, token: Token, arguments: list[ArgumentDeclarationNode], body: CodeBlockNode, return_type: ExpressionType, parser: "Parser"):
+    def __init__(self, token: Token, arguments: list[ArgumentDeclarationNode], body: CodeBlockNode, return_type: ExpressionType, parser: "Parser", inline: bool = False):
         super().__init__(token, [*arguments, body], parser)
         self.arguments = arguments
         self.body = body
         self.name_token = token
+        self.inline: bool = inline      # hinted to be inlined whatever its size
         self.node_type = FunctionType(return_type, [arg.node_type for arg in arguments])
         self.context = Context(self, parent=self.scope)
         self.return_nodes: list[ReturnNode] = []
@@ -13,6 +13,9 @@ class NoType(NadLabemType):
     def __init__(self, name: int):
         self.name = name
 
+    def __reduce_ex__(self, protocol: int):
+        return primitive_type, (self.name,)
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name})"
     def __str__(self):
@@ -40,6 +43,12 @@ class ValueType(ExpressionType):
     def __init__(self, name: int):
         self.name = name
 
+    def __reduce_ex__(self, protocol: int):
+        # the basic types are singletons compared by identity, unpickle them as such
+        if PRIMITIVE_TYPES.get(getattr(self, "name", None)) is self:
+            return primitive_type, (self.name,)
+        return super().__reduce_ex__(protocol)
+
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name})"
     def __str__(self):
@@ -50,6 +59,13 @@ Bool = ValueType(BoolToken.literal_string)
 Char = ValueType(CharToken.literal_string)
 Double = ValueType(DoubleToken.literal_string)
 
+PRIMITIVE_TYPES: dict[str, NadLabemType] = {
+    primitive.name: primitive for primitive in (Void, Int, Bool, Char, Double)
+}
+
+def primitive_type(name: str) -> NadLabemType:
+    return PRIMITIVE_TYPES[name]
+
 
 class Pointer(ValueType):
     def __init__(self, element_type: ExpressionType):
@@ -0,0 +1,160 @@
+from ..config import CompilationConfig, VERSION
+from ..tokenizer import Token
+from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
+from .parsing import Parser
+from pathlib import Path
+from typing import Callable
+from collections import OrderedDict
+import hashlib, io, os, pickle
+
+
+# the compiler's own sources are part of every key, so editing the tokenizer, parser or nodes
+# can never load trees pickled by an older version of them
+SOURCES: Path = Path(__file__).parent.parent
+_fingerprint: str | None = None
+
+def compiler_fingerprint() -> str:
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256(VERSION.encode())
+        for source in sorted(SOURCES.rglob("*.py")):
+            digest.update(source.read_bytes())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+class ModulePickler(pickle.Pickler):
+    """
+    Pickles the tokens or body of a module without the parser, the config, or the modules it includes.
+    The module's own location is left out too, the same file can be included through different paths.
+    """
+
+    def __init__(self, file: io.BytesIO, location: Path):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.location: Path = location
+
+    def persistent_id(self, obj: object) -> tuple | None:
+        if isinstance(obj, Path) and obj == self.location:
+            return ("location",)
+        if isinstance(obj, CompilationConfig):
+            return ("config",)
+        if isinstance(obj, Parser):
+            return ("parser",)
+        if isinstance(obj, ASTNode) and getattr(obj, "include_path", None) is not None:
+            # nested include, re-run when loading so it links to whatever the program has loaded by then
+            include_path = obj.include_path
+            if include_path.is_relative_to(self.location.parent):
+                include_path = include_path.relative_to(self.location.parent)
+            return ("include", obj.token, include_path, obj.name_token)
+        return None
+
+
+class ModuleUnpickler(pickle.Unpickler):
+
+    def __init__(self, file: io.BytesIO, location: Path, parser: Parser | None = None, 
+                 include: Callable[[Token, Path, Token | None], ASTNode] | None = None):
+        super().__init__(file)
+        self.location: Path = location
+        self.parser: Parser | None = parser
+        self.include: Callable[[Token, Path, Token | None], ASTNode] | None = include
+
+    def persistent_load(self, pid: tuple) -> object:
+        if pid[0] == "location":
+            return self.location
+        if pid[0] == "config":
+            return self.parser.config
+        if pid[0] == "parser":
+            return self.parser
+        if pid[0] == "include":
+            _, token, include_path, name_token = pid
+            return self.include(token, self.location.parent / include_path, name_token)
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
+
+def dump(obj: object, location: Path) -> bytes:
+    buffer = io.BytesIO()
+    ModulePickler(buffer, location).dump(obj)
+    return buffer.getvalue()
+
+
+class CacheEntry:
+
+    def __init__(self, tokens: bytes, body: bytes | None):
+        self.tokens: bytes = tokens
+        self.body: bytes | None = body
+
+    def load_tokens(self, location: Path) -> list[Token]:
+        return ModuleUnpickler(io.BytesIO(self.tokens), location).load()
+
+    def load_body(self, location: Path, parser: Parser, include: Callable[[Token, Path, Token | None], ASTNode]) -> list[ASTNode]:
+        return ModuleUnpickler(io.BytesIO(self.body), location, parser, include).load()
+
+
+class ModuleCache:
+    """
+    On-disk cache of the tokens and parsed statements of included modules.
+
+    Entries are keyed by the module path and source, the compiler version and sources,
+    and the config fields that change what the parser produces.
+    Entries stay in memory too, so a long running process (the compile daemon) reads each one once.
+    Memory holds one entry per module and config, the latest source replaces the older one,
+    and only the most recently used entries are kept.
+    """
+
+    MEMORY_ENTRIES: int = 64
+
+    # module and config -> key of the source the entry was made from, the entry
+    memory: OrderedDict[str, tuple[str, CacheEntry]] = OrderedDict()
+
+    def __init__(self, config: CompilationConfig):
+        self.config: CompilationConfig = config
+        self.directory: Path = Path(config.cache_dir)
+
+    def slot(self, location: Path) -> str:
+        return f"{location.resolve()}\0{self.config.strict}\0{self.config.precedence_climbing}\0"
+
+    def key(self, location: Path, source: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(compiler_fingerprint().encode())
+        digest.update(self.slot(location).encode())
+        digest.update(source.encode("utf8"))
+        return digest.hexdigest()
+
+    def remember(self, location: Path, key: str, entry: CacheEntry) -> None:
+        slot = self.slot(location)
+        ModuleCache.memory[slot] = (key, entry)
+        ModuleCache.memory.move_to_end(slot)
+        while len(ModuleCache.memory) > ModuleCache.MEMORY_ENTRIES:
+            ModuleCache.memory.popitem(last=False)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def load(self, location: Path, source: str) -> CacheEntry | None:
+        key = self.key(location, source)
+        remembered = ModuleCache.memory.get(self.slot(location))
+        if remembered is not None and remembered[0] == key:
+            ModuleCache.memory.move_to_end(self.slot(location))
+            return remembered[1]
+        try:
+            with self.path(key).open("rb") as file:
+                tokens, body = pickle.load(file)
+        except (OSError, pickle.PickleError, EOFError, ValueError):
+            return None     # missing or unreadable entries are just a miss
+        entry = CacheEntry(tokens, body)
+        self.remember(location, key, entry)
+        return entry
+
+    def store(self, location: Path, source: str, tokens: list[Token], body: list[ASTNode] | None) -> None:
+        token_bytes = dump(tokens, location)
+        body_bytes = dump(body, location) if body is not None else None
+
+        key = self.key(location, source)
+        self.remember(location, key, CacheEntry(token_bytes, body_bytes))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(key)
+        temporary = target.with_suffix(f".{os.getpid()}.tmp")
+        with temporary.open("wb") as file:
+            pickle.dump((token_bytes, body_bytes), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, target)     # concurrent compiles never see half written entries
@@ -1,9 +1,10 @@
-from .parsing import Parser
+from .parsing import Parser, dispatch_table
 from ..tokenizer import (Token, ComparisonToken, LogicalToken, AdditiveToken, MultiplicativeToken, StringLiteralToken, DoubleColonToken,
                         UnaryToken, LiteralToken, NameToken, OpenParenToken, CloseParenToken, DollarToken, AtToken, PlusToken,
-                        ArrayBeginToken, ArrayEndToken, CommaToken, NewLineToken, BinaryToken, TypeToken, StarToken, AsToken)
-from typing import Type
-from ..nodes.expression import (ExpressionNode, ComparisonNode, AdditiveNode, MultiplicativeNode, CastNode,
+                        ArrayBeginToken, ArrayEndToken, CommaToken, NewLineToken, BinaryToken, TypeToken, StarToken, AsToken,
+                        CastOperatorToken, ReferenceToken)
+from typing import Type, Callable
+from ..nodes.expression import (ExpressionNode, BinaryOperationNode, ComparisonNode, AdditiveNode, MultiplicativeNode, CastNode,
                                 VariableReferenceNode, LogicalNode, BinaryNode, UnaryOperationNode, StringReferenceNode,
                                 LiteralNode, FunctionCallNode, ArrayLiteralNode, AssemblyExpressionNode)
 from .types import TypeParser
@@ -37,8 +38,27 @@ class ExpressionParser(Parser):
             return self.expression()
     
     def expression(self) -> ExpressionNode:
+        if self.config.precedence_climbing:
+            return self.climb(LOWEST_PRECEDENCE)
         return self.logical()
 
+    def climb(self, min_precedence: int) -> ExpressionNode:
+        # precedence climbing over BINARY_OPERATORS, builds the same left associative trees
+        # as the logical -> comparison -> binary -> additive -> multiplicative descent below
+        left = self.unary()
+
+        while True:
+            token = self.look_ahead()
+            operator_entry = BINARY_OPERATORS.get(token.kind) if token is not None else None
+
+            if operator_entry is None or operator_entry[0] < min_precedence:
+                return left
+
+            precedence, node_class = operator_entry
+            operator = self.devour(token.__class__)
+            right = self.climb(precedence + 1)
+            left = node_class(operator, left, right, parser=self)
+
     def logical(self) -> ExpressionNode:
         left = self.comparison()
         
@@ -97,9 +117,9 @@ class ExpressionParser(Parser):
         
         result = self.primary()
 
-        while self.is_ahead(Token.any(DoubleColonToken, AsToken)):
+        while self.is_ahead(CastOperatorToken):
             signed: bool = False
-            token = self.devour(Token.any(DoubleColonToken, AsToken))
+            token = self.devour(CastOperatorToken)
             
             if self.is_ahead(PlusToken):
                 self.devour(PlusToken)
@@ -112,79 +132,101 @@ class ExpressionParser(Parser):
         return result
     
     def primary(self) -> ExpressionNode:
+        token = self.look_ahead()
+        handler = PRIMARY_DISPATCH.get(token.kind) if token is not None else None
 
-        if self.is_ahead(DollarToken):
-            token = self.devour(DollarToken)
-            if self.is_ahead(NameToken):
-                name_str = self.devour(NameToken).string
-            elif self.is_ahead(StringLiteralToken):
-                name_str = self.devour(StringLiteralToken).value
-            else:
-                raise SyntaxError(f"Invalid assembly expression: {self.look_ahead()}", self.look_ahead().line, suggestion="Put the assembly expression in string quotes?")
+        if handler is None:
+            raise SyntaxError(f"Unexpected end of expression: {token}", token.line if token is not None else self.root.last_token.line)
 
-            return AssemblyExpressionNode(token, name_str, parser=self)
+        return handler(self)
 
-        if self.is_ahead(LiteralToken):
-            return LiteralNode(self.devour(LiteralToken), parser=self)
-        
-        elif self.is_ahead(Token.any(NameToken, StarToken, AtToken)):
+    def assembly_expression(self) -> ExpressionNode:
+        token = self.devour(DollarToken)
+        if self.is_ahead(NameToken):
+            name_str = self.devour(NameToken).string
+        elif self.is_ahead(StringLiteralToken):
+            name_str = self.devour(StringLiteralToken).value
+        else:
+            raise SyntaxError(f"Invalid assembly expression: {self.look_ahead()}", self.look_ahead().line, suggestion="Put the assembly expression in string quotes?")
 
-            pointer: bool = False
-            dereference: bool = False
+        return AssemblyExpressionNode(token, name_str, parser=self)
 
-            if self.is_ahead(StarToken):
-                token = self.devour(StarToken)
-                
-                if self.is_ahead(StringLiteralToken):
-                    str_token = self.devour(StringLiteralToken)
-                    return StringReferenceNode(token, str_token, parser=self)
+    def literal(self) -> ExpressionNode:
+        return LiteralNode(self.devour(LiteralToken), parser=self)
 
-                pointer = True
+    def reference(self) -> ExpressionNode:
+        pointer: bool = False
+        dereference: bool = False
 
-            elif self.is_ahead(AtToken):
-                token = self.devour(AtToken)
-                dereference = True
+        if self.is_ahead(StarToken):
+            token = self.devour(StarToken)
+            
+            if self.is_ahead(StringLiteralToken):
+                str_token = self.devour(StringLiteralToken)
+                return StringReferenceNode(token, str_token, parser=self)
 
-            name_token = self.devour(NameToken)
+            pointer = True
 
-            if self.is_ahead(OpenParenToken):
-                # function call
-                self.devour(OpenParenToken)
-                arguments = []
+        elif self.is_ahead(AtToken):
+            token = self.devour(AtToken)
+            dereference = True
 
-                if pointer or dereference:
-                    raise SyntaxError("Cannot use pointer or dereference with function calls", name_token.line)
-                
-                if not self.is_ahead(CloseParenToken):
-                    arguments.append(self.expression())
-                    while self.is_ahead(CommaToken):
-                        self.devour(CommaToken)  # consume ','
-                        arguments.append(self.expression())
+        name_token = self.devour(NameToken)
+
+        if self.is_ahead(OpenParenToken):
+            # function call
+            self.devour(OpenParenToken)
+            arguments = []
 
-                self.devour(CloseParenToken)
+            if pointer or dereference:
+                raise SyntaxError("Cannot use pointer or dereference with function calls", name_token.line)
+            
+            if not self.is_ahead(CloseParenToken):
+                arguments.append(self.expression())
+                while self.is_ahead(CommaToken):
+                    self.devour(CommaToken)  # consume ','
+                    arguments.append(self.expression())
 
-                return FunctionCallNode(name_token, arguments, parser=self)
+            self.devour(CloseParenToken)
 
-            # if, not while, we only allow one dimensional arrays
-            if self.is_ahead(ArrayBeginToken):
-                #index retrieval
-                token = self.devour(ArrayBeginToken)
+            return FunctionCallNode(name_token, arguments, parser=self)
 
-                index = self.expression()
+        # if, not while, we only allow one dimensional arrays
+        if self.is_ahead(ArrayBeginToken):
+            #index retrieval
+            token = self.devour(ArrayBeginToken)
 
-                self.devour(ArrayEndToken)
+            index = self.expression()
 
-                return VariableReferenceNode(name_token, pointer, dereference, index, parser=self)
-            
-            return VariableReferenceNode(name_token, pointer, dereference, index=None, parser=self)
+            self.devour(ArrayEndToken)
 
+            return VariableReferenceNode(name_token, pointer, dereference, index, parser=self)
         
-        elif self.is_ahead(OpenParenToken):
-            self.devour(OpenParenToken)  # consume '('
-            expr = self.expression()
+        return VariableReferenceNode(name_token, pointer, dereference, index=None, parser=self)
 
-            self.devour(CloseParenToken)
-            
-            return expr
+    def parenthesized(self) -> ExpressionNode:
+        self.devour(OpenParenToken)  # consume '('
+        expr = self.expression()
+
+        self.devour(CloseParenToken)
         
-        raise SyntaxError(f"Unexpected end of expression: {self.look_ahead()}", self.look_ahead().line)
+        return expr
+
+
+# kind of an infix operator token -> (precedence, node class), higher binds tighter
+BINARY_OPERATORS: dict[int, tuple[int, Type[BinaryOperationNode]]] = dispatch_table({
+    LogicalToken: (1, LogicalNode),
+    ComparisonToken: (2, ComparisonNode),
+    BinaryToken: (3, BinaryNode),
+    AdditiveToken: (4, AdditiveNode),
+    MultiplicativeToken: (5, MultiplicativeNode),
+})
+LOWEST_PRECEDENCE: int = 1
+
+# kind of the look-ahead token -> primary expression parsing method
+PRIMARY_DISPATCH: dict[int, Callable[[ExpressionParser], ExpressionNode]] = dispatch_table({
+    DollarToken: ExpressionParser.assembly_expression,
+    LiteralToken: ExpressionParser.literal,
+    ReferenceToken: ExpressionParser.reference,
+    OpenParenToken: ExpressionParser.parenthesized,
+})
@@ -1,10 +1,21 @@
 from ..tokenizer import Token, Line, NewLineToken, CommaToken, NameToken, NumberToken
 from ..errors import SyntaxError
 from ..tree import Node
-from typing import Type
+from typing import Type, TypeVar
 from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
 from pathlib import Path
 
+T = TypeVar("T")
+
+
+def dispatch_table(entries: dict[Type[Token], T]) -> dict[int, T]:
+    """Maps the kind of every concrete token class in entries (combined classes expanded) to its entry, earlier entries win"""
+    table: dict[int, T] = {}
+    for token_type, entry in entries.items():
+        for component in token_type.components():
+            table.setdefault(component.kind, entry)
+    return table
+
 
 class Parser(Node):
 
@@ -25,7 +36,7 @@ class Parser(Node):
 
     @property
     def current_location(self) -> Path:
-        return self.root.tokens[self.root.i].line.location
+        return self.root.current_token.line.location
 
     @property
     def is_done(self) -> bool:
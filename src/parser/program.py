@@ -1,6 +1,5 @@
-from ..tokenizer import Token, NewLineToken, OpenParenToken, CloseParenToken, ArrayBeginToken, ArrayEndToken, StringLiteralToken
+from ..tokenizer import Token, NewLineToken, OpenNestingToken, CloseNestingToken, StringLiteralToken
 from ..errors import SyntaxError, NadLabemError
-from ..ui import progress_bar
 from typing import Type
 from ..config import CompilationConfig
 from .parsing import Parser
@@ -8,14 +7,23 @@ from .statement import CodeBlockParser
 from ..nodes.node import ProgramNode
 from .suggestions import find_suggestion
 from .dependency import Dependency
+from .cache import ModuleCache
 from pathlib import Path
 from ..tokenizer import Tokenizer
 
 class ProgramParser(Parser):
 
     def __init__(self, tokens: list[Token], config: CompilationConfig):
-        self.tokens = tokens
+        # the stream being read is (self.tokens, self.i, self.end),
+        # included files are pushed as new streams instead of being spliced into the list
+        self.tokens: list[Token] = tokens
         self.i: int = 0
+        self.end: int = len(tokens)
+        self.streams: list[tuple[list[Token], int, int]] = []   # suspended streams, the top one is read next
+        self.last_token: Token | None = None
+        self.consumed: int = 0
+        self.total: int = len(tokens)
+
         self.root = self  # this is the top level parser
         self.parent = None
         self.nested: int = 0
@@ -25,60 +33,92 @@ class ProgramParser(Parser):
         self.dependencies: dict[Path, Dependency] = {
             self.config.location: Dependency(self.config.location, parent=None)
         }
+        self.cache: ModuleCache | None = ModuleCache(config) if config.cache_dir is not None else None
+        self.direct_includes: list[Path] = []     # files included with 'not as module', they are not dependencies
+        self.contents: dict[Path, str] = {}       # text of every included file as it was read
 
     def parse(self) -> ProgramNode:
         program_block = CodeBlockParser(parent=self, force_multiline=True).parse()
         return ProgramNode(program_block.children, parser=self)
 
+    def _advance(self) -> None:
+        self.last_token = self.tokens[self.i]
+        self.i += 1
+        self.consumed += 1
+        if self.i >= self.end:
+            self._resume()
+
+    def _resume(self) -> None:
+        # continue with the next suspended stream once the current one is exhausted
+        while self.i >= self.end and self.streams:
+            self.tokens, self.i, self.end = self.streams.pop()
+
     def devour(self, token_type: Type[Token], parser: Parser | None, skip_newline: bool = False) -> Token:
         if self.is_done:
-            raise SyntaxError(f"Unexpected end of input, expected {token_type.__name__} but got nothing", line=self.tokens[self.i - 1].line, parser=parser)
+            raise SyntaxError(f"Unexpected end of input, expected {token_type.__name__} but got nothing", line=self.last_token.line, parser=parser)
 
         skip_newline = skip_newline or self.nested > 0
 
         while skip_newline and NewLineToken.match(self.tokens[self.i]):
-            self.i += 1
+            self._advance()
             if self.is_done:
-                raise SyntaxError(f"Unexpected end of multiline input, expected {token_type.__name__} but got nothing", line=self.tokens[self.i - 1].line, parser=parser)
+                raise SyntaxError(f"Unexpected end of multiline input, expected {token_type.__name__} but got nothing", line=self.last_token.line, parser=parser)
 
         token = self.tokens[self.i]
         token.parsed_by = parser
 
-        if Token.any(OpenParenToken, ArrayBeginToken).match(token):
+        if OpenNestingToken.match(token):
             self.nested += 1
-        elif Token.any(CloseParenToken, ArrayEndToken).match(token):
+        elif CloseNestingToken.match(token):
             self.nested -= 1
 
-        if token_type.match(self.tokens[self.i]):
-            self.i += 1
+        if token_type.match(token):
+            self._advance()
 
-            if self.config.verbose:
-                progress_bar("Parsing", self.i, len(self.tokens))
+            if self.config.progress.enabled:
+                self.config.progress.report("Parsing", self.consumed, self.total)
 
             return token
             
         else:
-            raise SyntaxError(f"Expected {token_type.__name__}, but got {self.tokens[self.i]} instead", line=self.tokens[self.i].line, parser=parser, suggestion=find_suggestion(token_type, self.tokens[self.i], parser))
+            raise SyntaxError(f"Expected {token_type.__name__}, but got {token} instead", line=token.line, parser=parser, suggestion=find_suggestion(token_type, token, parser))
 
     def look_ahead(self, skip_newline: bool = False) -> Token:
 
         skip_newline = skip_newline or self.nested > 0
 
-        if self.is_done:
-            return None
+        tokens, i, end = self.tokens, self.i, self.end
+        depth = len(self.streams)
 
-        i = self.i
-        while skip_newline and NewLineToken.match(self.tokens[i]):
-            i += 1
-            if i >= len(self.tokens):
+        # peek through the current stream and on into the suspended ones without consuming anything
+        while True:
+            while i < end:
+                token = tokens[i]
+                if not (skip_newline and NewLineToken.match(token)):
+                    return token
+                i += 1
+
+            depth -= 1
+            if depth < 0:
                 return None
+            tokens, i, end = self.streams[depth]
 
-        return self.tokens[i]
+    @property
+    def current_token(self) -> Token | None:
+        return None if self.is_done else self.tokens[self.i]
 
     @property
     def is_done(self) -> bool:
-        return self.i >= len(self.tokens)
+        return self.i >= self.end
 
     def inject(self, tokens: list[Token], next_line: bool) -> None:
-        offset = 1 if next_line else 0
-        self.tokens = self.tokens[:(self.i + offset)] + tokens + self.tokens[(self.i + offset):]
\ No newline at end of file
+        # read tokens right after the current one (next_line) or in its place, without copying any list
+        split = min(self.i + (1 if next_line else 0), self.end)
+
+        if split < self.end:
+            self.streams.append((self.tokens, split, self.end))
+        self.streams.append((tokens, 0, len(tokens)))
+        self.end = split
+        self.total += len(tokens)
+
+        self._resume()
@@ -1,9 +1,10 @@
-from .parsing import Parser
+from .parsing import Parser, dispatch_table
 from ..tokenizer import (Token, NameToken, OpenParenToken, CloseParenToken, TypeToken, IfToken, ForToken, ElseToken,
                          StringLiteralToken, IncludeToken, ModuleToken, AsToken, LogicalNotToken,
-                        OpenBraceToken, CloseBraceToken, WhileToken, EqualsToken, AtToken, DefinitionToken, DoToken,
+                        OpenBraceToken, CloseBraceToken, WhileToken, EqualsToken, AtToken, DefinitionToken, InlineToken, DoToken,
                         ColonToken, DollarToken, AtEqualsToken, ArrayBeginToken, ArrayEndToken, IncrementalToken,
-                        BreakToken, ContinueToken, PassToken, CommaToken, NewLineToken, ArrowToken, ReturnToken)
+                        BreakToken, ContinueToken, PassToken, CommaToken, NewLineToken, ArrowToken, ReturnToken,
+                        AssignmentTargetToken)
 from typing import Type
 from .expression import ExpressionParser
 from ..nodes.statement import (FunctionCallStatementNode, ASTNode, IfNode, StatementNode, ArgumentDeclarationNode,
@@ -11,6 +12,7 @@ from ..nodes.statement import (FunctionCallStatementNode, ASTNode, IfNode, State
                     WhileNode, AssignmentNode, VariableDeclarationNode, FunctionDefinitonNode, IncrementalNode, ModuleNode)
 from pathlib import Path
 from .dependency import Dependency
+from .cache import CacheEntry
 from .types import TypeParser
 from ..errors import SyntaxError, NadLabemError, NameError
 from ..tokenizer import Tokenizer
@@ -149,7 +151,7 @@ class AssignmentParser(Parser):
         if self.is_ahead(OpenParenToken):       # f(...)
             return self.parse_function_call(name_token)
         
-        elif self.is_ahead(Token.any(ArrayBeginToken, EqualsToken, AtEqualsToken)): # f =, f =@=, f[i] =, f[x] =@= 
+        elif self.is_ahead(AssignmentTargetToken): # f =, f =@=, f[i] =, f[x] =@= 
             return self.parse_assignment(name_token)
         
         elif self.is_ahead(ColonToken):         # f: int = , f: @bool =@=
@@ -212,6 +214,9 @@ class FunctionDefinitionParser(Parser):
         return ArgumentDeclarationNode(name_token, val_type, parser=self)
 
     def parse(self) -> FunctionDefinitonNode:
+        inline: bool = self.is_ahead(InlineToken)
+        if inline:
+            self.devour(InlineToken)
         self.devour(DefinitionToken)
         fn_name_token: NameToken = self.devour(NameToken)
 
@@ -233,7 +238,7 @@ class FunctionDefinitionParser(Parser):
         return_type = TypeParser(parent=self).return_type()
 
         body = CodeBlockParser(parent=self).parse()
-        return FunctionDefinitonNode(fn_name_token, params, body, return_type, parser=self)
+        return FunctionDefinitonNode(fn_name_token, params, body, return_type, parser=self, inline=inline)
 
 
 class ReturnParser(Parser):
@@ -299,9 +304,12 @@ class IncludeParser(Parser):
             if module_path in self.root.dependencies:
                 raise NadLabemError(f"Cannot directly include modularly loaded code from file {module_path}", token.line)
 
-            tokens = Tokenizer(config=self.config, location=module_path).tokenize(
-                source_code=module_path.read_text()
-            )
+            source = self.root.contents[module_path] = module_path.read_text(encoding="utf8")
+            tokens, entry = self.load(module_path, source)
+            if tokens is None:
+                # parsed as a module by another program, the tokens are cached with its body
+                tokens = entry.load_tokens(module_path)
+            self.root.direct_includes.append(module_path)
 
             self.root.inject(tokens, next_line=True)
             return PassNode(token, parser=self)
@@ -312,32 +320,64 @@ class IncludeParser(Parser):
             self.devour(AsToken)
             module_name = self.devour(NameToken)
 
+        return self.include_module(token, module_path, module_name, current_dependency)
+
+    def load(self, module_path: Path, source: str) -> tuple[list[Token] | None, CacheEntry | None]:
+        """Tokens of the module (None if its parsed body is cached) and its cache entry if there is one"""
+        entry: CacheEntry | None = self.root.cache.load(module_path, source) if self.root.cache is not None else None
+
+        if entry is None:
+            return Tokenizer(config=self.config, location=module_path).tokenize(source_code=source), None
+        if entry.body is not None:
+            return None, entry
+        return entry.load_tokens(module_path), entry
+
+    def include_module(self, token: Token, module_path: Path, module_name: NameToken | None, current_dependency: Dependency) -> StatementNode:
+
+        if current_dependency.is_upstream(module_path):
+            raise NadLabemError(f"Circular include of module {module_path} detected", token.line, suggestion="Keep tree structure when imporing")
+
         if module_path in self.root.dependencies:
             dependency: Dependency = self.root.dependencies[module_path]
-            return IncludeNode(token, module_name, dependency.module.context, parser=self)
+            include_node = IncludeNode(token, module_name, dependency.module.context, parser=self)
+            include_node.include_path = module_path
+            return include_node
         
         dependency = Dependency(location=module_path, parent=current_dependency)
         self.root.dependencies[module_path] = dependency
 
-        tokens = [
-            OpenBraceToken("<virtual>", token.line),
-            NewLineToken("<virtual>", token.line)
-        ] + Tokenizer(config=self.config, location=module_path).tokenize(
-            source_code=module_path.read_text(encoding="utf8")
-        ) + [
-            CloseBraceToken("<virtual>", token.line),
-            NewLineToken("<virtual>", token.line)
-        ]
+        source = self.root.contents[module_path] = module_path.read_text(encoding="utf8")
+        tokens, entry = self.load(module_path, source)
+
+        if tokens is None:
+            # parsed before, nested includes are re-run against this program while unpickling
+            body = entry.load_body(module_path, parser=self, include=lambda nested_token, nested_path, nested_name: 
+                                   self.include_module(nested_token, nested_path, nested_name, dependency))
+            module_node = ModuleNode(token, module_name, body, parser=self)
 
-        if module_name is not None:
-            tokens.insert(0, module_name)
+        else:
+            # read the module in place of the current token, the rest of the include line follows it
+            module_tokens = [
+                OpenBraceToken("<virtual>", token.line),
+                NewLineToken("<virtual>", token.line),
+                *tokens,
+                CloseBraceToken("<virtual>", token.line)
+            ]
 
-        self.root.inject(tokens, next_line=True)
+            if module_name is not None:
+                module_tokens.insert(0, module_name)
 
-        self.devour(NewLineToken)
-        
-        module_node = ModuleParser(parent=self, started=token).parse()
+            self.root.inject(module_tokens, next_line=False)
+
+            direct_includes = len(self.root.direct_includes)
+            module_node = ModuleParser(parent=self, started=token).parse()
+
+            if self.root.cache is not None:
+                # code included directly gets parsed as part of this module, only its tokens are reusable then
+                body = module_node.children if len(self.root.direct_includes) == direct_includes else None
+                self.root.cache.store(module_path, source, tokens, body)
 
+        module_node.include_path = module_path
         dependency.module = module_node
 
         return module_node
@@ -356,28 +396,33 @@ STATEMENTS: dict[Type[Token], Type[Parser]] = {
     PassToken: PassParser,
     DollarToken: AssemblyParser,
     DefinitionToken: FunctionDefinitionParser,
+    InlineToken: FunctionDefinitionParser,
     IncrementalToken: IncrementalParser,
     IncludeToken: IncludeParser,
     ModuleToken: ModuleParser
 }
 
+# kind of the look-ahead token -> statement parser, combined token classes (IncrementalToken) expanded
+# matching is a mask of kind bits, so every token a STATEMENTS class matches has its kind in the table
+STATEMENT_DISPATCH: dict[int, Type[Parser]] = dispatch_table(STATEMENTS)
+
 class StatementParser(Parser):
 
+    def select_parser(self, token: Token) -> Type[Parser] | None:
+        return STATEMENT_DISPATCH.get(token.kind)
+
     def parse(self) -> StatementNode:
         if self.is_done:
-            raise SyntaxError("Unexpected end of input, expected a statement after the statement", self.root.tokens[-1].line)
+            raise SyntaxError("Unexpected end of input, expected a statement after the statement", self.root.last_token.line)
         
         if self.is_ahead(NewLineToken):
             self.devour(NewLineToken)
 
-        if not self.is_ahead(Token.any(*STATEMENTS.keys())):
-            actual = self.look_ahead()
-            raise SyntaxError(f"Expected a statement, but found {actual} instead", actual.line)
-        
-        parser_class: Type[Parser] = None
-        for token_class, parser_class in STATEMENTS.items():
-            if self.is_ahead(token_class):
-                break
+        actual = self.look_ahead()
+        parser_class: Type[Parser] | None = self.select_parser(actual) if actual is not None else None
+
+        if parser_class is None:
+            raise SyntaxError(f"Expected a statement, but found {actual} instead", actual.line if actual is not None else self.root.last_token.line)
         
         parser = parser_class(parent=self)
         return parser.parse()
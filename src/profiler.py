@@ -0,0 +1,58 @@
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator
+import json, time, tracemalloc
+
+
+class Profile:
+    """
+    Wall time of the compile phases and counts of what they produced.
+    Phase names nest with dots, "validate" covers "validate.link" and the other validate phases.
+    While tracemalloc is tracing, the peak of traced memory during each phase is recorded too.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+        self.peaks: dict[str, int] = {}
+        self.open_peaks: list[int] = []     # peaks of the enclosing phases, reset_peak is global
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            if self.open_peaks:
+                self.open_peaks[-1] = max(self.open_peaks[-1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.open_peaks.append(0)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+            if tracing:
+                peak = max(self.open_peaks.pop(), tracemalloc.get_traced_memory()[1])
+                self.peaks[name] = max(self.peaks.get(name, 0), peak)
+                if self.open_peaks:
+                    self.open_peaks[-1] = max(self.open_peaks[-1], peak)
+                tracemalloc.reset_peak()
+
+    def count(self, name: str, amount: int) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict:
+        return {
+            "phases": {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            "total": round(sum(seconds for name, seconds in self.phases.items() if "." not in name), 6),
+            "counters": dict(self.counters),
+            **({"peak_memory": dict(self.peaks)} if self.peaks else {})
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=4)
+
+
+def timed(profile: Profile | None, name: str) -> ContextManager[None]:
+    """Phase of the profile, if there is one to record into"""
+    return profile.phase(name) if profile is not None else nullcontext()
@@ -0,0 +1,111 @@
+from ..nodes.node import AbstractSyntaxTreeNode as ASTNode
+from ..nodes.statement import FunctionDefinitonNode
+from .program import Program
+from .timing import Cost, cost
+from .machine import SimulationResult
+import json
+
+
+PROGRAM_ID: str = "..start"     # the main program, from the entry point to the exit label
+
+
+class FunctionCost:
+
+    def __init__(self, symbol_id: str, name: str, location: str, start: int, end: int):
+        self.symbol_id: str = symbol_id
+        self.name: str = name
+        self.location: str = location
+        self.start: int = start         # instruction indices of the emitted code
+        self.end: int = end
+        self.instructions: int = 0      # instructions of its own, without nested functions
+        self.cycles: int = 0            # one pass through every instruction, branches not taken
+        self.size: int = 0
+        self.calls: int | None = None   # None until a simulation is recorded
+        self.executed: int | None = None
+        self.executed_cycles: int | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "location": self.location,
+            "static": {"instructions": self.instructions, "cycles": self.cycles, "bytes": self.size},
+            **({"dynamic": {"calls": self.calls, "instructions": self.executed, "cycles": self.executed_cycles}}
+               if self.calls is not None else {})
+        }
+
+
+def function_nodes(node: ASTNode) -> list[FunctionDefinitonNode]:
+    """Translated function definitions of the tree, pruned ones have no code"""
+    found = [node] if isinstance(node, FunctionDefinitonNode) and getattr(node, "translator", None) is not None else []
+    for child in node.children:
+        found.extend(function_nodes(child))
+    return found
+
+
+class CostReport:
+    """
+    8086 clock and size estimates of every emitted function, keyed by the symbol id of its FunctionDefinitonNode
+    (the label it is called by). Costs are exclusive: a function nested in a module or another function is not
+    counted in the enclosing code. A recorded simulation adds how often each function ran and what it took.
+    """
+
+    def __init__(self, code: str, tree: ASTNode):
+        self.program: Program = Program.parse(code)
+        self.costs: list[Cost] = [cost(instruction) for instruction in self.program.instructions]
+        self.functions: dict[str, FunctionCost] = {}
+
+        labels = self.program.code_labels
+        if PROGRAM_ID in labels:
+            end = labels.get("exit", len(self.program.instructions))
+            self.functions[PROGRAM_ID] = FunctionCost(PROGRAM_ID, "<program>", "", labels[PROGRAM_ID], end)
+        for node in function_nodes(tree):
+            translator = node.translator
+            line = node.token.line
+            self.functions[translator.fn_label] = FunctionCost(translator.fn_label, node.name_token.string,
+                f"{line.location}:{line.number}", labels[translator.fn_label], labels[translator.over_label])
+
+        # each instruction belongs to the innermost function around it
+        self.owners: list[FunctionCost | None] = [None] * len(self.program.instructions)
+        for function in sorted(self.functions.values(), key=lambda function: function.start - function.end):
+            for index in range(function.start, function.end):
+                self.owners[index] = function
+
+        for index, owner in enumerate(self.owners):
+            if owner is not None:
+                owner.instructions += 1
+                owner.cycles += self.costs[index].cycles
+                owner.size += self.costs[index].size
+
+    def record(self, result: SimulationResult) -> None:
+        """Add the counts of simulating this same code"""
+        for function in self.functions.values():
+            function.calls = result.counts[function.start] if function.start < len(result.counts) else 0
+            function.executed = function.executed_cycles = 0
+        for index, owner in enumerate(self.owners):
+            if owner is not None:
+                owner.executed += result.counts[index]
+                owner.executed_cycles += self.executed_cycles(result, index)
+
+    def executed_cycles(self, result: SimulationResult, index: int) -> int:
+        cost = self.costs[index]
+        return result.counts[index] * cost.cycles + result.taken[index] * cost.taken + result.repeats[index] * cost.repeat
+
+    def total_cycles(self, result: SimulationResult) -> int:
+        return sum(self.executed_cycles(result, index) for index in range(len(self.costs)))
+
+    def annotate(self, lines: list[str]) -> list[str]:
+        """Assembly lines with a comment of the static estimate above each function label"""
+        annotated: list[str] = []
+        for line in lines:
+            label = line.rstrip("\n")[:-1] if line.rstrip("\n").endswith(":") else None
+            if label in self.functions and label != PROGRAM_ID:
+                function = self.functions[label]
+                annotated.append(f"; {function.name}: {function.cycles} cycles, {function.size} bytes, {function.instructions} instructions (static estimate)")
+            annotated.append(line)
+        return annotated
+
+    def as_dict(self) -> dict:
+        return {symbol_id: function.as_dict() for symbol_id, function in self.functions.items()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=4)
@@ -0,0 +1,91 @@
+from ..errors import SimulationError
+from datetime import datetime
+from typing import Callable
+
+
+class Dos:
+    """
+    The int 0x21 services the std library uses, with byte strings for standard input and output.
+    Reading past the end of the input behaves like the course emulator: AL=0 and ZF=1.
+    """
+
+    def __init__(self, stdin: bytes = b"", clock: Callable[[], datetime] = datetime.now):
+        self.stdin: bytes = stdin
+        self.position: int = 0
+        self.stdout: bytearray = bytearray()
+        self.clock: Callable[[], datetime] = clock
+        self.exit_code: int | None = None
+        self.services: dict[int, Callable[["Machine"], None]] = {
+            0x01: self.read_char,
+            0x02: self.write_char,
+            0x09: self.write_string,
+            0x0a: self.read_line,
+            0x0b: self.input_status,
+            0x2a: self.date,
+            0x2c: self.time,
+            0x4c: self.terminate,
+        }
+
+    def interrupt(self, machine: "Machine", number: int) -> None:
+        if number == 0x20:
+            return self.terminate(machine, code=0)
+        if number != 0x21:
+            raise SimulationError(f"Interrupt {number:#04x} is not simulated", machine.current.text)
+
+        service = machine.get_byte_register("ah")
+        if service not in self.services:
+            raise SimulationError(f"DOS service ah={service:#04x} is not simulated", machine.current.text)
+        self.services[service](machine)
+
+    def read_char(self, machine: "Machine") -> None:
+        if self.position < len(self.stdin):
+            machine.set_byte_register("al", self.stdin[self.position])
+            self.position += 1
+            machine.zf = False
+        else:
+            machine.set_byte_register("al", 0)
+            machine.zf = True
+
+    def write_char(self, machine: "Machine") -> None:
+        self.stdout.append(machine.get_byte_register("dl"))
+
+    def write_string(self, machine: "Machine") -> None:
+        address = machine.registers[2]     # dx
+        while True:
+            character = machine.memory[address]
+            if character == ord("$"):
+                break
+            self.stdout.append(character)
+            address = (address + 1) & 0xffff
+
+    def read_line(self, machine: "Machine") -> None:
+        buffer = machine.registers[2]       # dx: maximum length, read length, then the characters and CR
+        maximum = machine.memory[buffer]
+        end = self.stdin.find(b"\n", self.position)
+        line = self.stdin[self.position:end if end != -1 else len(self.stdin)].rstrip(b"\r")
+        self.position = end + 1 if end != -1 else len(self.stdin)
+        line = line[:max(maximum - 1, 0)]
+        machine.memory[(buffer + 1) & 0xffff] = len(line)
+        for i, character in enumerate(line + b"\r"):
+            machine.memory[(buffer + 2 + i) & 0xffff] = character
+
+    def input_status(self, machine: "Machine") -> None:
+        machine.set_byte_register("al", 0xff if self.position < len(self.stdin) else 0)
+
+    def date(self, machine: "Machine") -> None:
+        now = self.clock()
+        machine.registers[1] = now.year     # cx
+        machine.set_byte_register("dh", now.month)
+        machine.set_byte_register("dl", now.day)
+        machine.set_byte_register("al", (now.weekday() + 1) % 7)    # sunday is 0
+
+    def time(self, machine: "Machine") -> None:
+        now = self.clock()
+        machine.set_byte_register("ch", now.hour)
+        machine.set_byte_register("cl", now.minute)
+        machine.set_byte_register("dh", now.second)
+        machine.set_byte_register("dl", now.microsecond // 10000)
+
+    def terminate(self, machine: "Machine", code: int | None = None) -> None:
+        self.exit_code = machine.get_byte_register("al") if code is None else code
+        machine.stop("exit")
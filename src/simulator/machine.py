@@ -0,0 +1,633 @@
+from ..errors import SimulationError
+from ..translator import Assembly
+from .program import Program, Instruction, Operand, RegisterOperand, SegmentOperand, ImmediateOperand, MemoryOperand, REGISTERS
+from .dos import Dos
+from datetime import datetime
+from typing import Callable
+
+
+PARITY: list[bool] = [bin(value).count("1") % 2 == 0 for value in range(256)]
+
+# flag -> bit in the flags register, for pushf and popf
+FLAG_BITS: dict[str, int] = {"cf": 0, "pf": 2, "zf": 6, "sf": 7, "df": 10, "of": 11}
+
+CONDITIONS: dict[str, Callable[["Machine"], bool]] = {
+    "jo": lambda m: m.of,                   "jno": lambda m: not m.of,
+    "jb": lambda m: m.cf,                   "jnae": lambda m: m.cf,             "jc": lambda m: m.cf,
+    "jae": lambda m: not m.cf,              "jnb": lambda m: not m.cf,          "jnc": lambda m: not m.cf,
+    "je": lambda m: m.zf,                   "jz": lambda m: m.zf,
+    "jne": lambda m: not m.zf,              "jnz": lambda m: not m.zf,
+    "jbe": lambda m: m.cf or m.zf,          "jna": lambda m: m.cf or m.zf,
+    "ja": lambda m: not (m.cf or m.zf),     "jnbe": lambda m: not (m.cf or m.zf),
+    "js": lambda m: m.sf,                   "jns": lambda m: not m.sf,
+    "jp": lambda m: m.pf,                   "jpe": lambda m: m.pf,
+    "jnp": lambda m: not m.pf,              "jpo": lambda m: not m.pf,
+    "jl": lambda m: m.sf != m.of,           "jnge": lambda m: m.sf != m.of,
+    "jge": lambda m: m.sf == m.of,          "jnl": lambda m: m.sf == m.of,
+    "jle": lambda m: m.zf or m.sf != m.of,  "jng": lambda m: m.zf or m.sf != m.of,
+    "jg": lambda m: not m.zf and m.sf == m.of, "jnle": lambda m: not m.zf and m.sf == m.of,
+}
+
+
+class SimulationResult:
+
+    def __init__(self, machine: "Machine"):
+        self.exit_state: str = machine.exit_state       # ok, error, halt, exit, step_limit or fault
+        self.exit_code: int | None = machine.dos.exit_code
+        self.stdout: bytes = bytes(machine.dos.stdout)
+        self.instructions: int = machine.steps          # executed, not emitted
+        self.counts: list[int] = machine.counts         # executions of each instruction
+        self.taken: list[int] = machine.taken           # of those, branches taken
+        self.repeats: list[int] = machine.repeats       # rep iterations and bits shifted by cl
+        self.error: SimulationError | None = machine.error
+        self.registers: dict[str, int] = {name: machine.registers[index] for name, (index, size, _) in REGISTERS.items() if size == 2}
+        self.program: Program = machine.program
+
+    @property
+    def output(self) -> str:
+        return self.stdout.decode("latin-1")
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exit_state in ("ok", "exit") and not self.exit_code
+
+    def __str__(self):
+        error = f", error={self.error.error_string}" if self.error is not None else ""
+        return f"SimulationResult({self.exit_state}, instructions={self.instructions}{error})"
+
+
+class Machine:
+    """
+    Executes a Program instruction by instruction. Registers and memory behave like on the 8086,
+    the code lives outside of memory: code addresses (call, ret, jumps) are instruction indices.
+    """
+
+    def __init__(self, program: Program, dos: Dos | None = None):
+        self.program: Program = program
+        self.dos: Dos = dos if dos is not None else Dos()
+        self.registers: list[int] = [0] * 8      # ax cx dx bx sp bp si di
+        self.segments: dict[str, int] = {"cs": 0, "ds": 0, "es": 0, "ss": 0}
+        self.memory: bytearray = bytearray(0x10000)
+        self.memory[:len(program.data)] = program.data
+        self.cf = self.pf = self.zf = self.sf = self.df = self.of = False
+
+        self.ip: int = program.entry
+        self.current: Instruction | None = None
+        self.steps: int = 0
+        self.counts: list[int] = [0] * len(program.instructions)
+        self.taken: list[int] = [0] * len(program.instructions)
+        self.repeats: list[int] = [0] * len(program.instructions)
+        self.running: bool = False
+        self.exit_state: str = "ready"
+        self.error: SimulationError | None = None
+
+        self.handlers: list[Callable[[Instruction], None]] = [self.handler(instruction) for instruction in program.instructions]
+
+    def handler(self, instruction: Instruction) -> Callable[[Instruction], None]:
+        mnemonic = instruction.mnemonic
+        if mnemonic in CONDITIONS:
+            return self.op_jcc
+        handler = getattr(self, "op_" + mnemonic.replace(" ", "_"), None)
+        if handler is None:
+            return self.op_unknown
+        return handler
+
+    # running
+
+    def run(self, max_steps: int = 10_000_000) -> SimulationResult:
+        self.running = True
+        instructions = self.program.instructions
+        handlers = self.handlers
+        counts = self.counts
+        try:
+            while self.running:
+                if self.steps >= max_steps:
+                    self.stop("step_limit")
+                    break
+                ip = self.ip
+                if not 0 <= ip < len(instructions):
+                    raise SimulationError(f"Execution left the code at instruction {ip}", self.current.text if self.current else "start")
+                self.current = instruction = instructions[ip]
+                self.ip = ip + 1
+                self.steps += 1
+                counts[ip] += 1
+                handlers[ip](instruction)
+        except SimulationError as error:
+            self.error = error
+            self.stop("fault")
+        return SimulationResult(self)
+
+    def stop(self, state: str) -> None:
+        self.exit_state = state
+        self.running = False
+
+    def fault(self, message: str) -> None:
+        raise SimulationError(message, f"line {self.current.line}: {self.current.text}")
+
+    # operands
+
+    def get_byte_register(self, name: str) -> int:
+        index, _, shift = REGISTERS[name]
+        return (self.registers[index] >> shift) & 0xff
+
+    def set_byte_register(self, name: str, value: int) -> None:
+        index, _, shift = REGISTERS[name]
+        self.registers[index] = (self.registers[index] & ~(0xff << shift) & 0xffff) | ((value & 0xff) << shift)
+
+    def address(self, operand: MemoryOperand) -> int:
+        address = operand.displacement
+        for register in operand.registers:
+            address += self.registers[register]
+        return address & 0xffff
+
+    def read(self, address: int, size: int) -> int:
+        if size == 1:
+            return self.memory[address]
+        return self.memory[address] | (self.memory[(address + 1) & 0xffff] << 8)
+
+    def write(self, address: int, size: int, value: int) -> None:
+        self.memory[address] = value & 0xff
+        if size == 2:
+            self.memory[(address + 1) & 0xffff] = (value >> 8) & 0xff
+
+    def size(self, *operands: Operand) -> int:
+        for operand in operands:
+            if operand.size is not None:
+                return operand.size
+        self.fault(f"Operand size of \"{self.current.text}\" is ambiguous")
+
+    def get(self, operand: Operand, size: int) -> int:
+        if isinstance(operand, RegisterOperand):
+            value = self.registers[operand.index]
+            return (value >> operand.shift) & 0xff if operand.size == 1 else value
+        if isinstance(operand, ImmediateOperand):
+            return operand.value & (0xff if size == 1 else 0xffff)
+        if isinstance(operand, MemoryOperand):
+            return self.read(self.address(operand), size)
+        return self.segments[operand.name]
+
+    def set(self, operand: Operand, size: int, value: int) -> None:
+        if isinstance(operand, RegisterOperand):
+            if operand.size == 1:
+                index = operand.index
+                self.registers[index] = (self.registers[index] & ~(0xff << operand.shift) & 0xffff) | ((value & 0xff) << operand.shift)
+            else:
+                self.registers[operand.index] = value & 0xffff
+        elif isinstance(operand, MemoryOperand):
+            self.write(self.address(operand), size, value)
+        elif isinstance(operand, SegmentOperand):
+            self.segments[operand.name] = value & 0xffff
+        else:
+            self.fault(f"Cannot write to an immediate in \"{self.current.text}\"")
+
+    def push(self, value: int) -> None:
+        self.registers[4] = (self.registers[4] - 2) & 0xffff
+        self.write(self.registers[4], 2, value)
+
+    def pop(self) -> int:
+        value = self.read(self.registers[4], 2)
+        self.registers[4] = (self.registers[4] + 2) & 0xffff
+        return value
+
+    def target(self, operand: Operand) -> int:
+        """Instruction index a jump or call goes to"""
+        return self.get(operand, 2)
+
+    # flags
+
+    def set_result_flags(self, result: int, size: int) -> None:
+        mask = 0xff if size == 1 else 0xffff
+        result &= mask
+        self.zf = result == 0
+        self.sf = bool(result & (0x80 if size == 1 else 0x8000))
+        self.pf = PARITY[result & 0xff]
+
+    def flags(self) -> int:
+        value = 0xf002     # reserved bits read as set on the 8086
+        for flag, bit in FLAG_BITS.items():
+            if getattr(self, flag):
+                value |= 1 << bit
+        return value
+
+    def set_flags(self, value: int) -> None:
+        for flag, bit in FLAG_BITS.items():
+            setattr(self, flag, bool(value & (1 << bit)))
+
+    def arithmetic(self, a: int, b: int, size: int, subtract: bool, carry: int = 0) -> int:
+        mask = 0xff if size == 1 else 0xffff
+        sign = 0x80 if size == 1 else 0x8000
+        if subtract:
+            full = a - b - carry
+            result = full & mask
+            self.cf = full < 0
+            self.of = bool((a ^ b) & (a ^ result) & sign)
+        else:
+            full = a + b + carry
+            result = full & mask
+            self.cf = full > mask
+            self.of = bool(~(a ^ b) & (a ^ result) & sign)
+        self.set_result_flags(result, size)
+        return result
+
+    # instructions
+
+    def op_unknown(self, instruction: Instruction) -> None:
+        self.fault(f"Instruction \"{instruction.mnemonic}\" is not simulated")
+
+    def op_nop(self, instruction: Instruction) -> None:
+        pass
+
+    def op_hlt(self, instruction: Instruction) -> None:
+        # the compiled program ends on the hlt labeled ok, or on the one labeled error
+        self.stop("ok" if "ok" in instruction.labels else "error" if "error" in instruction.labels else "halt")
+
+    def op_mov(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.set(target, size, self.get(source, size))
+
+    def op_lea(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        if not isinstance(source, MemoryOperand):
+            self.fault("lea needs a memory operand")
+        self.set(target, 2, self.address(source))
+
+    def op_xchg(self, instruction: Instruction) -> None:
+        first, second = instruction.operands
+        size = self.size(first, second)
+        a, b = self.get(first, size), self.get(second, size)
+        self.set(first, size, b)
+        self.set(second, size, a)
+
+    def op_push(self, instruction: Instruction) -> None:
+        self.push(self.get(instruction.operands[0], 2))
+
+    def op_pop(self, instruction: Instruction) -> None:
+        self.set(instruction.operands[0], 2, self.pop())
+
+    def op_pushf(self, instruction: Instruction) -> None:
+        self.push(self.flags())
+
+    def op_popf(self, instruction: Instruction) -> None:
+        self.set_flags(self.pop())
+
+    def op_lahf(self, instruction: Instruction) -> None:
+        self.set_byte_register("ah", self.flags() & 0xff)
+
+    def op_sahf(self, instruction: Instruction) -> None:
+        self.set_flags((self.flags() & 0xff00) | self.get_byte_register("ah"))
+
+    def op_add(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.set(target, size, self.arithmetic(self.get(target, size), self.get(source, size), size, subtract=False))
+
+    def op_adc(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.set(target, size, self.arithmetic(self.get(target, size), self.get(source, size), size, subtract=False, carry=int(self.cf)))
+
+    def op_sub(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.set(target, size, self.arithmetic(self.get(target, size), self.get(source, size), size, subtract=True))
+
+    def op_sbb(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.set(target, size, self.arithmetic(self.get(target, size), self.get(source, size), size, subtract=True, carry=int(self.cf)))
+
+    def op_cmp(self, instruction: Instruction) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        self.arithmetic(self.get(target, size), self.get(source, size), size, subtract=True)
+
+    def op_inc(self, instruction: Instruction) -> None:
+        target = instruction.operands[0]
+        size = self.size(target)
+        carry = self.cf
+        self.set(target, size, self.arithmetic(self.get(target, size), 1, size, subtract=False))
+        self.cf = carry     # inc and dec keep the carry
+
+    def op_dec(self, instruction: Instruction) -> None:
+        target = instruction.operands[0]
+        size = self.size(target)
+        carry = self.cf
+        self.set(target, size, self.arithmetic(self.get(target, size), 1, size, subtract=True))
+        self.cf = carry
+
+    def op_neg(self, instruction: Instruction) -> None:
+        target = instruction.operands[0]
+        size = self.size(target)
+        self.set(target, size, self.arithmetic(0, self.get(target, size), size, subtract=True))
+
+    def logic(self, instruction: Instruction, operation: Callable[[int, int], int], store: bool = True) -> None:
+        target, source = instruction.operands
+        size = self.size(target, source)
+        result = operation(self.get(target, size), self.get(source, size))
+        self.cf = self.of = False
+        self.set_result_flags(result, size)
+        if store:
+            self.set(target, size, result)
+
+    def op_and(self, instruction: Instruction) -> None:
+        self.logic(instruction, lambda a, b: a & b)
+
+    def op_or(self, instruction: Instruction) -> None:
+        self.logic(instruction, lambda a, b: a | b)
+
+    def op_xor(self, instruction: Instruction) -> None:
+        self.logic(instruction, lambda a, b: a ^ b)
+
+    def op_test(self, instruction: Instruction) -> None:
+        self.logic(instruction, lambda a, b: a & b, store=False)
+
+    def op_not(self, instruction: Instruction) -> None:
+        target = instruction.operands[0]
+        size = self.size(target)
+        self.set(target, size, ~self.get(target, size))
+
+    def shift(self, instruction: Instruction, kind: str) -> None:
+        target = instruction.operands[0]
+        size = self.size(target)
+        bits = 8 * size
+        mask = (1 << bits) - 1
+        count = self.get(instruction.operands[1], 1) if len(instruction.operands) > 1 else 1
+        count &= 0x1f
+        if isinstance(instruction.operands[-1], RegisterOperand):
+            self.repeats[instruction.index] += count
+        if count == 0:
+            return
+        value = self.get(target, size)
+
+        if kind in ("shl", "sal"):
+            result = (value << count) & mask
+            self.cf = bool((value << count) & (1 << bits)) if count <= bits else False
+            self.of = bool(result >> (bits - 1)) != self.cf
+        elif kind == "shr":
+            result = value >> count
+            self.cf = bool((value >> (count - 1)) & 1)
+            self.of = bool(value >> (bits - 1))
+        elif kind == "sar":
+            signed = value - (1 << bits) if value >> (bits - 1) else value
+            result = (signed >> count) & mask
+            self.cf = bool((signed >> (count - 1)) & 1)
+            self.of = False
+        elif kind == "rol":
+            rotation = count % bits
+            result = ((value << rotation) | (value >> (bits - rotation))) & mask
+            self.cf = bool(result & 1)
+            self.of = bool(result >> (bits - 1)) != self.cf
+            self.set(target, size, result)
+            return      # rotations leave the other flags alone
+        else:   # ror
+            rotation = count % bits
+            result = ((value >> rotation) | (value << (bits - rotation))) & mask
+            self.cf = bool(result >> (bits - 1))
+            self.of = bool((result >> (bits - 1)) ^ ((result >> (bits - 2)) & 1))
+            self.set(target, size, result)
+            return
+
+        self.set_result_flags(result, size)
+        self.set(target, size, result)
+
+    def op_shl(self, instruction: Instruction) -> None:
+        self.shift(instruction, "shl")
+
+    def op_sal(self, instruction: Instruction) -> None:
+        self.shift(instruction, "sal")
+
+    def op_shr(self, instruction: Instruction) -> None:
+        self.shift(instruction, "shr")
+
+    def op_sar(self, instruction: Instruction) -> None:
+        self.shift(instruction, "sar")
+
+    def op_rol(self, instruction: Instruction) -> None:
+        self.shift(instruction, "rol")
+
+    def op_ror(self, instruction: Instruction) -> None:
+        self.shift(instruction, "ror")
+
+    def op_mul(self, instruction: Instruction) -> None:
+        source = instruction.operands[0]
+        size = self.size(source)
+        if size == 1:
+            result = self.get_byte_register("al") * self.get(source, 1)
+            self.registers[0] = result & 0xffff
+            self.cf = self.of = result > 0xff
+        else:
+            result = self.registers[0] * self.get(source, 2)
+            self.registers[0] = result & 0xffff
+            self.registers[2] = (result >> 16) & 0xffff
+            self.cf = self.of = result > 0xffff
+
+    def op_imul(self, instruction: Instruction) -> None:
+        source = instruction.operands[0]
+        size = self.size(source)
+        if size == 1:
+            result = signed(self.get_byte_register("al"), 1) * signed(self.get(source, 1), 1)
+            self.registers[0] = result & 0xffff
+            self.cf = self.of = not -0x80 <= result < 0x80
+        else:
+            result = signed(self.registers[0], 2) * signed(self.get(source, 2), 2)
+            self.registers[0] = result & 0xffff
+            self.registers[2] = (result >> 16) & 0xffff
+            self.cf = self.of = not -0x8000 <= result < 0x8000
+
+    def op_div(self, instruction: Instruction) -> None:
+        source = instruction.operands[0]
+        size = self.size(source)
+        divisor = self.get(source, size)
+        if divisor == 0:
+            self.fault("Divide error: division by zero")
+        if size == 1:
+            dividend = self.registers[0]
+            quotient, remainder = divmod(dividend, divisor)
+            if quotient > 0xff:
+                self.fault("Divide error: quotient does not fit into al")
+            self.registers[0] = (remainder << 8) | quotient
+        else:
+            dividend = (self.registers[2] << 16) | self.registers[0]
+            quotient, remainder = divmod(dividend, divisor)
+            if quotient > 0xffff:
+                self.fault("Divide error: quotient does not fit into ax")
+            self.registers[0] = quotient
+            self.registers[2] = remainder
+
+    def op_idiv(self, instruction: Instruction) -> None:
+        source = instruction.operands[0]
+        size = self.size(source)
+        divisor = signed(self.get(source, size), size)
+        if divisor == 0:
+            self.fault("Divide error: division by zero")
+        if size == 1:
+            dividend = signed(self.registers[0], 2)
+        else:
+            dividend = signed((self.registers[2] << 16) | self.registers[0], 4)
+        quotient = abs(dividend) // abs(divisor) * (1 if (dividend < 0) == (divisor < 0) else -1)   # truncates toward zero
+        remainder = dividend - quotient * divisor
+        limit = 0x80 if size == 1 else 0x8000
+        if not -limit <= quotient < limit:
+            self.fault("Divide error: quotient out of range")
+        if size == 1:
+            self.registers[0] = ((remainder & 0xff) << 8) | (quotient & 0xff)
+        else:
+            self.registers[0] = quotient & 0xffff
+            self.registers[2] = remainder & 0xffff
+
+    def op_cbw(self, instruction: Instruction) -> None:
+        self.registers[0] = signed(self.registers[0] & 0xff, 1) & 0xffff
+
+    def op_cwd(self, instruction: Instruction) -> None:
+        self.registers[2] = 0xffff if self.registers[0] & 0x8000 else 0
+
+    def op_clc(self, instruction: Instruction) -> None:
+        self.cf = False
+
+    def op_stc(self, instruction: Instruction) -> None:
+        self.cf = True
+
+    def op_cmc(self, instruction: Instruction) -> None:
+        self.cf = not self.cf
+
+    def op_cld(self, instruction: Instruction) -> None:
+        self.df = False
+
+    def op_std(self, instruction: Instruction) -> None:
+        self.df = True
+
+    def op_jmp(self, instruction: Instruction) -> None:
+        self.ip = self.target(instruction.operands[0])
+
+    def branch(self, instruction: Instruction) -> None:
+        self.taken[instruction.index] += 1
+        self.ip = self.target(instruction.operands[0])
+
+    def op_jcc(self, instruction: Instruction) -> None:
+        if CONDITIONS[instruction.mnemonic](self):
+            self.branch(instruction)
+
+    def op_jcxz(self, instruction: Instruction) -> None:
+        if self.registers[1] == 0:
+            self.branch(instruction)
+
+    def op_loop(self, instruction: Instruction) -> None:
+        self.registers[1] = (self.registers[1] - 1) & 0xffff
+        if self.registers[1] != 0:
+            self.branch(instruction)
+
+    def op_loope(self, instruction: Instruction) -> None:
+        self.registers[1] = (self.registers[1] - 1) & 0xffff
+        if self.registers[1] != 0 and self.zf:
+            self.branch(instruction)
+
+    op_loopz = op_loope
+
+    def op_loopne(self, instruction: Instruction) -> None:
+        self.registers[1] = (self.registers[1] - 1) & 0xffff
+        if self.registers[1] != 0 and not self.zf:
+            self.branch(instruction)
+
+    op_loopnz = op_loopne
+
+    def op_call(self, instruction: Instruction) -> None:
+        self.push(self.ip)
+        self.ip = self.target(instruction.operands[0])
+
+    def op_ret(self, instruction: Instruction) -> None:
+        self.ip = self.pop()
+        if instruction.operands:
+            self.registers[4] = (self.registers[4] + self.get(instruction.operands[0], 2)) & 0xffff
+
+    def op_int(self, instruction: Instruction) -> None:
+        self.dos.interrupt(self, self.get(instruction.operands[0], 1))
+
+    # string instructions, one element per call, the rep forms repeat cx times
+
+    def string_step(self, kind: str, size: int) -> None:
+        step = -size if self.df else size
+        si, di = self.registers[6], self.registers[7]
+        if kind == "movs":
+            self.write(di, size, self.read(si, size))
+        elif kind == "stos":
+            self.write(di, size, self.registers[0] & (0xff if size == 1 else 0xffff))
+        elif kind == "lods":
+            if size == 1:
+                self.set_byte_register("al", self.read(si, 1))
+            else:
+                self.registers[0] = self.read(si, 2)
+        elif kind == "cmps":
+            self.arithmetic(self.read(si, size), self.read(di, size), size, subtract=True)
+        elif kind == "scas":
+            self.arithmetic(self.registers[0] & (0xff if size == 1 else 0xffff), self.read(di, size), size, subtract=True)
+        if kind in ("movs", "lods", "cmps"):
+            self.registers[6] = (si + step) & 0xffff
+        if kind in ("movs", "stos", "cmps", "scas"):
+            self.registers[7] = (di + step) & 0xffff
+
+    def repeat(self, instruction: Instruction) -> None:
+        prefix, operation = instruction.mnemonic.split(" ")
+        if operation[:-1] not in ("movs", "stos", "lods", "cmps", "scas") or operation[-1] not in "bw":
+            self.fault(f"Cannot repeat \"{operation}\"")
+        kind, size = operation[:-1], 1 if operation[-1] == "b" else 2
+        while self.registers[1] != 0:
+            self.string_step(kind, size)
+            self.registers[1] -= 1
+            self.repeats[instruction.index] += 1
+            if kind in ("cmps", "scas"):
+                if prefix in ("rep", "repe", "repz") and not self.zf:
+                    break
+                if prefix in ("repne", "repnz") and self.zf:
+                    break
+
+    op_rep_movsb = op_rep_movsw = op_rep_stosb = op_rep_stosw = op_rep_lodsb = op_rep_lodsw = repeat
+    op_repe_cmpsb = op_repe_cmpsw = op_repz_cmpsb = op_repz_cmpsw = repeat
+    op_repne_cmpsb = op_repne_cmpsw = op_repnz_cmpsb = op_repnz_cmpsw = repeat
+    op_repe_scasb = op_repe_scasw = op_repz_scasb = op_repz_scasw = repeat
+    op_repne_scasb = op_repne_scasw = op_repnz_scasb = op_repnz_scasw = repeat
+
+    def op_movsb(self, instruction: Instruction) -> None:
+        self.string_step("movs", 1)
+
+    def op_movsw(self, instruction: Instruction) -> None:
+        self.string_step("movs", 2)
+
+    def op_stosb(self, instruction: Instruction) -> None:
+        self.string_step("stos", 1)
+
+    def op_stosw(self, instruction: Instruction) -> None:
+        self.string_step("stos", 2)
+
+    def op_lodsb(self, instruction: Instruction) -> None:
+        self.string_step("lods", 1)
+
+    def op_lodsw(self, instruction: Instruction) -> None:
+        self.string_step("lods", 2)
+
+    def op_cmpsb(self, instruction: Instruction) -> None:
+        self.string_step("cmps", 1)
+
+    def op_cmpsw(self, instruction: Instruction) -> None:
+        self.string_step("cmps", 2)
+
+    def op_scasb(self, instruction: Instruction) -> None:
+        self.string_step("scas", 1)
+
+    def op_scasw(self, instruction: Instruction) -> None:
+        self.string_step("scas", 2)
+
+
+def signed(value: int, size: int) -> int:
+    bits = 8 * size
+    return value - (1 << bits) if value & (1 << (bits - 1)) else value
+
+
+def simulate(code: str | list[Assembly], stdin: bytes | str = b"", max_steps: int = 10_000_000,
+             clock: Callable[[], datetime] = datetime.now) -> SimulationResult:
+    """Run compiled code, the asm text or the Assembly list of a translator"""
+    if not isinstance(code, str):
+        code = "\n".join(str(line) for line in code)
+    if isinstance(stdin, str):
+        stdin = stdin.encode("utf8")
+    return Machine(Program.parse(code), Dos(stdin, clock)).run(max_steps)
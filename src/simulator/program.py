@@ -0,0 +1,361 @@
+from ..errors import SimulationError
+import re
+
+
+# register name -> (index in Machine.registers, size in bytes, bit shift of the byte)
+REGISTERS: dict[str, tuple[int, int, int]] = {
+    "ax": (0, 2, 0), "cx": (1, 2, 0), "dx": (2, 2, 0), "bx": (3, 2, 0),
+    "sp": (4, 2, 0), "bp": (5, 2, 0), "si": (6, 2, 0), "di": (7, 2, 0),
+    "al": (0, 1, 0), "cl": (1, 1, 0), "dl": (2, 1, 0), "bl": (3, 1, 0),
+    "ah": (0, 1, 8), "ch": (1, 1, 8), "dh": (2, 1, 8), "bh": (3, 1, 8),
+}
+SEGMENT_REGISTERS: set[str] = {"cs", "ds", "es", "ss"}
+ADDRESS_REGISTERS: set[str] = {"bx", "bp", "si", "di"}
+
+PREFIXES: set[str] = {"rep", "repe", "repz", "repne", "repnz", "lock"}
+DIRECTIVES: set[str] = {"cpu", "segment", "section", "bits", "org", "global", "extern"}
+# instructions the machine knows, anything else at the start of a line is a label
+INSTRUCTIONS: set[str] = {
+    "mov", "lea", "xchg", "push", "pop", "pushf", "popf", "lahf", "sahf",
+    "add", "adc", "sub", "sbb", "cmp", "inc", "dec", "neg", "and", "or", "xor", "test", "not",
+    "shl", "sal", "shr", "sar", "rol", "ror", "mul", "imul", "div", "idiv", "cbw", "cwd",
+    "clc", "stc", "cmc", "cld", "std", "nop", "hlt", "int", "call", "ret", "jmp", "jcxz",
+    "loop", "loope", "loopz", "loopne", "loopnz",
+    "movsb", "movsw", "stosb", "stosw", "lodsb", "lodsw", "cmpsb", "cmpsw", "scasb", "scasw",
+    "jo", "jno", "jb", "jnae", "jc", "jae", "jnb", "jnc", "je", "jz", "jne", "jnz", "jbe", "jna", "ja", "jnbe",
+    "js", "jns", "jp", "jpe", "jnp", "jpo", "jl", "jnge", "jge", "jnl", "jle", "jng", "jg", "jnle",
+}
+DATA_SIZES: dict[str, int] = {"db": 1, "dw": 2, "dd": 4, "resb": 1, "resw": 2, "resd": 4}
+
+MEMORY_PATTERN = re.compile(r"^(?:(byte|word)\s*(?:ptr\s*)?)?\[(.*)\]$", re.IGNORECASE)
+EXPRESSION_TOKEN = re.compile(r"\s*(?:(0x[0-9a-f]+|0b[01]+|[0-9][0-9a-f]*[hb]?)|('[^']*'|\"[^\"]*\")|([a-z_.?$][a-z0-9_.?$@]*)|(.))", re.IGNORECASE)
+
+
+def split_operands(string: str) -> list[str]:
+    """Split at commas that are not inside quotes or brackets"""
+    operands: list[str] = []
+    current: list[str] = []
+    quote: str | None = None
+    depth = 0
+    for character in string:
+        if quote is not None:
+            if character == quote:
+                quote = None
+        elif character in "'\"":
+            quote = character
+        elif character == "[":
+            depth += 1
+        elif character == "]":
+            depth -= 1
+        elif character == "," and depth == 0:
+            operands.append("".join(current).strip())
+            current = []
+            continue
+        current.append(character)
+    if current or operands:
+        operands.append("".join(current).strip())
+    return operands
+
+
+def strip_comment(line: str) -> str:
+    quote: str | None = None
+    for i, character in enumerate(line):
+        if quote is not None:
+            if character == quote:
+                quote = None
+        elif character in "'\"":
+            quote = character
+        elif character == ";":
+            return line[:i]
+    return line
+
+
+def parse_number(string: str) -> int:
+    lower = string.lower()
+    if lower.startswith("0x"):
+        return int(lower[2:], 16)
+    if lower.startswith("0b"):
+        return int(lower[2:], 2)
+    if lower.endswith("h"):
+        return int(lower[:-1], 16)
+    if lower.endswith("b") and all(digit in "01" for digit in lower[:-1]):
+        return int(lower[:-1], 2)
+    return int(lower, 10)
+
+
+class Expression:
+    """
+    Constant expression of numbers, characters and labels, plus the address registers of a memory operand.
+    Labels are looked up when the program is linked, their values are only known after the whole text was read.
+    """
+
+    def __init__(self, string: str, scope: str = ""):
+        self.string: str = string
+        self.scope: str = scope         # label that local .labels belong to
+        self.tokens: list[str] = [match.group().strip() for match in EXPRESSION_TOKEN.finditer(string) if match.group().strip()]
+        self.registers: list[str] = [token.lower() for token in self.tokens if token.lower() in REGISTERS or token.lower() in SEGMENT_REGISTERS]
+        self.value: int | None = None
+
+    def link(self, labels: dict[str, int]) -> int:
+        self.labels = labels
+        self.position = 0
+        self.value = self._sum()
+        if self.position != len(self.tokens):
+            raise SimulationError(f"Cannot evaluate \"{self.string}\"", self.string)
+        return self.value
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def _sum(self) -> int:
+        value = self._product()
+        while self._peek() in ("+", "-"):
+            operator = self.tokens[self.position]
+            self.position += 1
+            value = value + self._product() if operator == "+" else value - self._product()
+        return value
+
+    def _product(self) -> int:
+        value = self._factor()
+        while self._peek() in ("*", "/"):
+            operator = self.tokens[self.position]
+            self.position += 1
+            value = value * self._factor() if operator == "*" else value // self._factor()
+        return value
+
+    def _factor(self) -> int:
+        token = self._peek()
+        if token is None:
+            raise SimulationError(f"Incomplete expression \"{self.string}\"", self.string)
+        self.position += 1
+
+        if token == "-":
+            return -self._factor()
+        if token == "+":
+            return self._factor()
+        if token == "(":
+            value = self._sum()
+            if self._peek() != ")":
+                raise SimulationError(f"Unclosed parenthesis in \"{self.string}\"", self.string)
+            self.position += 1
+            return value
+        if token[0] in "'\"":
+            characters = token[1:-1].encode("latin-1")
+            return int.from_bytes(characters, "little")
+        if token[0].isdigit():
+            return parse_number(token)
+        if token.lower() in REGISTERS or token.lower() in SEGMENT_REGISTERS:
+            return 0    # added by the machine when it computes the address
+        if token.startswith(".") and not token.startswith(".."):
+            token = self.scope + token
+        if token in self.labels:
+            return self.labels[token]
+        raise SimulationError(f"Undefined label \"{token}\"", self.string)
+
+
+class Operand:
+    size: int | None = None
+
+
+class RegisterOperand(Operand):
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.index, self.size, self.shift = REGISTERS[name]
+
+    def __str__(self):
+        return self.name
+
+
+class SegmentOperand(Operand):
+
+    def __init__(self, name: str):
+        self.name: str = name
+        self.size = 2
+
+    def __str__(self):
+        return self.name
+
+
+class ImmediateOperand(Operand):
+
+    def __init__(self, expression: Expression):
+        self.expression: Expression = expression
+
+    @property
+    def value(self) -> int:
+        return self.expression.value
+
+    def __str__(self):
+        return self.expression.string
+
+
+class MemoryOperand(Operand):
+
+    def __init__(self, size: int | None, expression: Expression):
+        self.size = size
+        self.expression: Expression = expression
+        invalid = [register for register in expression.registers if register not in ADDRESS_REGISTERS]
+        if invalid:
+            raise SimulationError(f"Register {invalid[0]} cannot address memory", expression.string)
+        self.registers: list[int] = [REGISTERS[register][0] for register in expression.registers]
+        # bp based addresses default to the stack segment, every segment is the same memory here anyway
+        self.uses_bp: bool = "bp" in expression.registers
+
+    @property
+    def displacement(self) -> int:
+        return self.expression.value
+
+    def __str__(self):
+        size = {1: "byte", 2: "word"}.get(self.size, "")
+        return f"{size}[{self.expression.string}]"
+
+
+def parse_operand(string: str, scope: str = "") -> Operand:
+    lower = string.lower()
+    if lower in REGISTERS:
+        return RegisterOperand(lower)
+    if lower in SEGMENT_REGISTERS:
+        return SegmentOperand(lower)
+    memory = MEMORY_PATTERN.match(string)
+    if memory is not None:
+        size = {"byte": 1, "word": 2}.get((memory.group(1) or "").lower())
+        return MemoryOperand(size, Expression(memory.group(2), scope))
+    return ImmediateOperand(Expression(string, scope))
+
+
+class Instruction:
+
+    def __init__(self, index: int, mnemonic: str, operands: list[Operand], text: str, line: int):
+        self.index: int = index
+        self.mnemonic: str = mnemonic
+        self.operands: list[Operand] = operands
+        self.text: str = text           # source line, for errors and reports
+        self.line: int = line           # line number in the assembly text
+        self.labels: list[str] = []     # labels pointing at this instruction
+
+    def __str__(self):
+        return f"{self.mnemonic} {', '.join(map(str, self.operands))}".strip()
+
+    def __repr__(self):
+        return f"Instruction({self.index}: {self})"
+
+
+class Program:
+    """
+    Assembly text read into instructions and a data image.
+    Code labels stand for instruction indices, data labels for offsets into the data image,
+    every segment shares the same 64 KiB of memory.
+    """
+
+    def __init__(self):
+        self.instructions: list[Instruction] = []
+        self.data: bytearray = bytearray()
+        self.code_labels: dict[str, int] = {}
+        self.data_labels: dict[str, int] = {}
+        self.entry: int = 0
+        self.pending_data: list[tuple[int, int, list[Expression], str]] = []     # offset, item size, values, text
+
+    @property
+    def labels(self) -> dict[str, int]:
+        return {"code": 0, "data": 0, **self.code_labels, **self.data_labels}
+
+    @classmethod
+    def parse(cls, text: str) -> "Program":
+        program = cls()
+        pending_labels: list[str] = []
+        global_label: str = ""
+
+        for number, raw_line in enumerate(text.splitlines(), start=1):
+            line = strip_comment(raw_line).rstrip()
+            if not line.strip():
+                continue
+
+            label: str | None = None
+            if not line[0].isspace():
+                first, rest = (line.split(None, 1) + [""])[:2]
+                if first.lower() in DIRECTIVES:
+                    if first.lower() in ("segment", "section"):     # labels ending the previous segment
+                        for pending in pending_labels:
+                            program.code_labels[pending] = len(program.instructions)
+                        pending_labels = []
+                    continue
+                if first.endswith(":"):
+                    label, line = first[:-1], rest
+                elif first.lower() not in INSTRUCTIONS and first.lower() not in PREFIXES and first.lower() not in DATA_SIZES:
+                    label, line = first, rest
+
+            if label is not None:
+                if label.startswith(".") and not label.startswith(".."):
+                    label = global_label + label    # nasm local label
+                elif not label.startswith(".."):
+                    global_label = label
+                pending_labels.append(label)
+
+            line = line.strip()
+            if not line:
+                continue
+
+            mnemonic, arguments = (line.split(None, 1) + [""])[:2]
+            mnemonic = mnemonic.lower()
+
+            if mnemonic in PREFIXES:
+                operation, arguments = (arguments.split(None, 1) + [""])[:2]
+                mnemonic = f"{mnemonic} {operation.lower()}"
+
+            if mnemonic in DATA_SIZES:
+                for pending in pending_labels:
+                    program.data_labels[pending] = len(program.data)
+                pending_labels = []
+                program.reserve(mnemonic, split_operands(arguments), raw_line, global_label)
+                continue
+
+            instruction = Instruction(len(program.instructions), mnemonic, [parse_operand(argument, global_label) for argument in split_operands(arguments)], raw_line.strip(), number)
+            for pending in pending_labels:
+                program.code_labels[pending] = instruction.index
+                instruction.labels.append(pending)
+                if pending == "..start":
+                    program.entry = instruction.index
+            pending_labels = []
+            program.instructions.append(instruction)
+
+        for pending in pending_labels:      # labels at the very end
+            program.code_labels[pending] = len(program.instructions)
+
+        program.link()
+        return program
+
+    def reserve(self, directive: str, arguments: list[str], text: str, scope: str = "") -> None:
+        size = DATA_SIZES[directive]
+        if directive.startswith("res"):
+            count = Expression(arguments[0])
+            self.data.extend(bytes(size * count.link({})))
+            return
+
+        for argument in arguments:
+            if argument == "?":
+                self.data.extend(bytes(size))
+            elif argument[:1] in "'\"" and argument[-1:] == argument[:1] and len(argument) > 3:
+                characters = argument[1:-1].encode("latin-1")
+                padding = (-len(characters)) % size
+                self.data.extend(characters + bytes(padding))
+            else:
+                # values may name labels defined further down, written once everything is read
+                self.pending_data.append((len(self.data), size, [Expression(argument, scope)], text))
+                self.data.extend(bytes(size))
+
+    def link(self) -> None:
+        labels = self.labels
+        for instruction in self.instructions:
+            for operand in instruction.operands:
+                if isinstance(operand, (ImmediateOperand, MemoryOperand)):
+                    try:
+                        operand.expression.link(labels)
+                    except SimulationError as error:
+                        raise SimulationError(error.error_string, f"line {instruction.line}: {instruction.text}")
+        for offset, size, expressions, text in self.pending_data:
+            value = expressions[0].link(labels) & ((1 << (8 * size)) - 1)
+            self.data[offset:offset + size] = value.to_bytes(size, "little")
+        self.pending_data = []
+        if len(self.data) > 0x10000:
+            raise SimulationError(f"Data of {len(self.data)} bytes does not fit into a 64 KiB segment", "segment data")
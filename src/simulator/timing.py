@@ -0,0 +1,184 @@
+from .program import Instruction, Operand, RegisterOperand, SegmentOperand, ImmediateOperand, MemoryOperand
+
+# 8086 clock counts and encoding lengths, from the timing tables of the Intel 8086 family user's manual.
+# Where the manual gives a range (mul, div) the middle is taken, unaligned word accesses (+4) are not counted.
+
+
+class Cost:
+
+    def __init__(self, cycles: int, size: int, taken: int = 0, repeat: int = 0):
+        self.cycles: int = cycles       # once per execution, branches not taken
+        self.size: int = size           # bytes of the encoding
+        self.taken: int = taken         # added when a branch is taken
+        self.repeat: int = repeat       # added per rep iteration, per bit shifted by cl
+
+    def __repr__(self):
+        return f"Cost(cycles={self.cycles}, size={self.size}, taken={self.taken}, repeat={self.repeat})"
+
+
+ALU = {"add", "adc", "sub", "sbb", "and", "or", "xor"}
+SHIFTS = {"shl", "sal", "shr", "sar", "rol", "ror"}
+BRANCHES: dict[str, tuple[int, int]] = {    # not taken, taken
+    "loop": (5, 17), "loope": (6, 18), "loopz": (6, 18), "loopne": (5, 19), "loopnz": (5, 19), "jcxz": (6, 18)
+}
+FLAG_INSTRUCTIONS: dict[str, int] = {
+    "clc": 2, "stc": 2, "cmc": 2, "cld": 2, "std": 2, "nop": 3, "hlt": 2, "lahf": 4, "sahf": 4,
+    "pushf": 10, "popf": 8, "cbw": 2, "cwd": 5
+}
+STRINGS: dict[str, tuple[int, int]] = {     # single, per rep iteration
+    "movs": (18, 17), "stos": (11, 10), "lods": (12, 13), "cmps": (22, 22), "scas": (15, 15)
+}
+# register width -> (register, memory) clocks
+MULTIPLY: dict[str, dict[int, tuple[int, int]]] = {
+    "mul": {1: (74, 80), 2: (126, 132)},
+    "imul": {1: (89, 95), 2: (141, 147)},
+    "div": {1: (85, 91), 2: (153, 159)},
+    "idiv": {1: (107, 113), 2: (175, 181)},
+}
+
+
+def effective_address(operand: MemoryOperand) -> int:
+    """Clocks of computing the address of a memory operand"""
+    registers = sorted(operand.expression.registers)
+    displacement = operand.displacement != 0 or not registers
+    if not registers:
+        return 6
+    if len(registers) == 1:
+        return 9 if displacement else 5
+    fast = registers in (["bp", "di"], ["bx", "si"])
+    if displacement:
+        return 11 if fast else 12
+    return 7 if fast else 8
+
+
+def displacement_size(operand: MemoryOperand) -> int:
+    registers = operand.expression.registers
+    if not registers:
+        return 2
+    if operand.displacement == 0 and registers != ["bp"]:
+        return 0
+    return 1 if -128 <= operand.displacement <= 127 else 2
+
+
+def immediate_size(operand: ImmediateOperand, size: int, sign_extends: bool = False) -> int:
+    if size == 1:
+        return 1
+    value = operand.value if operand.value < 0x8000 else operand.value - 0x10000
+    return 1 if sign_extends and -128 <= value <= 127 else 2
+
+
+def operand_size(operands: list[Operand]) -> int:
+    for operand in operands:
+        if operand.size is not None:
+            return operand.size
+    return 2
+
+
+def modrm_size(operands: list[Operand]) -> int:
+    """Opcode, mod r/m byte and the displacement of a memory operand"""
+    return 2 + sum(displacement_size(operand) for operand in operands if isinstance(operand, MemoryOperand))
+
+
+def ea(operands: list[Operand]) -> int:
+    return sum(effective_address(operand) for operand in operands if isinstance(operand, MemoryOperand))
+
+
+def cost(instruction: Instruction) -> Cost:
+    mnemonic = instruction.mnemonic
+    operands = instruction.operands
+    kinds = tuple("r" if isinstance(operand, (RegisterOperand, SegmentOperand)) else
+                  "i" if isinstance(operand, ImmediateOperand) else "m" for operand in operands)
+    size = operand_size(operands)
+
+    if mnemonic == "mov":
+        if kinds == ("r", "r"):
+            return Cost(2, 2)
+        if kinds == ("r", "i"):
+            return Cost(4, 1 + immediate_size(operands[1], size))
+        if kinds == ("r", "m"):
+            return Cost(8 + ea(operands), modrm_size(operands))
+        if kinds == ("m", "r"):
+            return Cost(9 + ea(operands), modrm_size(operands))
+        return Cost(10 + ea(operands), modrm_size(operands) + immediate_size(operands[1], size))
+
+    if mnemonic in ALU or mnemonic in ("cmp", "test"):
+        sign_extends = mnemonic != "test"
+        accumulator = isinstance(operands[0], RegisterOperand) and operands[0].name in ("ax", "al")
+        if kinds == ("r", "r"):
+            return Cost(3, 2)
+        if kinds == ("r", "i"):
+            if accumulator:
+                return Cost(4, 1 + immediate_size(operands[1], size))
+            return Cost(5 if mnemonic == "test" else 4, 2 + immediate_size(operands[1], size, sign_extends))
+        if kinds == ("r", "m"):
+            return Cost(9 + ea(operands), modrm_size(operands))
+        if kinds == ("m", "r"):
+            return Cost((9 if mnemonic in ("cmp", "test") else 16) + ea(operands), modrm_size(operands))
+        clocks = {"cmp": 10, "test": 11}.get(mnemonic, 17)
+        return Cost(clocks + ea(operands), modrm_size(operands) + immediate_size(operands[1], size, sign_extends))
+
+    if mnemonic in ("inc", "dec"):
+        if kinds == ("r",):
+            return Cost(2, 1) if size == 2 else Cost(3, 2)
+        return Cost(15 + ea(operands), modrm_size(operands))
+
+    if mnemonic in ("neg", "not"):
+        return Cost(3, 2) if kinds == ("r",) else Cost(16 + ea(operands), modrm_size(operands))
+
+    if mnemonic in MULTIPLY:
+        register, memory = MULTIPLY[mnemonic][size]
+        return Cost(register, 2) if kinds == ("r",) else Cost(memory + ea(operands), modrm_size(operands))
+
+    if mnemonic in SHIFTS:
+        memory = kinds[0] == "m"
+        count = operands[1] if len(operands) > 1 else None
+        if count is None or isinstance(count, ImmediateOperand) and count.value == 1:
+            return Cost(15 + ea(operands) if memory else 2, modrm_size(operands))
+        if isinstance(count, ImmediateOperand):     # assembled as repeated single shifts
+            return Cost((15 + ea(operands) if memory else 2) * count.value, modrm_size(operands) * count.value)
+        return Cost(20 + ea(operands) if memory else 8, modrm_size(operands), repeat=4)
+
+    if mnemonic == "push":
+        if isinstance(operands[0], SegmentOperand):
+            return Cost(10, 1)
+        return Cost(11, 1) if kinds == ("r",) else Cost(16 + ea(operands), modrm_size(operands))
+
+    if mnemonic == "pop":
+        if kinds == ("r",):
+            return Cost(8, 1)
+        return Cost(17 + ea(operands), modrm_size(operands))
+
+    if mnemonic == "lea":
+        return Cost(2 + ea(operands), modrm_size(operands))
+
+    if mnemonic == "xchg":
+        if kinds == ("r", "r"):
+            accumulator = any(operand.name == "ax" for operand in operands)
+            return Cost(3, 1) if accumulator else Cost(4, 2)
+        return Cost(17 + ea(operands), modrm_size(operands))
+
+    if mnemonic == "jmp":
+        return Cost(15, 3)
+    if mnemonic in BRANCHES:
+        not_taken, taken = BRANCHES[mnemonic]
+        return Cost(not_taken, 2, taken=taken - not_taken)
+    if mnemonic.startswith("j"):
+        return Cost(4, 2, taken=12)
+    if mnemonic == "call":
+        return Cost(19, 3)
+    if mnemonic == "ret":
+        return Cost(20, 3) if operands else Cost(16, 1)
+    if mnemonic == "int":
+        return Cost(51, 2)
+
+    if mnemonic in FLAG_INSTRUCTIONS:
+        return Cost(FLAG_INSTRUCTIONS[mnemonic], 1)
+
+    operation = mnemonic.split(" ")[-1]
+    if operation[:-1] in STRINGS:
+        single, iteration = STRINGS[operation[:-1]]
+        if " " in mnemonic:
+            return Cost(9, 2, repeat=iteration)
+        return Cost(single, 1)
+
+    return Cost(0, 0)       # not an 8086 instruction, the machine faults on it
@@ -83,6 +83,7 @@ BreakToken = Token.literal("break", "BreakToken")
 ContinueToken = Token.literal("continue", "ContinueToken")
 PassToken = Token.literal("pass", "PassToken")
 DefinitionToken = Token.literal("def", "DefinitionToken")
+InlineToken = Token.literal("inline", "InlineToken")
 
 LogicalAndToken = Token.literal("and", "LogicalAndToken")
 LogicalOrToken = Token.literal("or", "LogicalOrToken")
@@ -200,6 +201,7 @@ TOKEN_DETECTORS = [
     ContinueToken,
     PassToken,
     DefinitionToken,
+    InlineToken,
 
     LogicalAndToken,
     LogicalOrToken,
@@ -268,6 +270,15 @@ TOKEN_DETECTORS = [
     ArrayEndToken,
 ]
 
+# lowercase string -> token class for every fixed-spelling token (keywords, operators, bool literals)
+# built in reverse so that the first detector in TOKEN_DETECTORS keeps priority
+LITERAL_TOKENS: dict[str, Type[Token]] = {
+    token_type.literal_string.lower(): token_type
+    for token_type in reversed(TOKEN_DETECTORS) if hasattr(token_type, "literal_string")
+}
+LITERAL_TOKENS["true"] = BoolLiteralToken
+LITERAL_TOKENS["false"] = BoolLiteralToken
+
 
 TypeToken = Token.any(
     IntToken,
@@ -289,6 +300,7 @@ KeywordToken = Token.any(
     ContinueToken,
     PassToken,
     DefinitionToken,
+    InlineToken,
     IncludeToken,
     ModuleToken,
     AsToken,
@@ -363,3 +375,35 @@ LiteralToken = Token.any(
 )
 
 
+
+OpenNestingToken = Token.any(
+    OpenParenToken,
+    ArrayBeginToken,
+    class_name="OpenNestingToken"
+)
+
+CloseNestingToken = Token.any(
+    CloseParenToken,
+    ArrayEndToken,
+    class_name="CloseNestingToken"
+)
+
+CastOperatorToken = Token.any(
+    DoubleColonToken,
+    AsToken,
+    class_name="CastOperatorToken"
+)
+
+ReferenceToken = Token.any(
+    NameToken,
+    StarToken,
+    AtToken,
+    class_name="ReferenceToken"
+)
+
+AssignmentTargetToken = Token.any(
+    ArrayBeginToken,
+    EqualsToken,
+    AtEqualsToken,
+    class_name="AssignmentTargetToken"
+)
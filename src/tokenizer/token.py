@@ -5,16 +5,41 @@ from pathlib import Path
 
 
 class Token:
+
+    # every token class gets its own kind bit, combined classes (Token.any) match the union of their components
+    # the plain Token class has a kind bit of its own but matches every kind
+    kind: int = 1
+    mask: int = -1
+    _kinds: int = 1
+    classes: dict[str, Type["Token"]] = {}   # concrete token classes by name, for unpickling
+
     def __init__(self, string: str, line: "Line"):
         self.string = string
         self.line = line
 
+    def __init_subclass__(cls, mask: int | None = None, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if mask is None:
+            cls.kind = 1 << Token._kinds
+            cls.mask = cls.kind
+            Token._kinds += 1
+            Token.classes[cls.__name__] = cls
+        else:
+            cls.kind = 0
+            cls.mask = mask
+
     def __str__(self):
         return f"{self.__class__.__name__}({repr(self.string)}, {self.line.brief})"
     
     def __repr__(self):
         return str(self)
 
+    def __reduce__(self):
+        # token classes are mostly created by Token.literal, so they are pickled by name
+        # the parser that consumed the token is not part of it
+        state = {key: value for key, value in self.__dict__.items() if key != "parsed_by"}
+        return restore_token, (self.__class__.__name__, state)
+
     @staticmethod
     def literal(string: str, class_name: str) -> Type['Token']:
         # Define a new subclass of Token with a custom detect method, case insensitive
@@ -25,17 +50,27 @@ class Token:
 
     @classmethod
     def match(cls, token: 'Token') -> bool:
-        # Checks if the token is exactly an instance of the calling class
-        return isinstance(token, cls)
+        # Checks if the token is an instance of the calling class (or of one of its components) with a single AND
+        return token is not None and (token.kind & cls.mask) != 0
 
     @staticmethod
     def any(*classes: list[Type["Token"]], class_name: str = "CombinedToken") -> Type["Token"]:
         # Define a new subclass of Token with a custom detect method
+        # create these once at import time, matching against them is a single AND of the precomputed mask
+        mask = 0
+        for component in classes:
+            mask |= component.mask
         return type(class_name, (Token,), {
             "detect": staticmethod(lambda s: any(cls.detect(s) for cls in classes)),
-            "match": classmethod(lambda cls, token: any(cls.match(token) for cls in classes)),
             "_component_classes": classes  # Store component classes for subclass detection
-        })
+        }, mask=mask)
+
+    @classmethod
+    def components(cls) -> list[Type["Token"]]:
+        # The concrete token classes this class stands for, combined classes are flattened
+        if hasattr(cls, '_component_classes'):
+            return [component for combined in cls._component_classes for component in combined.components()]
+        return [cls]
 
     @classmethod
     def detects_subclass(cls, other_cls: Type['Token']) -> bool:
@@ -64,6 +99,13 @@ class Token:
         )
 
 
+def restore_token(class_name: str, state: dict) -> Token:
+    token_type = Token.classes[class_name]
+    token = token_type.__new__(token_type)
+    token.__dict__.update(state)
+    return token
+
+
 class Line:
     
     def __init__(self, string: str, number: int, location: Path | None = None):
@@ -78,6 +120,15 @@ class Line:
     def brief(self) -> str:
         return f"{self.location}:{self.number}"
 
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["file"]       # follows the location, which the module cache may swap
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.file = f"File \"{self.location}\"" if self.location is not None else "Anonymous file"
+
     def __str__(self):
         return f"Line {self.number}: \n{repr(self.string.strip())}\n{self.file}, line {self.number}"
     def __repr__(self):
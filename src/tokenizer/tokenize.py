@@ -3,7 +3,6 @@ from typing import Type, Union
 from .symbols import *
 from ..tree import Node
 from ..errors import SymbolError, NadLabemError
-from ..ui import progress_bar
 from ..config import CompilationConfig
 from pathlib import Path
 
@@ -53,6 +52,49 @@ def match_token_pattern(line: Line, token_types: list[Type[Token]], ignore_subse
     )"""
 
 
+# every line boundary recognized by str.splitlines, so line numbers match the line by line path
+BREAKS = r"\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+LINE_BREAK = rf"\r\n|[{BREAKS}]"
+
+# the same alternatives as Tokenizer.split_tokens, but over the whole source with named groups
+# strings, chars and comments are not allowed to run over a line break
+MASTER_PATTERN = re.compile(
+    rf"""(?P<comment>;[^{BREAKS}]*)"""
+    rf"""|(?P<newline>{LINE_BREAK})"""
+    r"""|(?P<symbol><\+|\+>|<~|~>|\+\+|--|::|//|==|!=|>=|<=|<<<|>>>|<<|>>|->|=@=)"""
+    rf"""|(?P<string>"(?:\\"|[^"{BREAKS}])*")"""
+    rf"""|(?P<char>'(?:\\'|[^'{BREAKS}])*')"""
+    r"""|(?P<word>\b\w+(?:\.\w+)*\b)"""
+    r"""|(?P<other>[^\w\s])"""
+)
+
+LINE_BREAK_PATTERN = re.compile(LINE_BREAK)
+
+
+def classify(string: str) -> Type[Token] | None:
+    """
+    Decide the token class of a token string, same priority as TOKEN_DETECTORS.
+
+    Fixed spellings (keywords, operators, bool literals) are resolved with one dict lookup,
+    only numbers, literals and names fall through to the detectors.
+    """
+    token_type = LITERAL_TOKENS.get(string.lower())
+    if token_type is not None:
+        return token_type
+
+    if NumberToken.detect(string):
+        return NumberToken
+    if CharLiteralToken.detect(string):
+        return CharLiteralToken
+    if StringLiteralToken.detect(string):
+        return StringLiteralToken
+    if CommentToken.detect(string):
+        return CommentToken
+    if NameToken.detect(string):
+        return NameToken
+    return None
+
+
 class Tokenizer:
 
     def __init__(self, config: CompilationConfig, location: Path | None = None):
@@ -71,13 +113,74 @@ class Tokenizer:
         return tokens
 
     def tokenize(self, source_code: str) -> list[Token]:
+        """Single pass over the whole source with the precompiled MASTER_PATTERN"""
+        tokens: list[Token] = []
+        show_progress: bool = self.config.progress.enabled and self.config.location == self.location
+        line_count: int = len(source_code.splitlines()) if show_progress else 0
+
+        line: Line | None = None
+        line_start: int = 0
+        line_number: int = 1
+
+        for match in MASTER_PATTERN.finditer(source_code):
+            group = match.lastgroup
+
+            if group == "newline":
+                if line is not None:
+                    if line.tokens:
+                        line.tokens.append(NewLineToken("\n", line))
+                        tokens.extend(line.tokens)
+                    line = None
+                if show_progress:
+                    self.config.progress.report("Tokenizing", line_number, line_count)
+                line_start = match.end()
+                line_number += 1
+                continue
+
+            if line is None:
+                line_end = LINE_BREAK_PATTERN.search(source_code, line_start)
+                line_string = source_code[line_start:line_end.start() if line_end else len(source_code)]
+                line = Line(line_string, line_number, self.location)
+
+            token_string = match.group()
+
+            if group == "comment":
+                line.comment = token_string
+                continue
+
+            if group == "string":
+                token_type = StringLiteralToken
+            elif group == "char":
+                token_type = CharLiteralToken
+            else:
+                token_type = classify(token_string)
+
+            if token_type is None:
+                raise SymbolError(f"Unknown token \"{token_string}\"", line)
+
+            if token_type is CommentToken:
+                line.comment = token_string
+            else:
+                line.tokens.append(token_type(token_string, line))
+
+        if line is not None and line.tokens:
+            line.tokens.append(NewLineToken("\n", line))
+            tokens.extend(line.tokens)
+
+        if show_progress and line_number <= line_count:
+            self.config.progress.report("Tokenizing", line_count, line_count)
+
+        return tokens
+
+    def tokenize_lines(self, source_code: str) -> list[Token]:
+        """Line by line tokenization through TOKEN_DETECTORS, kept as the reference implementation"""
         tokens: list[Token] = []
         line_number = 1
         lines_str = source_code.splitlines()
 
         for line in lines_str:
-            if self.config.verbose and self.config.location == self.location:
-                progress_bar("Tokenizing", line_number, len(lines_str))
+            if self.config.progress.enabled and self.config.location == self.location:
+                self.config.progress.report("Tokenizing", line_number, len(lines_str))
 
             line_tokens = self.tokenize_line(line, line_number)
             tokens.extend(line_tokens.tokens)
@@ -1,19 +1,49 @@
-import time
-
-def progress_bar(name: str, iteration: int, total: int, length=40, refuse_finish: bool = False):
-    
-    percent = 100 * (iteration / float(total))
-    
-    filled_length = int(length * iteration // total)
-    bar = '■' * filled_length + '-' * (length - filled_length)
-    
-    extended_name = name + ": " + ' ' * (12 - len(name))
-    
-    print(f'\r{extended_name}[{bar}] {percent:.0f}% Complete', end='\r')
-    
-    # wait one third of a second total
-    time.sleep(0.33 / total)
-    
-    if iteration == total and not refuse_finish:
-        print()     # flush
-        time.sleep(0.15)
\ No newline at end of file
+import sys, time
+
+
+class ProgressReporter:
+    """
+    Progress bars for the compile stages. Reporting is cheap: bars are redrawn at most rate times per second,
+    nothing ever waits, and the reporter is off when verbose output is off or stdout is not a terminal.
+    """
+
+    def __init__(self, enabled: bool = True, rate: float = 10, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self.enabled: bool = enabled and self.stream.isatty()
+        self.interval: float = 1 / rate
+        self.last_render: float = 0.0
+        self.stage: str | None = None       # stage of the bar on screen, None once its line is finished
+
+    def report(self, name: str, iteration: int, total: int, refuse_finish: bool = False) -> None:
+        if not self.enabled:
+            return
+
+        finished = iteration >= total
+        now = time.perf_counter()
+        if not finished and name == self.stage and now - self.last_render < self.interval:
+            return
+
+        if self.stage is not None and name != self.stage:
+            self.finish()   # previous stage never reached its total
+
+        self.last_render = now
+        self.stage = name
+        self.render(name, iteration, total)
+
+        if finished and not refuse_finish:
+            self.finish()
+
+    def render(self, name: str, iteration: int, total: int, length: int = 40) -> None:
+        percent = 100 * (iteration / float(total)) if total else 100
+        filled_length = int(length * iteration // total) if total else length
+        bar = '■' * filled_length + '-' * (length - filled_length)
+        extended_name = name + ": " + ' ' * (12 - len(name))
+        self.stream.write(f'\r{extended_name}[{bar}] {percent:.0f}% Complete\r')
+        self.stream.flush()
+
+    def finish(self) -> None:
+        """End the line of the bar on screen"""
+        if self.enabled and self.stage is not None:
+            self.stream.write("\n")
+            self.stream.flush()
+            self.stage = None
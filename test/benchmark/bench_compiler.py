@@ -0,0 +1,120 @@
+import sys, os
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+
+from pathlib import Path
+from src.compiler import Compiler
+from src.config import CompilationConfig
+from generate import ProgramShape, generate
+
+# Compiles generated programs of growing size through Compiler and records the time and peak memory
+# of every phase (Compiler.profile) into a JSON file, run it on two commits and --compare the files:
+#   python test/benchmark/bench_compiler.py --lines 1000 10000 50000 --out before.json
+#   python test/benchmark/bench_compiler.py --lines 1000 10000 50000 --out after.json --compare before.json
+#
+# default shape (depth 2, 4 operands, fan out 4, 8 element tables), first run (user-012):
+#    lines   tokens    nodes      wall  slowest phases
+#     1045    11649     6720     318ms  translate 138ms, parse 126ms, validate 28ms
+#     5265    58698    33937    2533ms  translate 1320ms, parse 913ms, validate 166ms
+#    21045   234639   135716   12814ms  translate 7198ms, parse 4541ms, validate 602ms
+
+ROOT = Path(__file__).parent.parent.parent
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compile_once(location: Path, memory: bool) -> dict:
+    config = CompilationConfig(location=location, verbose=False)
+    compiler = Compiler(config)
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        compiler.compile(location.read_text(encoding="utf8"))
+    finally:
+        wall_time = time.perf_counter() - start
+        if memory:
+            tracemalloc.stop()
+    profile = compiler.profile.as_dict()
+    profile["wall_time"] = round(wall_time, 6)
+    return profile
+
+
+def measure(shape: ProgramShape, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        location = generate(shape, Path(directory))
+        lines = sum(len(path.read_text(encoding="utf8").splitlines()) for path in Path(directory).glob("*.brandejs"))
+
+        # timings without tracemalloc, it slows allocation heavy phases down a lot
+        runs = [compile_once(location, memory=False) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run["wall_time"])
+        best["peak_memory"] = compile_once(location, memory=True)["peak_memory"]
+
+    return {"shape": vars(shape), "lines": lines, **best}
+
+
+def compare(results: list[dict], baseline: list[dict]) -> None:
+    previous = {(json.dumps(result["shape"], sort_keys=True)): result for result in baseline}
+    print()
+    print(f"{'lines':>8}  {'phase':<24}{'before':>10}{'after':>10}{'ratio':>8}")
+    for result in results:
+        old = previous.get(json.dumps(result["shape"], sort_keys=True))
+        if old is None:
+            continue
+        for phase, seconds in result["phases"].items():
+            if phase in old["phases"] and old["phases"][phase] > 0:
+                print(f"{result['lines']:>8}  {phase:<24}{old['phases'][phase] * 1000:>8.1f}ms{seconds * 1000:>8.1f}ms{seconds / old['phases'][phase]:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 5000, 20000], help="Program sizes (up to 200000)")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--expression-size", type=int, default=4)
+    parser.add_argument("--fan-out", type=int, default=4)
+    parser.add_argument("--array-size", type=int, default=8)
+    parser.add_argument("--statements", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_compiler.json", help="Results file")
+    parser.add_argument("--compare", default=None, help="Results file of an earlier run")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))     # deep programs recurse in link / prune
+
+    results = []
+    print(f"{'lines':>8}{'tokens':>9}{'nodes':>9}{'wall':>10}  {'slowest phases'}")
+    for lines in args.lines:
+        shape = ProgramShape.of_lines(lines, depth=args.depth, expression_size=args.expression_size,
+                                      fan_out=args.fan_out, array_size=args.array_size, statements=args.statements)
+        result = measure(shape, args.repeat if lines <= 20_000 else 1)
+        results.append(result)
+
+        top_level = {phase: seconds for phase, seconds in result["phases"].items() if "." not in phase}
+        slowest = sorted(top_level.items(), key=lambda item: -item[1])[:3]
+        print(f"{result['lines']:>8}{result['counters']['parsed_tokens']:>9}{result['counters']['ast_nodes']:>9}"
+              f"{result['wall_time'] * 1000:>8.0f}ms  " + ", ".join(f"{phase} {seconds * 1000:.0f}ms" for phase, seconds in slowest))
+
+    report = {"commit": commit(), "python": platform.python_version(), "results": results}
+    Path(args.out).write_text(json.dumps(report, indent=1), encoding="utf8")
+    print(f"\nSaved to {args.out}")
+
+    if args.compare is not None:
+        compare(results, json.loads(Path(args.compare).read_text(encoding="utf8"))["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import sys, os
+import time
+import gc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from pathlib import Path
+from src.tokenizer.tokenize import Tokenizer
+from src.parser.program import ProgramParser
+from src.config import CompilationConfig
+from src.errors import NadLabemError
+
+# statements/second, linear STATEMENTS scan -> kind dispatch table (user-003):
+#   io.brandejs        16183 -> 18940
+#   time.brandejs      22963 -> 45322
+#   synthetic 1300     16484 -> 18473
+#   synthetic 13000    11689 -> 15040
+#   synthetic 65000    10073 -> 12122
+
+STD = Path(__file__).parent.parent.parent / "std"
+
+# one of each statement kind, so every dispatch entry gets exercised
+STATEMENT_MIX = """x{i}: int = (a * 3 + b) & 0xff
+if (x{i} < 10) x{i} = x{i} + 1
+else pass
+while (x{i} != 0) {{
+    --x{i}
+    if (x{i} == 5) break
+    continue
+}}
+for (j{i}: int = 0, j{i} < 4, ++j{i}) put_char('a')
+$ mov ax, 0
+"""
+STATEMENTS_PER_CHUNK = 13
+
+# lookup table initialisers, almost all of the time goes into expressions
+TABLE_ROW = "t{i}: int[8] = [{i} * 2 + 1, ({i} << 3) & 0xff, {i} % 7, -{i}, a + b * c - d, (x{i} < 4) :: int, 1, {i} / 3]\n"
+
+
+def table(rows: int) -> str:
+    return "".join(TABLE_ROW.format(i=i) for i in range(rows))
+
+
+def synthetic(chunks: int) -> str:
+    return "".join(STATEMENT_MIX.format(i=i) for i in range(chunks))
+
+
+def measure(tokens: list, repeat: int, precedence_climbing: bool = True) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        config = CompilationConfig(verbose=False, precedence_climbing=precedence_climbing)
+        gc.collect()
+        gc.disable()    # like timeit, keep collector pauses out of the numbers
+        start = time.perf_counter()
+        ProgramParser(list(tokens), config=config).parse()
+        best = min(best, time.perf_counter() - start)
+        gc.enable()
+    return best
+
+
+def parses(tokens: list) -> bool:
+    try:
+        ProgramParser(list(tokens), config=CompilationConfig(verbose=False)).parse()
+        return True
+    except NadLabemError:
+        return False
+
+
+def count_statements(source: str) -> int:
+    return sum(1 for line in source.splitlines() if line.strip() and not line.strip().startswith((";", "}")))
+
+
+def main():
+    tokenizer = Tokenizer(CompilationConfig(verbose=False))
+
+    inputs: list[tuple[str, str, int]] = [
+        (path.name, path.read_text(encoding="utf8"), 0) for path in sorted(STD.glob("*.brandejs"))
+        if "include" not in path.read_text(encoding="utf8")
+    ]
+    inputs = [(name, source, count_statements(source)) for name, source, _ in inputs]
+    for chunks in (100, 1000, 5000):
+        inputs.append((f"synthetic {chunks * STATEMENTS_PER_CHUNK}", synthetic(chunks), chunks * STATEMENTS_PER_CHUNK))
+    for rows in (1000, 5000):
+        inputs.append((f"table {rows}", table(rows), rows))
+
+    print(f"{'input':<20}{'statements':>12}{'tokens':>9}{'time':>12}{'statements/s':>15}{'descent':>12}")
+
+    for name, source, statements in inputs:
+        tokens = tokenizer.tokenize(source)
+        if not parses(tokens):
+            continue
+        repeat = 5 if len(tokens) < 20_000 else 2
+        elapsed = measure(tokens, repeat)
+        descent = measure(tokens, repeat, precedence_climbing=False)
+        print(f"{name:<20}{statements:>12}{len(tokens):>9}{elapsed * 1000:>10.2f}ms{statements / elapsed:>15.0f}{statements / descent:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
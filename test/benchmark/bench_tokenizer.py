@@ -0,0 +1,56 @@
+import sys, os
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from pathlib import Path
+from src.tokenizer.tokenize import Tokenizer
+from src.config import CompilationConfig
+
+STD = Path(__file__).parent.parent.parent / "std"
+
+SYNTHETIC_LINE = """    value: int = (counter * 3 + 0x1f) & mask :: int    ; keep it in range"""
+
+
+def synthetic(lines: int) -> str:
+    code = ["def generated() -> void {"]
+    for i in range(lines - 2):
+        code.append(SYNTHETIC_LINE.replace("value", f"value{i}") if i % 4 else f"    if (x{i} <~ 10) print(*\"line {i}\")")
+    code.append("}")
+    return "\n".join(code)
+
+
+def measure(tokenize, source: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokenize(source)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    tokenizer = Tokenizer(CompilationConfig(verbose=False))
+
+    inputs: list[tuple[str, str]] = [
+        (path.name, path.read_text(encoding="utf8")) for path in sorted(STD.glob("*.brandejs"))
+    ]
+    inputs.append(("std/ (all)", "\n".join(source for _, source in inputs)))
+    for lines in (1000, 10000, 50000):
+        inputs.append((f"synthetic {lines}", synthetic(lines)))
+
+    print(f"{'input':<20}{'lines':>8}{'tokens':>9}{'per line':>12}{'single pass':>13}{'speedup':>9}")
+
+    for name, source in inputs:
+        repeat = 5 if len(source) < 100_000 else 2
+        tokens = tokenizer.tokenize(source)
+        assert [(t.__class__, t.string) for t in tokens] == [(t.__class__, t.string) for t in tokenizer.tokenize_lines(source)], name
+
+        old = measure(tokenizer.tokenize_lines, source, repeat)
+        new = measure(tokenizer.tokenize, source, repeat)
+
+        lines = len(source.splitlines())
+        print(f"{name:<20}{lines:>8}{len(tokens):>9}{old * 1000:>10.2f}ms{new * 1000:>11.2f}ms{old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
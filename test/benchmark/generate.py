@@ -0,0 +1,101 @@
+from pathlib import Path
+
+# Synthetic Brandejs programs of a configurable shape, for the benchmarks.
+# Every function gets called and its result added to a global, so pruning keeps the whole program.
+
+
+class ProgramShape:
+
+    def __init__(self,
+            functions: int = 10,
+            depth: int = 2,
+            expression_size: int = 4,
+            fan_out: int = 0,
+            array_size: int = 8,
+            statements: int = 3):
+
+        self.functions: int = functions               # spread over the main program and the modules
+        self.depth: int = depth                       # nested if / while blocks in each function
+        self.expression_size: int = expression_size   # operands per expression
+        self.fan_out: int = fan_out                   # modules included by the main program
+        self.array_size: int = array_size             # elements of each function's lookup table
+        self.statements: int = statements             # assignments per block
+
+    @property
+    def lines_per_function(self) -> int:
+        # header, declaration, return, closing brace, table, call, and the blocks
+        return 6 + self.statements + self.depth * (self.statements + 2)
+
+    @classmethod
+    def of_lines(cls, lines: int, **shape) -> "ProgramShape":
+        """Shape of a program with about this many lines"""
+        program = cls(**shape)
+        program.functions = max(1, lines // program.lines_per_function)
+        return program
+
+    def __str__(self):
+        return (f"functions={self.functions} depth={self.depth} expression_size={self.expression_size} "
+                f"fan_out={self.fan_out} array_size={self.array_size} statements={self.statements}")
+
+
+OPERATORS = ["+", "-", "*", "&", "|", "+", "^"]
+
+
+def expression(shape: ProgramShape, seed: int, table: str) -> str:
+    operands = ["a", "b", "r", f"{seed % 97}", f"(b & {seed % 13 + 1})", f"{table}[{seed % shape.array_size}]"]
+    terms = [operands[(seed + k) % len(operands)] for k in range(shape.expression_size)]
+    code = terms[0]
+    for k, term in enumerate(terms[1:]):
+        code = f"{code} {OPERATORS[(seed + k) % len(OPERATORS)]} {term}"
+    return code
+
+
+def block(shape: ProgramShape, depth: int, seed: int, table: str, indent: str) -> list[str]:
+    lines = [f"{indent}r = {expression(shape, seed + k, table)}" for k in range(shape.statements)]
+    if depth > 0:
+        if depth % 2:
+            lines.append(f"{indent}if (a < {seed % 50}) {{")
+        else:
+            lines.append(f"{indent}while (b > {seed % 20}) {{")
+            lines.append(f"{indent}    b = b - 1")
+        lines.extend(block(shape, depth - 1, seed * 3 + 1, table, indent + "    "))
+        lines.append(f"{indent}}}")
+    return lines
+
+
+def function(shape: ProgramShape, index: int) -> list[str]:
+    name, table = f"f{index}", f"t{index}"
+    return [
+        f"{table}: int[{shape.array_size}] = [{', '.join(str((index * 7 + k * 13) % 256) for k in range(shape.array_size))}]",
+        f"def {name}(a: int, b: int) -> int {{",
+        f"    r: int = {table}[0]",
+        *block(shape, shape.depth, index, table, "    "),
+        "    return r",
+        "}",
+    ]
+
+
+def generate(shape: ProgramShape, directory: Path) -> Path:
+    """Write the program (and its modules) to the directory, returns the main file"""
+    directory.mkdir(parents=True, exist_ok=True)
+    files = shape.fan_out + 1
+    modules: list[list[str]] = [[] for _ in range(shape.fan_out)]
+    main: list[str] = [f"include \"module{m}.brandejs\" as M{m}" for m in range(shape.fan_out)]
+    calls: list[str] = ["total: int = 0"]
+
+    for f in range(shape.functions):
+        target = f % files      # 0 is the main program
+        code = function(shape, f)
+        if target == 0:
+            main.extend(code)
+            calls.append(f"total = total + f{f}({f % 100}, {f % 7})")
+        else:
+            modules[target - 1].extend(code)
+            calls.append(f"total = total + M{target - 1}.f{f}({f % 100}, {f % 7})")
+
+    for m, module in enumerate(modules):
+        (directory / f"module{m}.brandejs").write_text("\n".join(module) + "\n", encoding="utf8")
+
+    location = directory / "main.brandejs"
+    location.write_text("\n".join(main + calls) + "\n", encoding="utf8")
+    return location
@@ -0,0 +1,51 @@
+import sys, os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pathlib import Path
+
+from src.config import CompilationConfig
+from src.compiler import Compiler
+from src.simulator.machine import simulate, SimulationResult
+
+ROOT = Path(__file__).parent.parent
+
+
+def compile_code(code: str, location: Path = ROOT / "test.brandejs", **config) -> Compiler:
+    # a file of the repository root includes std, the module cache stays off
+    compiler = Compiler(CompilationConfig(location=location, verbose=False, cache_dir=None, **config))
+    compiler.compile(code)
+    return compiler
+
+
+class SameResults:
+    """
+    Mixin of the tests of an optimization: PROGRAM is compiled with FLAG off and on, under each of the CONFIGS
+    on top of CONFIG. Both must run to the end and print OUTPUT (the same, if there is none),
+    and the flag must save executed instructions.
+    """
+
+    FLAG: str
+    PROGRAM: str
+    OUTPUT: str | None = None
+    CONFIG: dict = {}
+    CONFIGS: tuple[dict, ...] = ({"register_allocation": True}, {"register_allocation": False})
+
+    def compile_code(self, code: str | None = None, **config) -> Compiler:
+        """The code, PROGRAM if there is none, with the flag on unless the config turns it off"""
+        return compile_code(self.PROGRAM if code is None else code, **{**self.CONFIG, self.FLAG: True, **config})
+
+    def run_both(self, code: str | None = None, **config) -> tuple[SimulationResult, SimulationResult]:
+        """Runs of the code with the flag off and on"""
+        return (simulate(self.compile_code(code, **{**config, self.FLAG: False}).assembly),
+                simulate(self.compile_code(code, **{**config, self.FLAG: True}).assembly))
+
+    def test_same_results(self):
+        for config in self.CONFIGS:
+            with self.subTest(**config):
+                off, on = self.run_both(**config)
+                self.assertEqual(off.exit_state, "ok")
+                self.assertEqual(on.exit_state, "ok")
+                if self.OUTPUT is not None:
+                    self.assertEqual(off.output, self.OUTPUT)
+                self.assertEqual(on.output, off.output)
+                self.assertLess(on.instructions, off.instructions)
@@ -0,0 +1,99 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.compiler import Compiler
+from src.nodes.expression import LiteralNode, VariableReferenceNode
+from src.nodes.statement import VariableDeclarationNode
+from src.nodes.types import Char
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "size: int = 4",
+    "step: int = size * 2",
+    "total: int = 0",
+    "for (i: int = 0, i < size, ++i) total = total + step",
+    "print_int(total + size, 10, 1, false)",
+])
+
+
+def declarations(compiler: Compiler) -> dict[str, VariableDeclarationNode]:
+    found = {}
+    stack = [compiler.tree]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.children)
+        if isinstance(node, VariableDeclarationNode):
+            found[node.name_token.string] = node
+    return found
+
+
+def references(compiler: Compiler) -> list[str]:
+    found = []
+    stack = [compiler.tree]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.children)
+        if isinstance(node, VariableReferenceNode):
+            found.append(node.token.string)
+    return found
+
+
+class TestConstantFolding(SameResults, unittest.TestCase):
+
+    FLAG = "constant_folding"
+    PROGRAM = PROGRAM
+    OUTPUT = "36"
+    CONFIG = {"strict": False}
+
+    def test_wraparound(self):
+        # each one assigned to itself, so it stays a variable whose declaration is kept
+        code = "\n".join([
+            "a: int = 2 * 8 + 1",
+            "b: int = (-1) :: char :: int",
+            "c: int = 300 * 300",
+            "d: char = 'a' + 200c",
+            "e: int = (7 - 9) / 2",
+            "f: int = (1 <<< 15) >>> 3",
+            "g: bool = 3 < 5 and not (2 +> 1)",
+            "h: int = 'z' :: +int",
+            "a = a",
+            "b = b",
+            "c = c",
+            "d = d",
+            "e = e",
+            "f = f",
+            "g = g",
+            "h = h",
+        ])
+        found = declarations(self.compile_code(code))
+        values = {name: node.assignment.token.value for name, node in found.items()}
+        for node in found.values():
+            self.assertIsInstance(node.assignment, LiteralNode)
+        self.assertEqual(values, {"a": 17, "b": 255, "c": 24464, "d": 41, "e": 32767, "f": 4096, "g": False, "h": 122})
+        self.assertIs(found["d"].assignment.node_type, Char)
+
+    def test_left_to_run(self):
+        code = "\n".join([
+            "zero: int = 1 / 0",
+            "wide: int = 1 << 16",
+            "remainder: char = 7c % 2c",
+            "zero = zero",
+            "wide = wide",
+            "remainder = remainder",
+        ])
+        for node in declarations(self.compile_code(code)).values():
+            self.assertNotIsInstance(node.assignment, LiteralNode)
+
+    def test_constant_globals(self):
+        compiler = self.compile_code()
+        self.assertNotIn("size", references(compiler))
+        self.assertNotIn("step", references(compiler))
+        self.assertIn("total", references(compiler))
+        self.assertNotIn("size", declarations(compiler))
+
+
+if __name__ == "__main__":
+    unittest.main()
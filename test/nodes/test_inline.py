@@ -0,0 +1,114 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.compiler import Compiler
+from src.nodes.expression import FunctionCallNode
+from src.nodes.statement import FunctionCallStatementNode
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "g: int = 3",
+    'arr: char[] = "wxyz"',
+    "def twice(x: int) -> int {",
+    "    return x * 2",
+    "}",
+    "def sq(x: int) -> int {",
+    "    return x * x",
+    "}",
+    "def inc(v: @int) -> void {",
+    "    v = v + 1",
+    "}",
+    "def bump(n: int) -> void {",
+    "    t: int = n * 3",
+    "    g = g + t",
+    "}",
+    "def setat(values: @char[], i: int, v: char) -> void {",
+    "    values[i] = v",
+    "}",
+    "inline def sumloop(n: int) -> void {",
+    "    acc: int = 0",
+    "    for (k: int = 0, k < n, ++k) {",
+    "        if (k == 2) {",
+    "            continue",
+    "        }",
+    "        acc = acc + k",
+    "    }",
+    "    g = g + acc",
+    "}",
+    "def emit(c: char) -> void {",
+    "    $ mov ah, 2     ; {c} in a comment",
+    "    $ mov dl, byte[{c}]",
+    "    $ int 0x21",
+    "}",
+    "x: int = 5",
+    "print_decimal(twice(x) + sq(x + 1) + sq(twice(x)))",
+    "put_char(' ')",
+    "inc(*x)",
+    "inc(*x)",
+    "print_decimal(x)",
+    "put_char(' ')",
+    "bump(x)",
+    "bump(2)",
+    "print_decimal(g)",
+    "put_char(' ')",
+    "setat(*arr, 2, 'q')",
+    "put_char(arr[2])",
+    "put_char(' ')",
+    "sumloop(6)",
+    "print_decimal(g)",
+    "put_char(' ')",
+    "i: int = 0",
+    "while (i < 3) {",
+    "    emit(('a' :: int + i) :: char)",
+    "    bump(i)",
+    "    ++i",
+    "}",
+])
+
+
+def calls(compiler: Compiler) -> list[str]:
+    found = []
+    stack = [compiler.tree]
+    while stack:
+        node = stack.pop()
+        stack.extend(node.children)
+        if isinstance(node, (FunctionCallNode, FunctionCallStatementNode)):
+            found.append(node.token.string)
+    return found
+
+
+class TestInlining(SameResults, unittest.TestCase):
+
+    FLAG = "inlining"
+    PROGRAM = PROGRAM
+    OUTPUT = "146 7 30 q 43 abc"
+    CONFIGS = ({},)
+
+    def test_calls_replaced(self):
+        compiler = self.compile_code()
+        found = calls(compiler)
+        for name in ("twice", "inc", "bump", "setat", "sumloop", "emit"):
+            self.assertNotIn(name, found)
+        # x * x would compute its argument twice
+        self.assertEqual(found.count("sq"), 2)
+        counters = compiler.profile.counters
+        self.assertEqual(counters["inlined_calls.twice"], 2)
+        self.assertEqual(counters["inlined_calls.bump"], 3)
+
+    def test_hint(self):
+        # the loop is above the size limit, only the hint inlines it
+        code = PROGRAM.replace("inline def sumloop", "def sumloop")
+        self.assertIn("sumloop", calls(self.compile_code(code)))
+
+    def test_assembly_placeholders(self):
+        compiler = self.compile_code()
+        lines = [str(line) for line in compiler.assembly]
+        self.assertFalse(any("{" in line.split(";")[0] for line in lines))
+        self.assertTrue(any("; {c} in a comment" in line for line in lines))
+
+
+if __name__ == "__main__":
+    unittest.main()
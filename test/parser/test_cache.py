@@ -0,0 +1,116 @@
+import sys, os
+import unittest
+import tempfile
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from pathlib import Path
+
+from src.config import CompilationConfig
+from src.compiler import Compiler
+from src.parser import cache
+from src.parser.cache import ModuleCache
+from src.simulator.machine import simulate
+
+ROOT = Path(__file__).parent.parent.parent
+
+PROGRAM = "\n".join([
+    f'include "{(ROOT / "std" / "io.brandejs").as_posix()}"',
+    'include "outer.brandejs"',
+    "print_decimal(outer())",
+])
+
+OUTER = "\n".join([
+    'include "inner.brandejs"',
+    "def outer() -> int {",
+    "    return inner() * 10 + {value}",
+    "}",
+])
+
+INNER = "\n".join([
+    "def inner() -> int {",
+    "    return {value}",
+    "}",
+])
+
+
+class TestModuleCache(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory: Path = Path(directory.name)
+        # entries of other tests or runs must not answer for these files
+        ModuleCache.memory.clear()
+        self.write("outer.brandejs", OUTER, 4)
+        self.write("inner.brandejs", INNER, 2)
+
+    def write(self, name: str, template: str, value: int) -> None:
+        (self.directory / name).write_text(template.replace("{value}", str(value)), encoding="utf8")
+
+    def config(self, **options) -> CompilationConfig:
+        return CompilationConfig(location=self.directory / "main.brandejs", verbose=False,
+                                 cache_dir=self.directory / "cache", **options)
+
+    def compile_code(self, code: str = PROGRAM, **options) -> Compiler:
+        compiler = Compiler(self.config(**options))
+        compiler.compile(code)
+        return compiler
+
+    def run_code(self, code: str = PROGRAM, **options) -> str:
+        result = simulate(self.compile_code(code, **options).assembly)
+        self.assertEqual(result.exit_state, "ok")
+        return result.output
+
+    def test_hit(self):
+        first = self.compile_code()
+        ModuleCache.memory.clear()  # read back from the disk
+        second = self.compile_code()
+        self.assertLess(second.profile.counters["parsed_tokens"], first.profile.counters["parsed_tokens"])
+        self.assertEqual(list(map(str, second.assembly)), list(map(str, first.assembly)))
+
+    def test_edited_include(self):
+        self.assertEqual(self.run_code(), "24")
+        self.write("outer.brandejs", OUTER, 7)
+        self.assertEqual(self.run_code(), "27")
+        # the older entry is replaced, not kept beside the new one
+        self.assertEqual(len([slot for slot in ModuleCache.memory if "outer.brandejs" in slot]), 1)
+
+    def test_edited_nested_include(self):
+        self.assertEqual(self.run_code(), "24")
+        self.write("inner.brandejs", INNER, 5)
+        self.assertEqual(self.run_code(), "54")
+        ModuleCache.memory.clear()
+        self.write("inner.brandejs", INNER, 8)
+        self.assertEqual(self.run_code(), "84")
+
+    def test_direct_include_of_module(self):
+        # the module is cached with its parsed body, including its code directly needs just the tokens
+        std = f'include "{(ROOT / "std" / "io.brandejs").as_posix()}"'
+        modular = "\n".join([std, 'include "inner.brandejs" as m', "print_decimal(m.inner())"])
+        direct = "\n".join([std, 'include "inner.brandejs" not as module', "print_decimal(inner())"])
+        self.assertEqual(self.run_code(modular, strict=False), "2")
+        self.assertEqual(self.run_code(direct, strict=False), "2")
+        ModuleCache.memory.clear()
+        self.assertEqual(self.run_code(direct, strict=False), "2")
+
+    def test_other_config(self):
+        self.compile_code()
+        location = self.directory / "outer.brandejs"
+        source = location.read_text(encoding="utf8")
+        self.assertIsNotNone(ModuleCache(self.config()).load(location, source))
+        for options in ({"strict": False}, {"precedence_climbing": False}):
+            self.assertIsNone(ModuleCache(self.config(**options)).load(location, source))
+
+    def test_other_version(self):
+        self.compile_code()
+        location = self.directory / "outer.brandejs"
+        source = location.read_text(encoding="utf8")
+        ModuleCache.memory.clear()
+        with mock.patch.object(cache, "_fingerprint", "another compiler"):
+            self.assertIsNone(ModuleCache(self.config()).load(location, source))
+        self.assertIsNotNone(ModuleCache(self.config()).load(location, source))
+
+
+if __name__ == "__main__":
+    unittest.main()
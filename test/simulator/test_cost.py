@@ -0,0 +1,84 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from pathlib import Path
+
+from src.config import CompilationConfig
+from src.compiler import Compiler
+from src.simulator.machine import simulate
+from src.simulator.program import Program
+from src.simulator.timing import cost
+
+ROOT = Path(__file__).parent.parent.parent
+
+
+def costs_of(text: str) -> list:
+    return [cost(instruction) for instruction in Program.parse(text).instructions]
+
+
+class TestTiming(unittest.TestCase):
+
+    def test_effective_address(self):
+        mov_direct, mov_base, mov_base_displacement, mov_based_indexed = costs_of(
+            "mov ax, [1234]\nmov ax, [bx]\nmov ax, [bp-2]\nmov ax, [bx+si+4]")
+        self.assertEqual(mov_direct.cycles, 8 + 6)
+        self.assertEqual(mov_base.cycles, 8 + 5)
+        self.assertEqual(mov_base_displacement.cycles, 8 + 9)
+        self.assertEqual(mov_based_indexed.cycles, 8 + 11)
+        self.assertEqual(mov_base.size, 2)
+        self.assertEqual(mov_base_displacement.size, 3)
+        self.assertEqual(mov_direct.size, 4)
+
+    def test_multiply_width(self):
+        byte, word, memory = costs_of("mul bl\nmul bx\ndiv word [bp+4]")
+        self.assertLess(byte.cycles, word.cycles)
+        self.assertEqual(memory.cycles, 159 + 9)
+
+    def test_branches(self):
+        conditional, loop, rep = costs_of("a: jz a\nloop a\nrep movsb")
+        self.assertEqual((conditional.cycles, conditional.cycles + conditional.taken), (4, 16))
+        self.assertEqual((loop.cycles, loop.cycles + loop.taken), (5, 17))
+        self.assertEqual((rep.cycles, rep.repeat), (9, 17))
+
+
+class TestCostReport(unittest.TestCase):
+
+    def setUp(self):
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "def twice(number: int) -> int {",
+            "    return number + number",
+            "}",
+            "total: int = 0",
+            "for (i: int = 0, i < 5, i = i + 1) {",
+            "    total = total + twice(i)",
+            "}",
+            "print_decimal(total)",
+        ])
+        # twice would be inlined, the report is about the calls
+        self.compiler = Compiler(CompilationConfig(location=ROOT / "test.brandejs", verbose=False, cost_report=True,
+                                                   inlining=False, cache_dir=None))
+        self.output = self.compiler.compile(code)
+
+    def test_functions_by_symbol(self):
+        costs = self.compiler.costs
+        self.assertIn("twice", costs.functions)
+        self.assertIn("print_decimal", costs.functions)
+        self.assertGreater(costs.functions["twice"].cycles, 0)
+        self.assertGreater(costs.functions["twice"].size, 0)
+        self.assertIn("; twice:", self.output)
+
+    def test_record_simulation(self):
+        result = simulate(self.output)
+        self.assertEqual(result.output, "20")
+        costs = self.compiler.costs
+        costs.record(result)
+        self.assertEqual(costs.functions["twice"].calls, 5)
+        self.assertEqual(costs.functions["print_decimal"].calls, 1)
+        self.assertLessEqual(sum(function.executed_cycles for function in costs.functions.values()), costs.total_cycles(result))
+        self.assertIn("dynamic", costs.as_dict()["twice"])
+
+
+if __name__ == '__main__':
+    unittest.main()
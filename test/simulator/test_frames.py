@@ -0,0 +1,97 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.compiler import Compiler
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "g: int = 0",
+    "def clamp(v: int, lo: int, hi: int) -> int {",
+    "    if (v < lo) {",
+    "        return lo",
+    "    }",
+    "    if (v > hi) {",
+    "        return hi",
+    "    }",
+    "    return v",
+    "}",
+    "def fill(values: @char[], n: int, c: char) -> void {",
+    "    for (i: int = 0, i < n, ++i) {",
+    "        values[i] = c + i :: char",
+    "    }",
+    "}",
+    "def pick(values: @int[], i: int, j: int) -> int {",
+    "    return values[i] * values[j] + values[(i + j) % 4] - (values[i] >> 1)",
+    "}",
+    "def next() -> int {",
+    "    g = g + 1",
+    "    return g",
+    "}",
+    "def total(values: @int[], n: int) -> int {",
+    "    s: int = 0",
+    "    for (i: int = 0, i < n, ++i) {",
+    "        s = s + values[i]",
+    "    }",
+    "    return s",
+    "}",
+    "arr: int[] = [3, 5, 7, 11]",
+    'name: char[] = "abcdef"',
+    "print_decimal(clamp(5, 1, 3) + clamp(0, 2, 9) * 10 + clamp(7, 1, 9) * 100)",
+    "put_char(' ')",
+    "fill(*name, 4, 'p')",
+    "put_char(name[0])",
+    "put_char(name[3])",
+    "put_char(name[5])",
+    "put_char(' ')",
+    "for (q: int = 0, q < 3, ++q) {",
+    "    print_decimal(pick(*arr, q, 3 - q) + next())",
+    "    put_char(' ')",
+    "}",
+    "print_decimal(total(*arr, 4))",
+])
+
+
+def functions(compiler: Compiler) -> dict[str, list[list[str]]]:
+    """The instructions of each function, by its label"""
+    found: dict[str, list[list[str]]] = {}
+    current: list[list[str]] | None = None
+    for line in map(str, compiler.assembly):
+        code = line.split(";")[0].split()
+        if len(code) == 1 and code[0].endswith(":") and not code[0].startswith("over"):
+            current = found.setdefault(code[0][:-1], [])
+        elif current is not None and code:
+            current.append(code)
+    return found
+
+
+class TestFrameElision(SameResults, unittest.TestCase):
+
+    FLAG = "frame_elision"
+    PROGRAM = PROGRAM
+    OUTPUT = "723 psf 44 46 46 26"
+    CONFIG = {"inlining": False}     # the helpers stay functions
+
+    def test_prologue(self):
+        found = functions(self.compile_code())
+        for name in ("put_char", "clamp", "pick", "next"):
+            self.assertNotIn(["push", "bp"], found[name])
+        self.assertEqual(found["clamp"][0], ["mov", "di,", "sp"])
+        self.assertNotIn(["mov", "di,", "sp"], found["next"])
+        # a local keeps the frame, also a loop variable
+        self.assertIn(["push", "bp"], found["total"])
+        self.assertIn(["push", "bp"], found["fill"])
+
+    def test_no_empty_jumps(self):
+        assembly = [str(line).split(";")[0].split() for line in self.compile_code(frame_elision=False).assembly]
+        assembly = [line for line in assembly if line]
+        self.assertNotIn(["sub", "sp,", "0"], assembly)
+        for line, following in zip(assembly, assembly[1:]):
+            if line[0] == "jmp":
+                self.assertNotIn(following[0], (line[1], line[1] + ":"))
+
+
+if __name__ == "__main__":
+    unittest.main()
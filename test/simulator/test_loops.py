@@ -0,0 +1,51 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "i: int = 0",
+    "s: int = 0",
+    "while (i < 20 and s != 1000) {",
+    "    ++i",
+    "    if (i % 3 == 0) {",
+    "        continue",
+    "    }",
+    "    if (i == 17) {",
+    "        break",
+    "    }",
+    "    s = s + i",
+    "}",
+    "while (i > 100) {",
+    "    s = 0",
+    "}",
+    "do {",
+    "    --i",
+    "    s = s + 1",
+    "} while (i > 0)",
+    "for (k: int = 10, k > 0, --k) {",
+    "    if (k == 4) {",
+    "        continue",
+    "    }",
+    "    s = s - k",
+    "}",
+    "print_decimal(s)",
+])
+
+
+class TestLoopRotation(SameResults, unittest.TestCase):
+
+    FLAG = "loop_rotation"
+    PROGRAM = PROGRAM
+
+    def test_no_jump_back(self):
+        # every loop closes with its conditional jump
+        assembly = [str(line).split() for line in self.compile_code().assembly]
+        self.assertFalse(any(line[:1] == ["jmp"] and line[1].startswith(("while", "for")) for line in assembly))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulator.machine import simulate
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    'def twice(x: int) -> int {',
+    '    return x * 2',
+    '}',
+    'def sum(values: @int[], n: int) -> int {',
+    '    total: int = 0',
+    '    for (i: int = 0, i < n, ++i) {',
+    '        total = total + values[i] * (i + 1) - (values[i] >> 1)',
+    '    }',
+    '    return total',
+    '}',
+    'def shout(text: @char[], n: int) -> void {',
+    '    for (j: int = 0, j < n, ++j) {',
+    "        put_char(text[j] - ' ' + (text[j] % 2c) * 0c)",
+    '    }',
+    '}',
+    'a: int = 1234',
+    'b: int = 56',
+    's: int = 3',
+    'numbers: int[] = [5, 9, 14, 20]',
+    "letter: char = 'q'",
+    'name: char[] = "abc"',
+    'print_int((a / b + a % b) << s | (twice(b) ^ (a >> 2)) & ~(b - s * twice(s)), 10, 1, true)',
+    "put_char(' ')",
+    'print_int(sum(*numbers, 4) - numbers[s - 1] / (numbers[0] - 3), 10, 1, true)',
+    "put_char(' ')",
+    "print_int((letter / 3c + letter) :: int + (letter - 'a') :: int <<< 3, 10, 1, true)",
+    "put_char(' ')",
+    'shout(*name, 3)',
+])
+
+
+class TestRegisterAllocation(SameResults, unittest.TestCase):
+
+    FLAG = "register_allocation"
+    PROGRAM = PROGRAM
+    OUTPUT = "448 115 1328 ABC"
+    CONFIGS = ({"optimize": True}, {"optimize": False})
+
+    def test_spilling(self):
+        # a balanced tree needs one register more per level, seven levels do not fit in six registers
+        def tree(depth: int, leaf: int) -> tuple[str, int]:
+            if depth == 0:
+                names = ["a", "b", "c"]
+                return names[leaf % 3], [3, 5, 7][leaf % 3]
+            (left, x), (right, y) = tree(depth - 1, leaf), tree(depth - 1, leaf + 1)
+            if depth % 2:
+                return f"({left} * {right})", (x * y) & 0xffff
+            return f"({left} - {right})", (x - y) & 0xffff
+
+        expression, value = tree(6, 0)
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "a: int = 3",
+            "b: int = 5",
+            "c: int = 7",
+            f"print_int({expression}, 10, 1, false)",
+        ])
+        for register_allocation in (False, True):
+            result = simulate(self.compile_code(code, register_allocation=register_allocation).assembly)
+            self.assertEqual(result.exit_state, "ok")
+            self.assertEqual(result.output, str(value))
+
+    def test_char_arithmetic(self):
+        # chars wrap at 8 bits, also when the high byte of an intermediate value is not zero
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "a: char = 200c",
+            "b: char = 100c",
+            "c: char = 3c",
+            "a = a",
+            "b = b",
+            "c = c",
+            "r: char = (a + b) / 2c",
+            "print_decimal(r :: int)",
+            "put_char(' ')",
+            "print_decimal((a * c / 5c) :: int + (b - a) :: int)",
+        ])
+        for register_allocation in (False, True):
+            compiler = self.compile_code(code, register_allocation=register_allocation, optimize=False)
+            result = simulate(compiler.assembly)
+            self.assertEqual(result.exit_state, "ok")
+            self.assertEqual(result.output, "22 173")
+            assembly = [str(line).split() for line in compiler.assembly]
+            self.assertIn(["mul", "bl"], assembly)
+            self.assertNotIn(["mul", "bx"], assembly)
+
+    def test_counted_loops(self):
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "n: int = 6",
+            "m: int = 0 - 2",
+            "s: int = 0",
+            "n = n",
+            "m = m",
+            "for (i: int = 0, i < n, ++i) {",
+            "    s = s + 3",
+            "}",
+            "for (j: int = m, j <+ n, ++j) {",
+            "    if (j == 1) {",
+            "        continue",
+            "    }",
+            "    for (k: int = j, k < 4, ++k) {",
+            "        s = s + k + (s >> 2)",
+            "    }",
+            "}",
+            "for (l: int = n, l < 2, ++l) {",
+            "    s = s + 1000",
+            "}",
+            "print_decimal(s)",
+        ])
+        stack, registers = self.run_both(code)
+        self.assertEqual(registers.exit_state, "ok")
+        self.assertEqual(registers.output, stack.output)
+        compiler = self.compile_code(code)
+
+        # the count of the first loop stays in cx, the variable of the second in di
+        assembly = [str(line).split() for line in compiler.assembly]
+        self.assertIn(["loop", "for"], assembly)
+        self.assertIn(["inc", "di"], assembly)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import datetime
+
+from src.simulator.machine import simulate
+from src.simulator.program import Program
+from compiling import ROOT, compile_code
+
+
+class TestSimulator(unittest.TestCase):
+
+    def test_unsigned_comparisons(self):
+        location = ROOT / "examples/tests/unsigned_cmp_test.bjs"
+        for optimize in (True, False):
+            compiler = compile_code(location.read_text(encoding="utf8"), location, optimize=optimize)
+            result = simulate(compiler.assembly)
+            self.assertEqual(result.exit_state, "ok")
+            self.assertTrue(result.output.endswith("COMPLETE unsigned comparison test success!\r\n"))
+            self.assertNotIn("FAIL", result.output)
+
+    def test_stdin_echo(self):
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "character: char = get_char()",
+            "while (character != 0c) {",
+            "    put_char(character)",
+            "    character = get_char()",
+            "}",
+        ])
+        result = simulate(compile_code(code).assembly, stdin=b"hello")
+        self.assertEqual(result.exit_state, "ok")
+        self.assertEqual(result.stdout, b"hello")
+
+    def test_comparison_values(self):
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            "a: int = 65500",
+            "b: int = 7",
+            "c: char = 'x'",
+            "flags: int = (a < b) :: int + ((a +> b) :: int << 1) + ((b <= 7) :: int << 2) + ((c != 'x') :: int << 3) + ((c >= 'a') :: int << 4) + ((a == b) :: int << 5)",
+            "print_int(flags, 10, 1, false)",
+        ])
+        compiler = compile_code(code)
+        self.assertFalse(any(instruction.operation == "call" and "cmp" in str(instruction.arguments) for instruction in compiler.assembly))
+        result = simulate(compiler.assembly)
+        self.assertEqual(result.exit_state, "ok")
+        self.assertEqual(result.output, "20")
+
+    def test_short_circuit_conditions(self):
+        code = "\n".join([
+            'include "std/io.brandejs"',
+            'calls: int = 0',
+            'def bump() -> bool {',
+            '    calls = calls + 1',
+            '    return true',
+            '}',
+            'zero: int = 0',
+            'if (zero > 0 and bump()) {',
+            "    put_char('x')",
+            '}',
+            'if (zero == 0 or bump()) {',
+            "    put_char('y')",
+            '}',
+            'k: int = 0',
+            'while (k < 5 and not (k == 3 and bump())) {',
+            '    ++k',
+            '}',
+            'print_int(k, 10, 1, false)',
+            'print_int(calls, 10, 1, false)',
+        ])
+        for register_allocation in (False, True):
+            result = simulate(compile_code(code, register_allocation=register_allocation).assembly)
+            self.assertEqual(result.exit_state, "ok")
+            self.assertEqual(result.output, "y31")
+
+    def test_clock(self):
+        code = "\n".join([
+            'include "std/time.brandejs"',
+            'include "std/io.brandejs"',
+            "Date.load()",
+            "print_decimal(Date.year)",
+        ])
+        result = simulate(compile_code(code).assembly, clock=lambda: datetime(2024, 2, 29, 13, 30))
+        self.assertEqual(result.exit_state, "ok")
+        self.assertEqual(result.output, "2024")
+
+    def test_instruction_counts(self):
+        result = simulate("\n".join([
+            "        mov cx, 5",
+            "        xor ax, ax",
+            "again:  add ax, cx",
+            "        loop again",
+            "ok:     hlt",
+        ]))
+        self.assertEqual(result.exit_state, "ok")
+        self.assertEqual(result.registers["ax"], 15)
+        self.assertEqual(result.counts, [1, 1, 5, 5, 1])
+        self.assertEqual(result.instructions, 13)
+
+    def test_data_and_dos_string(self):
+        result = simulate("\n".join([
+            "segment code",
+            "..start: mov ax, data",
+            "        mov ds, ax",
+            "        mov dx, message",
+            "        mov ah, 9",
+            "        int 21h",
+            "        mov ax, 4c02h",
+            "        int 21h",
+            "segment data",
+            "message db \"hi$\"",
+        ]))
+        self.assertEqual(result.exit_state, "exit")
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual(result.stdout, b"hi")
+        self.assertFalse(result.succeeded)
+
+    def test_faults(self):
+        result = simulate("mov ax, 1\nxor bl, bl\ndiv bl\nhlt")
+        self.assertEqual(result.exit_state, "fault")
+        self.assertIn("division by zero", result.error.error_string)
+
+        result = simulate("spin: jmp spin", max_steps=1000)
+        self.assertEqual(result.exit_state, "step_limit")
+        self.assertEqual(result.instructions, 1000)
+
+    def test_signed_arithmetic(self):
+        result = simulate("\n".join([
+            "        mov ax, -7",
+            "        cwd",
+            "        mov bx, 2",
+            "        idiv bx",
+            "        mov si, dx",
+            "        mov di, ax",
+            "        mov cx, 0x8000",
+            "        sar cx, 1",
+            "        hlt",
+        ]))
+        self.assertEqual(result.registers["di"], (-3) & 0xffff)
+        self.assertEqual(result.registers["si"], (-1) & 0xffff)
+        self.assertEqual(result.registers["cx"], 0xc000)
+
+    def test_parse_labels(self):
+        program = Program.parse("start:\n  jmp .end\n.end: nop\ntable dw start, start.end\n")
+        self.assertEqual(program.code_labels["start.end"], 1)
+        self.assertEqual(program.data[0:4], bytes([0, 0, 1, 0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from compiling import SameResults
+
+CONSTANTS = [0, 1, 2, 3, 7, 10, 16, 31, 100, 641, 4096, 40000, 65535]
+
+
+def loop(operation: str, constant: int) -> list[str]:
+    # x walks through the 16 bit range, so both the small and the wrapping values are divided
+    return [
+        "x = 12345",
+        "h = 0",
+        "i = 0",
+        "while (i < 40) {",
+        f"    h = h + (x {operation} {constant}) ^ h",
+        "    x = x + 1777",
+        "    ++i",
+        "}",
+        "print_decimal(h)",
+        "put_char(' ')",
+    ]
+
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "x: int = 0",
+    "h: int = 0",
+    "i: int = 0",
+    "letter: char = 'a'",
+    *[line for operation in ("*", "/", "%") for constant in CONSTANTS if constant or operation == "*"
+      for line in loop(operation, constant)],
+    "print_decimal((letter / 4c + letter * 3c) :: int)",
+])
+
+
+class TestStrengthReduction(SameResults, unittest.TestCase):
+
+    FLAG = "optimize"
+    PROGRAM = PROGRAM
+
+    def test_no_multiply_or_divide(self):
+        code = "\n".join([
+            "x: int = 0",
+            "y: int = 0",
+            "x = x + 1",
+            "y = x * 10 + x / 16 + x % 8 + x * 2",
+        ])
+        assembly = [str(line) for line in self.compile_code(code).assembly]
+        self.assertFalse(any(line.split()[:1] in (["mul"], ["div"]) for line in assembly))
+
+        # other divisors multiply by their reciprocal
+        assembly = [str(line) for line in self.compile_code(code.replace("x / 16", "x / 10")).assembly]
+        self.assertEqual(sum(line.split()[:1] == ["mul"] for line in assembly), 1)
+        self.assertFalse(any(line.split()[:1] == ["div"] for line in assembly))
+
+
+if __name__ == "__main__":
+    unittest.main()
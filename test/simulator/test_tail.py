@@ -0,0 +1,153 @@
+import sys, os
+import unittest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulator.machine import simulate
+from compiling import SameResults
+
+PROGRAM = "\n".join([
+    'include "std/io.brandejs"',
+    "g: int = 0",
+    "def fact(num: int) -> int {",
+    "    if (num == 0) {",
+    "        return 1",
+    "    }",
+    "    $ mov dx, word[{num}]",
+    "    return num * fact(num - 1)",
+    "}",
+    "def gcd(a: int, b: int) -> int {",
+    "    if (b == 0) {",
+    "        return a",
+    "    }",
+    "    return gcd(b, a % b)",
+    "}",
+    "def odd(n: int) -> bool {",
+    "    if (n == 0) {",
+    "        return false",
+    "    }",
+    "    return even(n - 1)",
+    "}",
+    "def even(n: int) -> bool {",
+    "    if (n == 0) {",
+    "        return true",
+    "    }",
+    "    return odd(n - 1)",
+    "}",
+    "def peek(p: @int, n: int) -> int {",
+    "    if (n == 0) {",
+    "        return p",
+    "    }",
+    "    return peek(*p, n - 1)",
+    "}",
+    "def local(n: int) -> int {",
+    "    x: int = n",
+    "    if (n == 0) {",
+    "        return 7",
+    "    }",
+    "    return peek(*x, 0) + local(n - 1)",
+    "}",
+    "def glob(n: int) -> int {",
+    "    g = g + n",
+    "    if (n == 0) {",
+    "        return 0",
+    "    }",
+    "    return g + glob(n - 1)",
+    "}",
+    "def h(x: @int, y: int) -> int {",
+    "    return x + y",
+    "}",
+    "def bound(a: int, b: int) -> int {",
+    "    p: @int =@= *a",
+    "    return h(*p, b)",
+    "}",
+    "def doubled(a: int, b: int) -> int {",
+    "    loc: int = a * 2",
+    "    p: @int =@= *loc",
+    "    return h(*p, b)",
+    "}",
+    "def rebound(a: @int, b: int) -> int {",
+    "    loc: int = b * 3",
+    "    a =@= *loc",
+    "    return h(*a, b)",
+    "}",
+    "def weird(n: int) -> int {",
+    "    if (n == 0) {",
+    "        return 1",
+    "    }",
+    "    return n - weird(n - 1)",
+    "}",
+    "print_decimal(fact(7))",
+    "put_char(' ')",
+    "print_decimal(gcd(1071, 462))",
+    "put_char(' ')",
+    "if (even(2001)) {",
+    "    put_char('E')",
+    "} else {",
+    "    put_char('O')",
+    "}",
+    "put_char(' ')",
+    "y: int = 42",
+    "print_decimal(peek(*y, 3))",
+    "put_char(' ')",
+    "print_decimal(local(5))",
+    "put_char(' ')",
+    "print_decimal(glob(5))",
+    "put_char(' ')",
+    "print_decimal(weird(9))",
+    "put_char(' ')",
+    "print_decimal(bound(100, 5))",
+    "put_char(' ')",
+    "print_decimal(doubled(100, 15))",
+    "put_char(' ')",
+    "print_decimal(rebound(*y, 4))",
+])
+
+# twenty thousand frames do not fit in the segment
+DEEP = "\n".join([
+    'include "std/io.brandejs"',
+    "def down(n: int, acc: int) -> int {",
+    "    if (n == 0) {",
+    "        return acc",
+    "    }",
+    "    return down(n - 1, acc + n)",
+    "}",
+    "def total(n: int) -> int {",
+    "    if (n == 0) {",
+    "        return 0",
+    "    }",
+    "    return 1 + total(n - 1) + n",
+    "}",
+    "print_decimal(down(20000, 0))",
+    "put_char(' ')",
+    "print_decimal(total(20000))",
+])
+
+
+class TestTailCalls(SameResults, unittest.TestCase):
+
+    FLAG = "tail_calls"
+    PROGRAM = PROGRAM
+    OUTPUT = "5040 21 O 42 22 75 4 105 215 16"
+
+    def test_deep_recursion(self):
+        result = simulate(self.compile_code(DEEP).assembly)
+        self.assertEqual(result.exit_state, "ok")
+        self.assertEqual(result.output, f"{200010000 % 65536} {200030000 % 65536}")
+
+    def test_jumps(self):
+        assembly = [str(line).split() for line in self.compile_code().assembly]
+        calls = [line[1] for line in assembly if line[:1] == ["call"]]
+        # called once by the program, the recursion jumps
+        for name in ("fact", "gcd", "even"):
+            self.assertEqual(calls.count(name), 1)
+        self.assertNotIn("odd", calls)
+        # another call in the combined values, g changed by the call and a subtraction that does not regroup
+        for name in ("local", "glob", "weird"):
+            self.assertEqual(calls.count(name), 2)
+        # the references are bound to the frame the jump would overwrite or drop
+        self.assertEqual(calls.count("h"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys, os
+import unittest
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pathlib import Path
+
+from src.batch import compile_batch, compile_file, expand, summary
+
+PASSING = "\n".join([
+    "def twice(n: int) -> int {",
+    "    return n * 2",
+    "}",
+    "x: int = twice({value})",
+    "x = x + 1",
+])
+
+FAILING = "x: int = y"
+
+OPTIONS = {"cache_dir": None}
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory: Path = Path(directory.name)
+
+    def write(self, name: str, code: str) -> Path:
+        location = self.directory / name
+        location.write_text(code, encoding="utf8")
+        return location
+
+    def programs(self, count: int = 6) -> list[Path]:
+        return [self.write(f"p{i}.brandejs", PASSING.replace("{value}", str(i))) for i in range(count)]
+
+    def test_failure_continues(self):
+        locations = [self.write("a.brandejs", FAILING), self.write("b.brandejs", PASSING.replace("{value}", "1"))]
+        failed, passed = compile_batch(locations, OPTIONS)
+        self.assertEqual(failed.error, f"NameError: Undefined name 'y' ({locations[0]}:1)")
+        self.assertFalse(failed.output.exists())
+        self.assertIsNone(passed.error)
+        self.assertGreater(passed.instructions, 0)
+        self.assertTrue(passed.output.is_file())
+
+    def test_unwritable_output(self):
+        location = self.write("a.brandejs", PASSING.replace("{value}", "1"))
+        location.with_suffix(".asm").mkdir()
+        result = compile_file(location, OPTIONS)
+        self.assertTrue(result.error.startswith("IsADirectoryError"))
+
+    def test_jobs(self):
+        locations = self.programs() + [self.write("bad.brandejs", FAILING)]
+        single = compile_batch(locations, OPTIONS, jobs=1)
+        outputs = [result.output.read_text(encoding="utf8") for result in single if result.error is None]
+        pooled = compile_batch(locations, OPTIONS, jobs=3)
+        self.assertEqual([result.location for result in pooled], locations)
+        for one, many in zip(single, pooled):
+            self.assertEqual((one.error, one.instructions, one.warnings, one.sources),
+                             (many.error, many.instructions, many.warnings, many.sources))
+        self.assertEqual([result.output.read_text(encoding="utf8") for result in pooled if result.error is None], outputs)
+
+    def test_summary(self):
+        locations = [self.write("bad.brandejs", FAILING)] + self.programs(2)
+        results = compile_batch(locations, OPTIONS)
+        results[2].up_to_date = True
+        lines = summary(results, 1.5).splitlines()
+        self.assertEqual(len(lines), 1 + len(results) + 2)
+        self.assertTrue(lines[1].startswith(str(locations[0])))
+        self.assertIn(results[0].error, lines[1])
+        self.assertTrue(lines[2].endswith("ok"))
+        self.assertTrue(lines[3].endswith("up to date"))
+        instructions = results[1].instructions + results[2].instructions
+        self.assertTrue(lines[-1].startswith(f"3 files, 1 failed, 1 up to date, {instructions} instructions, 0 warnings, "))
+        self.assertTrue(lines[-1].endswith("in 1.50s wall time"))
+
+    def test_expand(self):
+        locations = self.programs(2)
+        pattern = str(self.directory / "*.brandejs")
+        self.assertEqual(expand([str(locations[1]), pattern, str(self.directory / "missing.brandejs")]),
+                         [locations[1], locations[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import sys, os
+import unittest
+import inspect, json, socket, tempfile, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pathlib import Path
+
+from src.config import CompilationConfig
+from src.daemon import CompileDaemon, CONFIG_FIELDS
+
+ROOT = Path(__file__).parent.parent
+
+# set by the client for itself, not by the request
+LOCAL_FIELDS: set[str] = {"location", "verbose", "cost_report", "progress_rate"}
+
+
+class TestCompileDaemon(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory: Path = Path(directory.name)
+        self.addCleanup(os.chdir, os.getcwd())     # the daemon moves to the directory of each request
+        self.daemon = CompileDaemon(self.directory / "daemon.sock", cache_dir=None)
+        self.daemon.running = True
+
+    def request(self, request: dict) -> dict:
+        """Response of the daemon to the request, sent over a socket like a client does"""
+        client, server = socket.socketpair()
+        handler = threading.Thread(target=self.daemon.handle, args=(server,))
+        handler.start()
+        with client, client.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode("utf8") + b"\n")
+            stream.flush()
+            response = json.loads(stream.readline())
+        handler.join()
+        return response
+
+    def compile_request(self, source: str, **config) -> dict:
+        return {"cwd": str(ROOT), "location": str(ROOT / "test.brandejs"), "source": source, "config": config}
+
+    def test_ok(self):
+        response = self.request(self.compile_request('include "std/io.brandejs"\nprint_decimal(7)'))
+        self.assertIn("output", response)
+        self.assertIn("print_decimal", response["output"])
+        self.assertEqual(response["warnings"], [])
+        self.assertIn("translate", response["profile"]["phases"])
+
+    def test_error(self):
+        response = self.request(self.compile_request("x: int = y"))
+        self.assertNotIn("output", response)
+        self.assertEqual(response["error"]["number"], 1)
+        self.assertIn("y", response["error"]["text"])
+
+    def test_fields(self):
+        # a flag the client set but the daemon dropped would compile a different program
+        code = 'include "std/io.brandejs"\ndef f(n: int) -> int {\n    return n * 2\n}\nprint_decimal(f(3))'
+        inlined = self.request(self.compile_request(code))["output"]
+        called = self.request(self.compile_request(code, inlining=False, ignored=True))["output"]
+        self.assertNotIn("call f", inlined)
+        self.assertIn("call f", called)
+
+    def test_missing_cwd(self):
+        request = self.compile_request("x: int = 1")
+        request["cwd"] = str(self.directory / "missing")
+        response = self.request(request)
+        self.assertIn("FileNotFoundError", response["internal"])
+        self.assertTrue(self.daemon.running)
+
+    def test_stop(self):
+        self.assertEqual(self.request({"command": "stop"}), {"stopped": True})
+        self.assertFalse(self.daemon.running)
+
+    def test_config_fields(self):
+        # every option of the compiled code reaches the daemon, a new flag cannot be dropped silently
+        parameters = set(inspect.signature(CompilationConfig.__init__).parameters) - {"self"}
+        self.assertEqual(parameters - LOCAL_FIELDS, set(CONFIG_FIELDS))
+
+
+if __name__ == "__main__":
+    unittest.main()
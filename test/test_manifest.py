@@ -0,0 +1,118 @@
+import sys, os
+import unittest
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pathlib import Path
+
+from src.batch import compile_batch, compile_file
+from src.manifest import BuildManifest, source_digest
+
+PROGRAM = "\n".join([
+    'include "lib.brandejs"',
+    "x: int = twice(3)",
+])
+
+LIBRARY = "\n".join([
+    "def twice(n: int) -> int {",
+    "    return n * 2",
+    "}",
+])
+
+OPTIONS = {"strict": True, "inlining": True, "cache_dir": None}
+
+
+class TestBuildManifest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory: Path = Path(directory.name)
+        self.program: Path = self.directory / "main.brandejs"
+        self.library: Path = self.directory / "lib.brandejs"
+        self.program.write_text(PROGRAM, encoding="utf8")
+        self.library.write_text(LIBRARY, encoding="utf8")
+        self.path: Path = self.directory / "build.json"
+
+    def build(self) -> None:
+        results = compile_batch([self.program], OPTIONS, manifest=BuildManifest(self.path))
+        self.assertIsNone(results[0].error)
+
+    def is_current(self, options: dict = OPTIONS) -> bool:
+        # digests are kept for the run, a fresh manifest reads the files again
+        return BuildManifest(self.path).is_current(self.program, self.program.with_suffix(".asm"), options)
+
+    def test_unchanged(self):
+        self.assertFalse(self.is_current())
+        self.build()
+        self.assertTrue(self.is_current())
+        self.assertTrue(self.is_current({**OPTIONS, "cache_dir": self.directory / "cache"}))
+        results = compile_batch([self.program], OPTIONS, manifest=BuildManifest(self.path))
+        self.assertTrue(results[0].up_to_date)
+        self.assertGreater(results[0].instructions, 0)
+
+    def test_changed_include(self):
+        self.build()
+        self.library.write_text(LIBRARY.replace("n * 2", "n + n"), encoding="utf8")
+        self.assertFalse(self.is_current())
+        self.build()
+        self.assertTrue(self.is_current())
+
+    def test_changed_options(self):
+        self.build()
+        self.assertFalse(self.is_current({**OPTIONS, "inlining": False}))
+        self.assertFalse(self.is_current({**OPTIONS, "strict": False}))
+
+    def test_deleted_output(self):
+        self.build()
+        self.program.with_suffix(".asm").unlink()
+        self.assertFalse(self.is_current())
+
+    def test_deleted_source(self):
+        self.build()
+        self.library.unlink()
+        self.assertFalse(self.is_current())
+
+    def test_forget_after_error(self):
+        self.build()
+        self.library.write_text(LIBRARY.replace("n * 2", "m * 2"), encoding="utf8")
+        results = compile_batch([self.program], OPTIONS, manifest=BuildManifest(self.path))
+        self.assertIsNotNone(results[0].error)
+        self.assertNotIn(str(self.program.resolve()), BuildManifest(self.path).programs)
+        # the output of the earlier build is still there, but the sources that made it are not known anymore
+        self.library.write_text(LIBRARY, encoding="utf8")
+        self.assertTrue(self.program.with_suffix(".asm").is_file())
+        self.assertFalse(self.is_current())
+
+    def test_edited_while_building(self):
+        result = compile_file(self.program, OPTIONS)
+        self.assertEqual(set(result.sources), {self.program, self.library})
+        # the batch records after every program is compiled, by then the library is newer than the output
+        self.library.write_text(LIBRARY.replace("n * 2", "n + n"), encoding="utf8")
+        manifest = BuildManifest(self.path)
+        manifest.record(result.location, OPTIONS, result.sources)
+        manifest.save()
+        self.assertFalse(self.is_current())
+
+    def test_deleted_while_building(self):
+        result = compile_file(self.program, OPTIONS)
+        self.library.unlink()
+        manifest = BuildManifest(self.path)
+        manifest.record(result.location, OPTIONS, result.sources)
+        manifest.save()
+        self.assertFalse(self.is_current())
+
+    def test_record(self):
+        manifest = BuildManifest(self.path)
+        sources = {self.program: source_digest(PROGRAM), self.library: source_digest(LIBRARY)}
+        manifest.record(self.program, OPTIONS, sources, instructions=12, warnings=1)
+        self.assertEqual(manifest.stats(self.program), {"instructions": 12, "warnings": 1})
+        self.program.with_suffix(".asm").write_text("", encoding="utf8")
+        self.assertTrue(manifest.is_current(self.program, self.program.with_suffix(".asm"), OPTIONS))
+        manifest.forget(self.program)
+        self.assertFalse(manifest.is_current(self.program, self.program.with_suffix(".asm"), OPTIONS))
+        manifest.forget(self.program)   # nothing to forget anymore
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys, os
+import unittest
+import json, tracemalloc
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.profiler import Profile, timed
+
+
+def clock(*times: float):
+    """perf_counter of the profiler returning the times in order"""
+    return mock.patch("src.profiler.time.perf_counter", side_effect=times)
+
+
+class TestProfile(unittest.TestCase):
+
+    def test_phases(self):
+        profile = Profile()
+        with clock(1.0, 1.5, 2.0, 4.0, 5.0, 5.25):
+            with profile.phase("validate"):
+                with profile.phase("validate.link"):
+                    pass
+            with profile.phase("translate"):
+                pass
+        self.assertEqual(profile.phases, {"validate.link": 0.5, "validate": 3.0, "translate": 0.25})
+        # the nested phase is part of its parent already
+        self.assertEqual(profile.as_dict()["total"], 3.25)
+
+    def test_repeated_phase(self):
+        profile = Profile()
+        with clock(0.0, 1.0, 10.0, 12.0):
+            for _ in range(2):
+                with profile.phase("optimize"):
+                    pass
+        self.assertEqual(profile.as_dict()["phases"], {"optimize": 3.0})
+
+    def test_failed_phase(self):
+        profile = Profile()
+        with clock(0.0, 2.0), self.assertRaises(ValueError):
+            with profile.phase("parse"):
+                raise ValueError("syntax")
+        self.assertEqual(profile.phases, {"parse": 2.0})
+
+    def test_counters(self):
+        profile = Profile()
+        profile.count("inlined_calls.f", 2)
+        profile.count("tokens", 40)
+        profile.count("inlined_calls.f", 3)
+        profile.count("tokens", 0)
+        self.assertEqual(profile.as_dict()["counters"], {"inlined_calls.f": 5, "tokens": 40})
+        # the dict is a copy
+        profile.as_dict()["counters"]["tokens"] = 0
+        self.assertEqual(profile.counters["tokens"], 40)
+
+    def test_json(self):
+        profile = Profile()
+        with clock(0.0, 0.125):
+            with profile.phase("export"):
+                pass
+        profile.count("instructions", 7)
+        self.assertEqual(json.loads(profile.to_json()), profile.as_dict())
+        self.assertNotIn("peak_memory", profile.as_dict())
+
+    def test_peak_memory(self):
+        profile = Profile()
+        tracemalloc.start()
+        try:
+            with profile.phase("parse"):
+                with profile.phase("parse.tokens"):
+                    data = bytearray(1 << 20)
+                del data
+        finally:
+            tracemalloc.stop()
+        peaks = profile.as_dict()["peak_memory"]
+        self.assertGreaterEqual(peaks["parse.tokens"], 1 << 20)
+        self.assertGreaterEqual(peaks["parse"], peaks["parse.tokens"])
+
+    def test_timed(self):
+        profile = Profile()
+        with clock(0.0, 1.0):
+            with timed(profile, "fold"):
+                pass
+        with timed(None, "fold"):
+            pass
+        self.assertEqual(profile.phases, {"fold": 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys, os
+import unittest
+import io
+from unittest import mock
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ui import ProgressReporter
+
+
+class Terminal(io.StringIO):
+
+    def isatty(self) -> bool:
+        return True
+
+
+def clock(now: list[float]):
+    """perf_counter of the reporter returning now[0], moved on by the test"""
+    return mock.patch("src.ui.time.perf_counter", side_effect=lambda: now[0])
+
+
+class TestProgressReporter(unittest.TestCase):
+
+    def renders(self, stream: io.StringIO) -> int:
+        return stream.getvalue().count("Complete")
+
+    def test_disabled(self):
+        stream = Terminal()
+        reporter = ProgressReporter(enabled=False, stream=stream)
+        for i in range(5):
+            reporter.report("parse", i + 1, 5)
+        reporter.finish()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_not_a_terminal(self):
+        stream = io.StringIO()
+        reporter = ProgressReporter(stream=stream)
+        self.assertFalse(reporter.enabled)
+        reporter.report("parse", 5, 5)
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_throttled(self):
+        stream = Terminal()
+        reporter = ProgressReporter(rate=10, stream=stream)
+        now = [100.0]
+        with clock(now):
+            for i in range(50):
+                reporter.report("tokenize", i, 100)
+            self.assertEqual(self.renders(stream), 1)
+            now[0] += 0.05
+            reporter.report("tokenize", 50, 100)
+            self.assertEqual(self.renders(stream), 1)
+            now[0] += 0.06
+            reporter.report("tokenize", 51, 100)
+            self.assertEqual(self.renders(stream), 2)
+            self.assertIn("51% Complete", stream.getvalue())
+            # the end always shows, and ends the line
+            reporter.report("tokenize", 100, 100)
+        self.assertEqual(self.renders(stream), 3)
+        self.assertTrue(stream.getvalue().endswith("100% Complete\r\n"))
+        self.assertIsNone(reporter.stage)
+
+    def test_refuse_finish(self):
+        stream = Terminal()
+        reporter = ProgressReporter(stream=stream)
+        with clock([0.0]):
+            reporter.report("parse", 3, 3, refuse_finish=True)
+        self.assertFalse(stream.getvalue().endswith("\n"))
+        reporter.finish()
+        reporter.finish()
+        self.assertEqual(stream.getvalue().count("\n"), 1)
+
+    def test_next_stage(self):
+        stream = Terminal()
+        reporter = ProgressReporter(stream=stream)
+        with clock([0.0]):
+            reporter.report("parse", 1, 3)
+            # a new stage is not throttled and starts on its own line
+            reporter.report("validate", 1, 3)
+        self.assertEqual(self.renders(stream), 2)
+        self.assertEqual(stream.getvalue().count("\n"), 1)
+        self.assertEqual(reporter.stage, "validate")
+
+
+if __name__ == "__main__":
+    unittest.main()
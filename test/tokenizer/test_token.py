@@ -49,6 +49,19 @@ class TestToken(unittest.TestCase):
         self.assertTrue(CombinedToken.match(alpha_instance))
         self.assertTrue(CombinedToken.match(beta_instance))
 
+    def test_kind_masks(self):
+        AlphaToken = Token.literal("alpha", "AlphaToken")
+        BetaToken = Token.literal("beta", "BetaToken")
+        GammaToken = Token.literal("gamma", "GammaToken")
+        CombinedToken = Token.any(AlphaToken, BetaToken, class_name="CombinedToken")
+
+        self.assertNotEqual(AlphaToken.kind, BetaToken.kind)
+        self.assertEqual(CombinedToken.mask, AlphaToken.kind | BetaToken.kind)
+        self.assertFalse(CombinedToken.match(GammaToken("gamma", self.line)))
+        self.assertFalse(AlphaToken.match(None))
+        self.assertTrue(Token.match(GammaToken("gamma", self.line)))
+        self.assertFalse(AlphaToken.match(Token("alpha", self.line)))
+
 class TestLine(unittest.TestCase):
 
     def test_line_initialization(self):